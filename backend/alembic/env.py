@@ -4,15 +4,20 @@ from logging.config import fileConfig
 
 from dotenv import load_dotenv
 from sqlalchemy import engine_from_config, pool
+from sqlmodel import SQLModel
 
+import app.db.models  # noqa: F401 -- registers the tables on SQLModel.metadata
 from alembic import context
 
 # Load environment variables from .env file in development
 load_dotenv()
 
 
-# Get the SQLAlchemy URL from environment variable
+# Get the SQLAlchemy URL from environment variable: the app's DATABASE_URL,
+# else assembled from the DB_* variables
 def get_url():
+    if os.getenv("DATABASE_URL"):
+        return os.getenv("DATABASE_URL")
     user = os.getenv("DB_USER", "root")
     password = os.getenv("DB_PASSWORD", "")
     host = os.getenv("DB_HOST", "localhost")
@@ -34,10 +39,8 @@ config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL)
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# Add your model's MetaData object here for 'autogenerate' support
-# from myapp.models import Base
-# target_metadata = Base.metadata
-target_metadata = None
+# The models' MetaData, for 'autogenerate' support
+target_metadata = SQLModel.metadata
 
 
 def run_migrations_offline() -> None:
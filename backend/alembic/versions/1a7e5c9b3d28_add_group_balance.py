@@ -0,0 +1,44 @@
+"""add group balance
+
+GroupBalance predates the migration series and was only ever created by the
+app's create_all(), which left databases upgraded from the baseline schema
+without it. Created here with the float amounts of its time; a later revision
+moves it to minor units. Groups without rows rebuild their ledger on their
+next write, so nothing is backfilled.
+
+Revision ID: 1a7e5c9b3d28
+Revises: 8b1e4d2c6a90
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "1a7e5c9b3d28"
+down_revision: Union[str, None] = "8b1e4d2c6a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The app's create_all() may already have created the table
+    if sa.inspect(op.get_bind()).has_table("groupbalance"):
+        return
+    op.create_table(
+        "groupbalance",
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("net_amount", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["group_id"], ["group.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("group_id", "user_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("groupbalance")
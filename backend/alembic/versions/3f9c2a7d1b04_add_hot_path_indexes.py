@@ -0,0 +1,78 @@
+"""add hot path indexes
+
+Indexes for every hot lookup path, including the keyset pagination indexes
+declared on the models earlier. Tables may have been created by the app's
+create_all() with some of these already in place, so each index is only
+created when its table exists and the index does not.
+
+Revision ID: 3f9c2a7d1b04
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9c2a7d1b04"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_user_email", "user", ["email"]),
+    ("ix_usergrouplink_group", "usergrouplink", ["group_id", "user_id"]),
+    ("ix_friendship_friend", "friendship", ["friend_id", "user_id"]),
+    (
+        "ix_groupdebtsummary_group_pair",
+        "groupdebtsummary",
+        ["group_id", "debtor_id", "creditor_id"],
+    ),
+    ("ix_groupdebtsummary_creditor", "groupdebtsummary", ["creditor_id"]),
+    ("ix_groupdebtsummary_debtor", "groupdebtsummary", ["debtor_id"]),
+    (
+        "ix_expenseparticipantlink_user",
+        "expenseparticipantlink",
+        ["user_id", "expense_id"],
+    ),
+    ("ix_expense_group_created", "expense", ["group_id", "created_at", "id"]),
+    ("ix_expense_paid_by", "expense", ["paid_by_id", "group_id"]),
+    ("ix_activity_user_timestamp", "activity", ["user_id", "timestamp", "id"]),
+    ("ix_settlement_group_created", "settlement", ["group_id", "created_at", "id"]),
+    (
+        "ix_selfexpense_user_created",
+        "selfmanagementexpense",
+        ["user_id", "created_at", "id"],
+    ),
+    (
+        "ix_selfexpense_tag_created",
+        "selfmanagementexpense",
+        ["tag_id", "created_at", "id"],
+    ),
+    ("ix_tag_user", "tag", ["user_id"]),
+]
+
+
+def _existing_indexes(inspector, table):
+    return {index["name"] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if not inspector.has_table(table):
+            continue
+        if name not in _existing_indexes(inspector, table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for name, table, _ in reversed(INDEXES):
+        if inspector.has_table(table) and name in _existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
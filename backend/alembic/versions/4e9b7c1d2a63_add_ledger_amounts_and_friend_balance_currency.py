@@ -0,0 +1,169 @@
+"""add ledger amounts and friend balance currency
+
+Participant links gain ledger_amount, their share converted into the
+ledger's currency (the group's base currency, else DEFAULT_CURRENCY) once,
+when the expense is written. Reversals, replays and checkpoints use it, so
+reloading a rate no longer leaves balances behind. Existing links are
+backfilled at the rate of their expense's date, the rate their balances were
+applied at (rates for foreign-currency expenses must be loaded first).
+
+FriendBalance is keyed by currency as well, since groups keep their debts in
+different base currencies, and is re-summed from GroupDebtSummary.
+
+Revision ID: 4e9b7c1d2a63
+Revises: c8f2a6d3e149
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from sqlmodel import Session
+
+from alembic import op
+from app.core import fx
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = "4e9b7c1d2a63"
+down_revision: Union[str, None] = "c8f2a6d3e149"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Links of expenses not in their ledger's currency
+FOREIGN_LINKS = """
+    SELECT link.expense_id, link.user_id, link.amount_owed, expense.currency,
+           COALESCE({group}.base_currency, :default_currency),
+           expense.created_at AS spent_at
+    FROM expenseparticipantlink AS link
+    JOIN expense ON expense.id = link.expense_id
+    LEFT JOIN {group} ON {group}.id = expense.group_id
+    WHERE expense.currency <> COALESCE({group}.base_currency, :default_currency)
+"""
+
+# Each debt counts for the creditor (friend owes them) and against the debtor,
+# in the currency of its group
+FRIEND_BALANCES = """
+    INSERT INTO friendbalance (user_id, friend_id, currency, balance)
+    SELECT user_id, friend_id, currency, SUM(amount)
+    FROM (
+        SELECT debt.creditor_id AS user_id, debt.debtor_id AS friend_id,
+               COALESCE({group}.base_currency, :default_currency) AS currency,
+               debt.amount_owed AS amount
+        FROM groupdebtsummary AS debt
+        LEFT JOIN {group} ON {group}.id = debt.group_id
+        UNION ALL
+        SELECT debt.debtor_id, debt.creditor_id,
+               COALESCE({group}.base_currency, :default_currency),
+               -debt.amount_owed
+        FROM groupdebtsummary AS debt
+        LEFT JOIN {group} ON {group}.id = debt.group_id
+    ) AS debts
+    GROUP BY user_id, friend_id, currency
+    HAVING SUM(amount) <> 0
+"""
+
+
+def _columns(inspector, table):
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def _backfill_ledger_amounts(bind, group):
+    op.execute("UPDATE expenseparticipantlink SET ledger_amount = amount_owed")
+    links = bind.execute(
+        sa.text(FOREIGN_LINKS.format(group=group)).columns(spent_at=sa.DateTime()),
+        {"default_currency": settings.DEFAULT_CURRENCY},
+    ).all()
+    if not links:
+        return
+    keys = [
+        fx.conversion(source, target, spent_at)
+        for _, _, _, source, target, spent_at in links
+    ]
+    with Session(bind=bind) as session:
+        factors = fx.conversion_factors(session, keys)
+    for key in keys:
+        if key not in factors:
+            raise fx.missing_rate(key)
+    bind.execute(
+        sa.text(
+            "UPDATE expenseparticipantlink SET ledger_amount = :ledger_amount"
+            " WHERE expense_id = :expense_id AND user_id = :user_id"
+        ),
+        [
+            {
+                "expense_id": expense_id,
+                "user_id": user_id,
+                "ledger_amount": fx.convert(amount_owed, factors[key]),
+            }
+            for (expense_id, user_id, amount_owed, _, _, _), key in zip(links, keys)
+        ],
+    )
+
+
+def _create_friend_balances(*key_columns):
+    op.create_table(
+        "friendbalance",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("friend_id", sa.Integer(), nullable=False),
+        *key_columns,
+        sa.Column("balance", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["friend_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint(
+            "user_id", "friend_id", *(column.name for column in key_columns)
+        ),
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    group = bind.dialect.identifier_preparer.quote("group")
+
+    if "ledger_amount" not in _columns(inspector, "expenseparticipantlink"):
+        with op.batch_alter_table("expenseparticipantlink") as batch_op:
+            batch_op.add_column(
+                sa.Column("ledger_amount", sa.BigInteger(), nullable=True)
+            )
+        _backfill_ledger_amounts(bind, group)
+        with op.batch_alter_table("expenseparticipantlink") as batch_op:
+            batch_op.alter_column(
+                "ledger_amount", existing_type=sa.BigInteger(), nullable=False
+            )
+
+    # The primary key changes, so the table is recreated rather than altered
+    if "currency" not in _columns(inspector, "friendbalance"):
+        op.drop_table("friendbalance")
+        _create_friend_balances(
+            sa.Column("currency", sa.String(length=3), nullable=False)
+        )
+    op.execute("DELETE FROM friendbalance")
+    bind.execute(
+        sa.text(FRIEND_BALANCES.format(group=group)),
+        {"default_currency": settings.DEFAULT_CURRENCY},
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("expenseparticipantlink") as batch_op:
+        batch_op.drop_column("ledger_amount")
+
+    op.drop_table("friendbalance")
+    _create_friend_balances()
+    op.execute(
+        """
+        INSERT INTO friendbalance (user_id, friend_id, balance)
+        SELECT user_id, friend_id, SUM(amount)
+        FROM (
+            SELECT creditor_id AS user_id, debtor_id AS friend_id, amount_owed AS amount
+            FROM groupdebtsummary
+            UNION ALL
+            SELECT debtor_id, creditor_id, -amount_owed
+            FROM groupdebtsummary
+        ) AS debts
+        GROUP BY user_id, friend_id
+        HAVING SUM(amount) <> 0
+        """
+    )
@@ -0,0 +1,44 @@
+"""add group ledger checkpoint
+
+Revision ID: 5d8f2b7e9c31
+Revises: c47a9e3f5b12
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d8f2b7e9c31"
+down_revision: Union[str, None] = "c47a9e3f5b12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The app's create_all() may already have created the table
+    if sa.inspect(op.get_bind()).has_table("groupledgercheckpoint"):
+        return
+    op.create_table(
+        "groupledgercheckpoint",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("last_expense_id", sa.Integer(), nullable=False),
+        sa.Column("last_settlement_id", sa.Integer(), nullable=False),
+        sa.Column("balances", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["group_id"], ["group.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_groupledgercheckpoint_group", "groupledgercheckpoint", ["group_id", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_groupledgercheckpoint_group", table_name="groupledgercheckpoint")
+    op.drop_table("groupledgercheckpoint")
@@ -0,0 +1,70 @@
+"""add fx rates and group currency
+
+Adds the FxRate table and Group.base_currency; existing groups keep
+DEFAULT_CURRENCY. Groups that already hold expenses in another currency had
+them added as if they were in the group's currency, so their running
+balances and checkpoints are cleared and rebuilt, converted, on the group's
+next write (rates for those expenses must be loaded first).
+
+Revision ID: 7c3d9e1a4b56
+Revises: e2a6c8d4f719
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.core.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3d9e1a4b56"
+down_revision: Union[str, None] = "e2a6c8d4f719"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Groups whose expenses are not all in the group's own currency
+MIXED_CURRENCY_GROUPS = """
+    SELECT DISTINCT expense.group_id
+    FROM expense JOIN {group} ON {group}.id = expense.group_id
+    WHERE expense.currency <> {group}.base_currency
+"""
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("fxrate"):
+        op.create_table(
+            "fxrate",
+            sa.Column("currency", sa.String(length=3), nullable=False),
+            sa.Column("rate_date", sa.Date(), nullable=False),
+            sa.Column("rate", sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint("currency", "rate_date"),
+        )
+    columns = {column["name"] for column in inspector.get_columns("group")}
+    if "base_currency" not in columns:
+        with op.batch_alter_table("group") as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    "base_currency",
+                    sa.String(length=3),
+                    nullable=False,
+                    server_default=settings.DEFAULT_CURRENCY,
+                )
+            )
+
+    mixed = MIXED_CURRENCY_GROUPS.format(
+        group=bind.dialect.identifier_preparer.quote("group")
+    )
+    for table in ("groupbalance", "groupledgercheckpoint"):
+        if inspector.has_table(table):
+            op.execute(f"DELETE FROM {table} WHERE group_id IN ({mixed})")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("group") as batch_op:
+        batch_op.drop_column("base_currency")
+    op.drop_table("fxrate")
@@ -0,0 +1,60 @@
+"""add friend balance
+
+Materialized per-(user, friend) net balance behind /expense-summary, backfilled
+from the current GroupDebtSummary rows. The app's create_all() may already have
+created the (empty) table, in which case only the backfill runs.
+
+Revision ID: 8b1e4d2c6a90
+Revises: 3f9c2a7d1b04
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8b1e4d2c6a90"
+down_revision: Union[str, None] = "3f9c2a7d1b04"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("friendbalance"):
+        op.create_table(
+            "friendbalance",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("friend_id", sa.Integer(), nullable=False),
+            sa.Column("balance", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.ForeignKeyConstraint(["friend_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("user_id", "friend_id"),
+        )
+
+    if bind.execute(sa.text("SELECT COUNT(*) FROM friendbalance")).scalar():
+        return
+    # Each debt counts for the creditor (friend owes them) and against the debtor
+    op.execute(
+        """
+        INSERT INTO friendbalance (user_id, friend_id, balance)
+        SELECT user_id, friend_id, ROUND(SUM(amount), 2)
+        FROM (
+            SELECT creditor_id AS user_id, debtor_id AS friend_id, amount_owed AS amount
+            FROM groupdebtsummary
+            UNION ALL
+            SELECT debtor_id, creditor_id, -amount_owed
+            FROM groupdebtsummary
+        ) AS debts
+        GROUP BY user_id, friend_id
+        HAVING ROUND(SUM(amount), 2) <> 0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("friendbalance")
@@ -0,0 +1,40 @@
+"""add friends version
+
+Adds User.friends_version, starting at 0. Cached friend lists are checked
+against it, so friendships added through one worker invalidate the lists
+cached by every other.
+
+Revision ID: 9a2c4f7e1b85
+Revises: 4e9b7c1d2a63
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a2c4f7e1b85"
+down_revision: Union[str, None] = "4e9b7c1d2a63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "friends_version" in {info["name"] for info in inspector.get_columns("user")}:
+        return
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "friends_version", sa.Integer(), nullable=False, server_default="0"
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("friends_version")
@@ -0,0 +1,45 @@
+"""add group and ledger versions
+
+Adds the counters behind the ETags on the debt and expense reads:
+Group.version and User.ledger_version, both starting at 0.
+
+Revision ID: a9d4e6f2c815
+Revises: 7c3d9e1a4b56
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a9d4e6f2c815"
+down_revision: Union[str, None] = "7c3d9e1a4b56"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column) pairs added by this revision
+VERSION_COLUMNS = [
+    ("group", "version"),
+    ("user", "ledger_version"),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, column in VERSION_COLUMNS:
+        if column in {info["name"] for info in inspector.get_columns(table)}:
+            continue
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(
+                sa.Column(column, sa.Integer(), nullable=False, server_default="0")
+            )
+
+
+def downgrade() -> None:
+    for table, column in VERSION_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column(column)
@@ -0,0 +1,94 @@
+"""add user search columns
+
+Normalized name and email columns behind /users/search, with indexes for
+their exact and prefix lookups. Existing users are backfilled in batches.
+
+Revision ID: b6e1d9a4c372
+Revises: f3a8c2e5d917
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.core.user_search import normalize_search_text
+
+# revision identifiers, used by Alembic.
+revision: str = "b6e1d9a4c372"
+down_revision: Union[str, None] = "f3a8c2e5d917"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (column, index name)
+SEARCH_COLUMNS = [
+    ("search_name", "ix_user_search_name"),
+    ("search_email", "ix_user_search_email"),
+]
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _backfill(bind):
+    users = sa.table(
+        "user",
+        sa.column("id"),
+        sa.column("name"),
+        sa.column("email"),
+        sa.column("search_name"),
+        sa.column("search_email"),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(users.c.id, users.c.name, users.c.email)
+            .where(users.c.id > last_id)
+            .order_by(users.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        bind.execute(
+            users.update()
+            .where(users.c.id == sa.bindparam("user_id"))
+            .values(
+                search_name=sa.bindparam("normalized_name"),
+                search_email=sa.bindparam("normalized_email"),
+            ),
+            [
+                {
+                    "user_id": user_id,
+                    "normalized_name": normalize_search_text(name),
+                    "normalized_email": normalize_search_text(email),
+                }
+                for user_id, name, email in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {column["name"] for column in inspector.get_columns("user")}
+    indexes = {index["name"] for index in inspector.get_indexes("user")}
+    for column, _ in SEARCH_COLUMNS:
+        if column not in columns:
+            with op.batch_alter_table("user") as batch_op:
+                batch_op.add_column(
+                    sa.Column(
+                        column, sa.String(length=255), nullable=False, server_default=""
+                    )
+                )
+    for column, index in SEARCH_COLUMNS:
+        if index not in indexes:
+            op.create_index(index, "user", [column, "id"])
+    _backfill(bind)
+
+
+def downgrade() -> None:
+    for column, index in SEARCH_COLUMNS:
+        op.drop_index(index, table_name="user")
+        with op.batch_alter_table("user") as batch_op:
+            batch_op.drop_column(column)
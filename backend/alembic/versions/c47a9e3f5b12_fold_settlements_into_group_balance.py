@@ -0,0 +1,38 @@
+"""fold settlements into group balance
+
+GroupBalance rows now include the effect of every settlement, applied at
+settle-up time. Rows written before this change only hold expenses, so they
+are cleared; each group rebuilds its ledger (expenses plus settlements) on its
+next write. GroupDebtSummary already accounts for settlements and is kept.
+
+Revision ID: c47a9e3f5b12
+Revises: 1a7e5c9b3d28
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c47a9e3f5b12"
+down_revision: Union[str, None] = "1a7e5c9b3d28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _clear_group_balances():
+    if sa.inspect(op.get_bind()).has_table("groupbalance"):
+        op.execute("DELETE FROM groupbalance")
+
+
+def upgrade() -> None:
+    _clear_group_balances()
+
+
+def downgrade() -> None:
+    # Expense-only balances are rebuilt lazily by the previous code as well
+    _clear_group_balances()
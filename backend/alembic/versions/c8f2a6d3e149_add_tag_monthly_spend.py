@@ -0,0 +1,106 @@
+"""add tag monthly spend
+
+Rollup of self-expense spend per tag and calendar month behind /api/tags,
+backfilled from the existing self-expenses. Amounts are summed in minor
+units, as the app maintains them. The app's create_all() may already have
+created the (empty) table, in which case only the backfill runs.
+
+Revision ID: c8f2a6d3e149
+Revises: b6e1d9a4c372
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+
+from collections import defaultdict
+from datetime import date
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.core.money import to_minor
+
+# revision identifiers, used by Alembic.
+revision: str = "c8f2a6d3e149"
+down_revision: Union[str, None] = "b6e1d9a4c372"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INSERT_BATCH_SIZE = 1000
+
+
+def _backfill(bind):
+    expenses = sa.table(
+        "selfmanagementexpense",
+        sa.column("tag_id"),
+        sa.column("user_id"),
+        sa.column("created_at", sa.DateTime()),
+        sa.column("amount"),
+    )
+    rollups = defaultdict(lambda: [0, 0, None])  # total, count, latest
+    owners = {}
+    result = bind.execution_options(stream_results=True).execute(
+        sa.select(
+            expenses.c.tag_id,
+            expenses.c.user_id,
+            expenses.c.created_at,
+            expenses.c.amount,
+        )
+    )
+    for tag_id, user_id, created_at, amount in result:
+        rollup = rollups[(tag_id, date(created_at.year, created_at.month, 1))]
+        rollup[0] += to_minor(amount)
+        rollup[1] += 1
+        rollup[2] = max(rollup[2] or created_at, created_at)
+        owners[tag_id] = user_id
+
+    rows = [
+        {
+            "tag_id": tag_id,
+            "month": month,
+            "user_id": owners[tag_id],
+            "total_amount": total,
+            "expense_count": count,
+            "latest_expense_at": latest,
+        }
+        for (tag_id, month), (total, count, latest) in rollups.items()
+    ]
+    table = sa.table(
+        "tagmonthlyspend",
+        sa.column("tag_id"),
+        sa.column("month"),
+        sa.column("user_id"),
+        sa.column("total_amount"),
+        sa.column("expense_count"),
+        sa.column("latest_expense_at"),
+    )
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        bind.execute(table.insert(), rows[start : start + INSERT_BATCH_SIZE])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("tagmonthlyspend"):
+        op.create_table(
+            "tagmonthlyspend",
+            sa.Column("tag_id", sa.Integer(), nullable=False),
+            sa.Column("month", sa.Date(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("total_amount", sa.BigInteger(), nullable=False),
+            sa.Column("expense_count", sa.Integer(), nullable=False),
+            sa.Column("latest_expense_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["tag_id"], ["tag.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.PrimaryKeyConstraint("tag_id", "month"),
+        )
+        op.create_index(
+            "ix_tagmonthlyspend_user_month", "tagmonthlyspend", ["user_id", "month"]
+        )
+
+    if bind.execute(sa.text("SELECT COUNT(*) FROM tagmonthlyspend")).scalar():
+        return
+    _backfill(bind)
+
+
+def downgrade() -> None:
+    op.drop_table("tagmonthlyspend")
@@ -0,0 +1,47 @@
+"""add activity stream indexes
+
+The activity SSE stream reads a user's activities and their groups'
+activities after an id cursor; (user_id, id) and (group_id, id) make both
+reads range scans. Skipped where the app's create_all() already made them.
+
+Revision ID: d5b7f1c3e820
+Revises: a9d4e6f2c815
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5b7f1c3e820"
+down_revision: Union[str, None] = "a9d4e6f2c815"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, columns) on the activity table
+INDEXES = [
+    ("ix_activity_user_id", ["user_id", "id"]),
+    ("ix_activity_group_id", ["group_id", "id"]),
+]
+
+
+def _existing_indexes(inspector):
+    return {index["name"] for index in inspector.get_indexes("activity")}
+
+
+def upgrade() -> None:
+    existing = _existing_indexes(sa.inspect(op.get_bind()))
+    for name, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, "activity", columns)
+
+
+def downgrade() -> None:
+    existing = _existing_indexes(sa.inspect(op.get_bind()))
+    for name, _ in reversed(INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name="activity")
@@ -0,0 +1,112 @@
+"""store money in minor units
+
+Ledger amounts become integer minor units (paise/cents). Stored amounts are
+multiplied by 100 and rounded before their columns turn into BIGINT. Columns
+that are already integers (tables created by the app's create_all() on the
+new models) are left alone.
+
+The derived tables are rebuilt rather than converted row by row, so rounding
+cannot leave them a paisa away from their sources. GroupBalance and the
+ledger checkpoints are cleared, and each group replays its converted history
+on its next write. FriendBalance is re-summed from the converted
+GroupDebtSummary rows.
+
+Revision ID: e2a6c8d4f719
+Revises: 5d8f2b7e9c31
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a6c8d4f719"
+down_revision: Union[str, None] = "5d8f2b7e9c31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column) pairs converted in place
+AMOUNT_COLUMNS = [
+    ("expense", "amount"),
+    ("expenseparticipantlink", "amount_owed"),
+    ("groupdebtsummary", "amount_owed"),
+    ("settlement", "amount"),
+]
+# Derived from the tables above and rebuilt from them
+DERIVED_COLUMNS = [
+    ("groupbalance", "net_amount"),
+    ("friendbalance", "balance"),
+]
+
+
+def _column_type(inspector, table, column):
+    if not inspector.has_table(table):
+        return None
+    for info in inspector.get_columns(table):
+        if info["name"] == column:
+            return info["type"]
+    return None
+
+
+def _alter(table, column, existing_type, type_):
+    with op.batch_alter_table(table) as batch_op:
+        batch_op.alter_column(
+            column, existing_type=existing_type, type_=type_, existing_nullable=False
+        )
+
+
+def _rebuild_friend_balances():
+    op.execute("DELETE FROM friendbalance")
+    op.execute(
+        """
+        INSERT INTO friendbalance (user_id, friend_id, balance)
+        SELECT user_id, friend_id, SUM(amount)
+        FROM (
+            SELECT creditor_id AS user_id, debtor_id AS friend_id, amount_owed AS amount
+            FROM groupdebtsummary
+            UNION ALL
+            SELECT debtor_id, creditor_id, -amount_owed
+            FROM groupdebtsummary
+        ) AS debts
+        GROUP BY user_id, friend_id
+        HAVING SUM(amount) <> 0
+        """
+    )
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, column in AMOUNT_COLUMNS:
+        existing_type = _column_type(inspector, table, column)
+        if existing_type is None or isinstance(existing_type, sa.Integer):
+            continue
+        op.execute(f"UPDATE {table} SET {column} = ROUND({column} * 100)")
+        _alter(table, column, existing_type, sa.BigInteger())
+
+    for table, column in DERIVED_COLUMNS:
+        existing_type = _column_type(inspector, table, column)
+        if existing_type is None:
+            continue
+        op.execute(f"DELETE FROM {table}")
+        if not isinstance(existing_type, sa.Integer):
+            _alter(table, column, existing_type, sa.BigInteger())
+    if inspector.has_table("groupledgercheckpoint"):
+        op.execute("DELETE FROM groupledgercheckpoint")
+    if inspector.has_table("friendbalance"):
+        _rebuild_friend_balances()
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for table, column in AMOUNT_COLUMNS + DERIVED_COLUMNS:
+        existing_type = _column_type(inspector, table, column)
+        if existing_type is None or not isinstance(existing_type, sa.Integer):
+            continue
+        _alter(table, column, existing_type, sa.Float())
+        op.execute(f"UPDATE {table} SET {column} = {column} / 100.0")
+    if inspector.has_table("groupledgercheckpoint"):
+        op.execute("DELETE FROM groupledgercheckpoint")
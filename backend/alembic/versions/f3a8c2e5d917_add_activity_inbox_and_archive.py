@@ -0,0 +1,100 @@
+"""add activity inbox and archive
+
+Feeds now read ActivityInbox pointers instead of filtering Activity by
+user_id. Every existing activity gets a pointer for its own user, which is
+exactly the feed it was shown in before. The archive tables start empty;
+`python -m app.core.activity_inbox` fills them.
+
+Downgrading moves archived activities back into the live table. Group events
+written once since the upgrade then show only in their author's feed.
+
+Revision ID: f3a8c2e5d917
+Revises: d5b7f1c3e820
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a8c2e5d917"
+down_revision: Union[str, None] = "d5b7f1c3e820"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVITY_COLUMNS = (
+    "id, action, user_id, expense_id, group_id, timestamp, activity_type,"
+    " self_expense_id"
+)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("activityinbox"):
+        op.create_table(
+            "activityinbox",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("activity_id", sa.Integer(), nullable=False),
+            sa.Column("timestamp", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+            sa.ForeignKeyConstraint(["activity_id"], ["activity.id"]),
+            sa.PrimaryKeyConstraint("user_id", "activity_id"),
+        )
+        op.create_index(
+            "ix_activityinbox_user_timestamp",
+            "activityinbox",
+            ["user_id", "timestamp", "activity_id"],
+        )
+        op.create_index("ix_activityinbox_activity", "activityinbox", ["activity_id"])
+    if not inspector.has_table("activityarchive"):
+        op.create_table(
+            "activityarchive",
+            sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column("action", sa.String(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("expense_id", sa.Integer(), nullable=True),
+            sa.Column("group_id", sa.Integer(), nullable=True),
+            sa.Column("timestamp", sa.DateTime(), nullable=False),
+            sa.Column("activity_type", sa.String(length=50), nullable=True),
+            sa.Column("self_expense_id", sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    if not inspector.has_table("activityinboxarchive"):
+        op.create_table(
+            "activityinboxarchive",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("activity_id", sa.Integer(), nullable=False),
+            sa.Column("timestamp", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("user_id", "activity_id"),
+        )
+        op.create_index(
+            "ix_activityinboxarchive_user_timestamp",
+            "activityinboxarchive",
+            ["user_id", "timestamp", "activity_id"],
+        )
+
+    # Activities written before the inbox existed, shown in their own user's feed
+    op.execute(
+        """
+        INSERT INTO activityinbox (user_id, activity_id, timestamp)
+        SELECT user_id, id, timestamp
+        FROM activity
+        WHERE NOT EXISTS (
+            SELECT 1 FROM activityinbox WHERE activityinbox.activity_id = activity.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        f"INSERT INTO activity ({ACTIVITY_COLUMNS})"
+        f" SELECT {ACTIVITY_COLUMNS} FROM activityarchive"
+    )
+    op.drop_table("activityinboxarchive")
+    op.drop_table("activityarchive")
+    op.drop_table("activityinbox")
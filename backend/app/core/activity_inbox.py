@@ -0,0 +1,106 @@
+"""
+Per-user activity feeds and their monthly archive.
+
+An activity is written once and delivered to each of its recipients as a
+compact ActivityInbox pointer, so a group event costs one Activity row however
+many members see it. Feeds page through the pointers with the
+(user_id, timestamp, activity_id) index, which keeps the newest page
+O(page) regardless of history.
+
+Whole months older than ACTIVITY_LIVE_MONTHS are moved, with their pointers,
+to the archive tables by a periodic job:
+
+    python -m app.core.activity_inbox [LIVE_MONTHS]
+
+Archived entries stay readable: a feed continues into the archive once it
+runs past the oldest live entry.
+"""
+
+import sys
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import insert
+from sqlmodel import Session, delete, select
+
+from app.core.config import settings
+from app.db.models import Activity, ActivityArchive, ActivityInbox, ActivityInboxArchive
+
+
+def deliver(
+    activity: Activity, user_ids: Optional[Iterable[int]] = None
+) -> List[ActivityInbox]:
+    """
+    Inbox entries showing `activity` to each of `user_ids` (by default its own
+    user). Adding them to a session adds the activity too.
+    """
+    if user_ids is None:
+        user_ids = [activity.user_id]
+    return [
+        ActivityInbox(user_id=user_id, activity=activity, timestamp=activity.timestamp)
+        for user_id in dict.fromkeys(user_ids)
+    ]
+
+
+def archive_cutoff(now: datetime, live_months: int) -> datetime:
+    """Start of the oldest month kept live: the current month is month 0."""
+    month_index = now.year * 12 + now.month - 1 - live_months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def archive_activities(db: Session, before: datetime, batch_size: int) -> int:
+    """
+    Move activities older than `before`, and their inbox entries, to the archive
+    tables in batches of `batch_size`, committing after each batch.
+    """
+    archived = 0
+    while True:
+        activities = (
+            db.execute(
+                select(Activity.__table__)
+                .where(Activity.timestamp < before)
+                .order_by(Activity.id)
+                .limit(batch_size)
+            )
+            .mappings()
+            .all()
+        )
+        if not activities:
+            return archived
+        activity_ids = [activity["id"] for activity in activities]
+        entries = (
+            db.execute(
+                select(ActivityInbox.__table__).where(
+                    ActivityInbox.activity_id.in_(activity_ids)
+                )
+            )
+            .mappings()
+            .all()
+        )
+        db.execute(insert(ActivityArchive), [dict(row) for row in activities])
+        if entries:
+            db.execute(insert(ActivityInboxArchive), [dict(row) for row in entries])
+        db.exec(
+            delete(ActivityInbox).where(ActivityInbox.activity_id.in_(activity_ids))
+        )
+        db.exec(delete(Activity).where(Activity.id.in_(activity_ids)))
+        db.commit()
+        archived += len(activities)
+
+
+def main():
+    from app.db.database import engine
+
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python -m app.core.activity_inbox [LIVE_MONTHS]")
+    live_months = (
+        int(sys.argv[1]) if len(sys.argv) == 2 else settings.ACTIVITY_LIVE_MONTHS
+    )
+    before = archive_cutoff(datetime.utcnow(), live_months)
+    with Session(engine) as db:
+        count = archive_activities(db, before, settings.ACTIVITY_ARCHIVE_BATCH_SIZE)
+    print(f"Archived {count} activities from before {before:%Y-%m}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Server-Sent Events stream of new Activity rows for a user and their groups.
+
+Every committed session that added Activity rows wakes the subscribers of the
+affected users and groups through an in-process broadcaster, so writes made in
+the same process reach a stream at once, without waiting for a poll. A woken
+stream reads the rows after its cursor with indexed `id > cursor` queries.
+Writes made by other worker processes never reach this broadcaster, so every
+stream, idle or not, also polls every SSE_POLL_INTERVAL_SECONDS to pick them
+up: one membership lookup and one indexed `id > cursor` query per interval.
+
+The SSE event id is the activity id, so a reconnecting client resumes from
+its Last-Event-ID without gaps or repeats.
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Activity, UserGroupLink
+
+TopicKey = Tuple[str, int]  # ("user" | "group", id)
+
+# Session.info key collecting the topics of Activity rows flushed but not committed
+PENDING_TOPICS = "activity_stream_topics"
+
+
+class Subscription:
+    """One open stream: the topics it listens to and the event that wakes it."""
+
+    def __init__(self, topics: Set[TopicKey]):
+        self.topics = topics
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def wake(self):
+        # Publishers may run in a threadpool worker, off this stream's loop
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:  # loop already closed
+            pass
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait until woken or `timeout` elapses; returns True if woken."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+
+class ActivityBroadcaster:
+    """Thread-safe registry of open streams, keyed by the topics they follow."""
+
+    def __init__(self):
+        self._subscriptions: Dict[TopicKey, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics: Set[TopicKey]) -> Subscription:
+        subscription = Subscription(set())
+        self.update(subscription, topics)
+        return subscription
+
+    def update(self, subscription: Subscription, topics: Set[TopicKey]):
+        with self._lock:
+            for topic in subscription.topics - topics:
+                self._discard(topic, subscription)
+            for topic in topics - subscription.topics:
+                self._subscriptions[topic].add(subscription)
+            subscription.topics = set(topics)
+
+    def unsubscribe(self, subscription: Subscription):
+        self.update(subscription, set())
+
+    def publish(self, topics: Iterable[TopicKey]):
+        with self._lock:
+            woken = set().union(
+                *(self._subscriptions.get(topic, ()) for topic in topics)
+            )
+        for subscription in woken:
+            subscription.wake()
+
+    def _discard(self, topic: TopicKey, subscription: Subscription):
+        subscribers = self._subscriptions.get(topic)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[topic]
+
+
+broadcaster = ActivityBroadcaster()
+
+
+def activity_topics(user_id: int, group_ids: Iterable[int]) -> Set[TopicKey]:
+    return {("user", user_id)} | {("group", group_id) for group_id in group_ids}
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect_activity_topics(session, flush_context):
+    # Still the pre-flush view here: `session.new` lists the inserted objects
+    activities = [obj for obj in session.new if isinstance(obj, Activity)]
+    if activities:
+        topics = session.info.setdefault(PENDING_TOPICS, set())
+        for activity in activities:
+            topics.add(("user", activity.user_id))
+            if activity.group_id is not None:
+                topics.add(("group", activity.group_id))
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _publish_activity_topics(session):
+    topics = session.info.pop(PENDING_TOPICS, None)
+    if topics:
+        broadcaster.publish(topics)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _drop_activity_topics(session):
+    session.info.pop(PENDING_TOPICS, None)
+
+
+async def _group_ids(session: AsyncSession, user_id: int) -> List[int]:
+    return (
+        await session.exec(
+            select(UserGroupLink.group_id).where(UserGroupLink.user_id == user_id)
+        )
+    ).all()
+
+
+async def _activities_after(
+    session: AsyncSession, user_id: int, group_ids: List[int], cursor: int
+) -> List[Activity]:
+    """
+    The next batch of activities after `cursor`, in id order. The user's own rows
+    and their groups' rows are read separately so each side is a range scan
+    on its (user_id, id) or (group_id, id) index.
+    """
+    limit = settings.SSE_BATCH_SIZE
+    statements = [select(Activity).where(Activity.user_id == user_id)]
+    if group_ids:
+        statements.append(select(Activity).where(Activity.group_id.in_(group_ids)))
+    found = {}
+    for statement in statements:
+        statement = statement.where(Activity.id > cursor).order_by(Activity.id)
+        for activity in (await session.exec(statement.limit(limit))).all():
+            found[activity.id] = activity
+    return [found[activity_id] for activity_id in sorted(found)[:limit]]
+
+
+async def latest_activity_id(session: AsyncSession) -> int:
+    return (await session.exec(select(func.max(Activity.id)))).one() or 0
+
+
+def format_event(activity: Activity) -> str:
+    return f"id: {activity.id}\nevent: activity\ndata: {activity.json()}\n\n"
+
+
+async def stream_activities(
+    engine: AsyncEngine, user_id: int, cursor: Optional[int] = None
+) -> AsyncIterator[str]:
+    """
+    Yield SSE frames for the activities of `user_id` and their groups after
+    activity id `cursor` (or from now on), with comment heartbeats while idle.
+    Database connections are only held while a batch is read.
+    """
+    async with AsyncSession(engine) as session:
+        group_ids = await _group_ids(session, user_id)
+        if cursor is None:
+            cursor = await latest_activity_id(session)
+    subscription = broadcaster.subscribe(activity_topics(user_id, group_ids))
+    try:
+        yield f"retry: {settings.SSE_RETRY_MILLISECONDS}\n\n"
+        last_sent = next_poll = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now >= next_poll:
+                next_poll = now + settings.SSE_POLL_INTERVAL_SECONDS
+            async with AsyncSession(engine) as session:
+                # Membership may have changed since the last batch
+                group_ids = await _group_ids(session, user_id)
+                activities = await _activities_after(
+                    session, user_id, group_ids, cursor
+                )
+                frames = [format_event(activity) for activity in activities]
+            broadcaster.update(subscription, activity_topics(user_id, group_ids))
+            for frame, activity in zip(frames, activities):
+                yield frame
+                cursor = activity.id
+            if frames:
+                last_sent = time.monotonic()
+            if len(frames) == settings.SSE_BATCH_SIZE:
+                continue  # more rows are already waiting
+
+            while True:
+                now = time.monotonic()
+                heartbeat_at = last_sent + settings.SSE_HEARTBEAT_SECONDS
+                if await subscription.wait(min(next_poll, heartbeat_at) - now):
+                    break
+                if time.monotonic() >= heartbeat_at:
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+                if time.monotonic() >= next_poll:
+                    break
+    finally:
+        broadcaster.unsubscribe(subscription)
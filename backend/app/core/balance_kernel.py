@@ -0,0 +1,86 @@
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: install the "fast" extra for the vectorized path
+    np = None
+
+# Below this many rows the array setup costs more than the Python loop saves
+VECTORIZE_MIN_ROWS = 512
+# User ids below this bound index the bincount directly instead of being
+# compacted with np.unique first (autoincrement ids almost always are)
+DENSE_ID_LIMIT = 1 << 22
+
+Columns = Tuple[Sequence[int], Sequence[int], Sequence[int]]
+
+
+def to_columns(rows: Sequence[Tuple[int, int, int]]) -> Columns:
+    """Split (debtor, creditor, amount) rows, e.g. query results, into three columns."""
+    if np is not None and len(rows) >= VECTORIZE_MIN_ROWS:
+        matrix = np.fromiter(
+            chain.from_iterable(rows), dtype=np.int64, count=3 * len(rows)
+        ).reshape(-1, 3)
+        return matrix[:, 0], matrix[:, 1], matrix[:, 2]
+    return (
+        [row[0] for row in rows],
+        [row[1] for row in rows],
+        [row[2] for row in rows],
+    )
+
+
+def _net_balances_loop(
+    debtor_ids: Sequence[int], creditor_ids: Sequence[int], amounts: Sequence[int]
+) -> Dict[int, int]:
+    balances = defaultdict(int)
+    for debtor, creditor, amount in zip(debtor_ids, creditor_ids, amounts):
+        balances[debtor] -= amount
+        balances[creditor] += amount
+    return {user: balance for user, balance in balances.items() if balance}
+
+
+def _net_balances_numpy(
+    debtor_ids: Sequence[int], creditor_ids: Sequence[int], amounts: Sequence[int]
+) -> Dict[int, int]:
+    debtors = np.asarray(debtor_ids, dtype=np.int64)
+    creditors = np.asarray(creditor_ids, dtype=np.int64)
+    # bincount sums in float64, which is exact for integer minor-unit totals
+    # below 2**53, far beyond any ledger
+    weights = np.asarray(amounts, dtype=np.float64)
+
+    low = min(debtors.min(), creditors.min())
+    high = max(debtors.max(), creditors.max())
+    if low >= 0 and high < DENSE_ID_LIMIT:
+        users = None
+        size = int(high) + 1
+        debtor_index, creditor_index = debtors, creditors
+    else:
+        users, index = np.unique(
+            np.concatenate((debtors, creditors)), return_inverse=True
+        )
+        size = len(users)
+        debtor_index, creditor_index = index[: len(debtors)], index[len(debtors) :]
+
+    owed = np.bincount(creditor_index, weights=weights, minlength=size)
+    owes = np.bincount(debtor_index, weights=weights, minlength=size)
+    net = np.rint(owed - owes).astype(np.int64)
+
+    nonzero = np.flatnonzero(net)
+    user_ids = nonzero if users is None else users[nonzero]
+    return dict(zip(user_ids.tolist(), net[nonzero].tolist()))
+
+
+def net_balances_columnar(
+    debtor_ids: Sequence[int], creditor_ids: Sequence[int], amounts: Sequence[int]
+) -> Dict[int, int]:
+    """
+    Net debts given as parallel columns of debtor ids, creditor ids and minor-unit
+    amounts into one balance per user. Positive balances are owed money.
+
+    With NumPy installed, large inputs are summed per user with one bincount
+    for each side; otherwise a Python loop does the same.
+    """
+    if np is None or len(amounts) < VECTORIZE_MIN_ROWS:
+        return _net_balances_loop(debtor_ids, creditor_ids, amounts)
+    return _net_balances_numpy(debtor_ids, creditor_ids, amounts)
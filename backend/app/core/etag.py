@@ -0,0 +1,32 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Make browsers revalidate on every poll instead of reusing a cached body
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag over the values (route, params, versions) a payload depends on."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Attach `etag` to the response. Returns a bare 304 when the client's
+    If-None-Match already holds it, so the caller can skip building the body.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    # Weak comparison: W/ prefixes are ignored on both sides
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(
+            status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        )
+    return None
@@ -0,0 +1,95 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+def detect_format(requested: Optional[str], content_type: Optional[str]) -> str:
+    """Pick the import format from the `format` parameter, else the Content-Type."""
+    if requested:
+        return requested
+    if content_type and "csv" in content_type:
+        return "csv"
+    return "ndjson"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a streamed request body into lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _parse_id_list(value: str) -> list:
+    return [int(item) for item in value.replace(",", ";").split(";") if item.strip()]
+
+
+def _parse_custom_splits(value: str) -> Dict[int, float]:
+    splits = {}
+    for item in value.split(";"):
+        if item.strip():
+            user_id, amount = item.split(":")
+            splits[int(user_id)] = float(amount)
+    return splits
+
+
+def parse_csv_row(header: list, line: str) -> dict:
+    """
+    Map one CSV line onto ExpenseData fields. `participants` is a `;`-separated
+    list of user ids and `customSplits` a `;`-separated list of `user_id:value`.
+    """
+    values = next(csv.reader([line]))
+    if len(values) != len(header):
+        raise ValueError(f"expected {len(header)} columns, got {len(values)}")
+
+    row = {}
+    for column, value in zip(header, values):
+        value = value.strip()
+        if value == "":
+            continue
+        if column == "participants":
+            row[column] = _parse_id_list(value)
+        elif column == "customSplits":
+            row[column] = _parse_custom_splits(value)
+        else:
+            row[column] = value
+    return row
+
+
+async def iter_rows(
+    chunks: AsyncIterator[bytes], fmt: str
+) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yield (row_number, row, error) for every non-blank data line of the body.
+    Rows are numbered from 1, excluding the CSV header.
+    """
+    header = None
+    row_number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = [column.strip() for column in next(csv.reader([line]))]
+            continue
+
+        row_number += 1
+        try:
+            if fmt == "csv":
+                row = parse_csv_row(header, line)
+            else:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError("each line must be a JSON object")
+        except (ValueError, csv.Error) as e:
+            yield row_number, None, str(e)
+            continue
+        yield row_number, row, None
@@ -0,0 +1,57 @@
+from collections import defaultdict
+from typing import Iterable, Tuple
+
+from sqlalchemy import tuple_
+from sqlmodel import Session, select
+
+from app.db.models import FriendBalance
+
+Debt = Tuple[int, int, int]  # (debtor_id, creditor_id, amount in minor units)
+
+
+def apply_debt_changes(
+    db: Session,
+    currency: str,
+    added: Iterable[Debt] = (),
+    removed: Iterable[Debt] = (),
+):
+    """
+    Fold debts added to or removed from GroupDebtSummary, in the `currency` of
+    their ledger, into the FriendBalance rows of both users. Call it in the same
+    transaction as the summary change.
+    """
+    deltas = defaultdict(int)
+    for sign, debts in ((1, added), (-1, removed)):
+        for debtor_id, creditor_id, amount in debts:
+            deltas[(creditor_id, debtor_id)] += sign * amount
+            deltas[(debtor_id, creditor_id)] -= sign * amount
+    deltas = {pair: delta for pair, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    rows = db.exec(
+        select(FriendBalance)
+        .where(
+            FriendBalance.currency == currency,
+            tuple_(FriendBalance.user_id, FriendBalance.friend_id).in_(deltas),
+        )
+        .with_for_update()
+    ).all()
+    existing = {(row.user_id, row.friend_id): row for row in rows}
+    for (user_id, friend_id), delta in deltas.items():
+        row = existing.get((user_id, friend_id))
+        if row is None:
+            db.add(
+                FriendBalance(
+                    user_id=user_id,
+                    friend_id=friend_id,
+                    currency=currency,
+                    balance=delta,
+                )
+            )
+            continue
+        row.balance += delta
+        if row.balance:
+            db.add(row)
+        else:
+            db.delete(row)
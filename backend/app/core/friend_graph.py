@@ -0,0 +1,89 @@
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from sqlmodel import Session, or_, select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models import Friendship, User
+
+# Process-wide cache of each user's friend ids, in both directions of Friendship,
+# as (User.friends_version, friend ids). Every read checks the versions, so a
+# friendship added by another worker is seen at once rather than after the TTL.
+friend_adjacency = TTLCache(
+    max_entries=settings.FRIEND_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.FRIEND_CACHE_TTL_SECONDS,
+)
+
+
+def get_friend_ids(
+    session: Session, user_ids: Iterable[int]
+) -> Dict[int, FrozenSet[int]]:
+    """
+    Resolve friend ids from the cache, keeping only entries cached under the
+    users' current friend-list versions, and fetch all misses in a single query.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    # Versions are read before the friendships, so a list cached under a
+    # version never predates it
+    versions = dict(
+        session.exec(
+            select(User.id, User.friends_version).where(User.id.in_(user_ids))
+        ).all()
+    )
+    adjacency = {
+        user_id: friend_ids
+        for user_id, (version, friend_ids) in friend_adjacency.get_many(
+            user_ids
+        ).items()
+        if version == versions.get(user_id)
+    }
+    missing = user_ids - adjacency.keys()
+    if missing:
+        friends = defaultdict(set)
+        for user_id, friend_id in session.exec(
+            select(Friendship.user_id, Friendship.friend_id).where(
+                or_(
+                    Friendship.user_id.in_(missing),
+                    Friendship.friend_id.in_(missing),
+                )
+            )
+        ):
+            friends[user_id].add(friend_id)
+            friends[friend_id].add(user_id)
+        fetched = {user_id: frozenset(friends[user_id]) for user_id in missing}
+        friend_adjacency.set_many(
+            {
+                user_id: (versions.get(user_id), friend_ids)
+                for user_id, friend_ids in fetched.items()
+            }
+        )
+        adjacency.update(fetched)
+    return adjacency
+
+
+def invalidate_friends(*user_ids: int):
+    """
+    Drop this process's cached friend lists after friendships of these users
+    change. Other processes notice the bumped User.friends_version instead.
+    """
+    friend_adjacency.invalidate(*user_ids)
+
+
+def suggest_friends(
+    session: Session, user_id: int, limit: int
+) -> List[Tuple[int, int]]:
+    """
+    People the user may know: friends of their friends who are not yet friends,
+    as (user_id, mutual friend count), most mutual friends first.
+    """
+    friends = get_friend_ids(session, [user_id])[user_id]
+    mutual = Counter()
+    for friends_of_friend in get_friend_ids(session, friends).values():
+        mutual.update(friends_of_friend)
+    for excluded in friends | {user_id}:
+        mutual.pop(excluded, None)
+    ranked = sorted(mutual.items(), key=lambda item: (-item[1], item[0]))
+    return ranked[:limit]
@@ -0,0 +1,175 @@
+"""
+FX rates for the multi-currency ledger.
+
+Rates live in the FxRate table and are loaded from a local CSV file with a
+`date,currency,rate` header, where `rate` is the value of one unit of the
+currency in DEFAULT_CURRENCY on that date:
+
+    python -m app.core.fx rates.csv
+
+An amount is converted with the latest rate on or before its date, at most
+FX_RATE_MAX_AGE_DAYS old. Resolved rates are cached per (currency, date), so
+running workers pick up reloaded rates once their entries expire.
+"""
+
+import csv
+import sys
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from sqlmodel import Session, select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models import FxRate
+
+RateKey = Tuple[str, date]  # (currency, date)
+Conversion = Tuple[str, str, date]  # (from_currency, to_currency, date)
+
+# Process-wide cache of resolved rates, keyed by (currency, date)
+fx_rates = TTLCache(
+    max_entries=settings.FX_RATE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.FX_RATE_CACHE_TTL_SECONDS,
+)
+
+
+class MissingRateError(LookupError):
+    """No usable rate for a currency on a date."""
+
+
+def conversion(
+    from_currency: str, to_currency: str, when: Union[date, datetime]
+) -> Conversion:
+    day = when.date() if isinstance(when, datetime) else when
+    return from_currency.upper(), to_currency.upper(), day
+
+
+def get_rates(db: Session, keys: Iterable[RateKey]) -> Dict[RateKey, float]:
+    """
+    Resolve (currency, date) keys to rates, fetching all cache misses in a single
+    query. Keys without a usable rate are left out of the result.
+    """
+    keys = set(keys)
+    rates = {key: 1.0 for key in keys if key[0] == settings.DEFAULT_CURRENCY}
+    rates.update(fx_rates.get_many(keys - rates.keys()))
+    missing = keys - rates.keys()
+    if not missing:
+        return rates
+
+    max_age = timedelta(days=settings.FX_RATE_MAX_AGE_DAYS)
+    history = defaultdict(list)
+    for currency, rate_date, rate in db.exec(
+        select(FxRate.currency, FxRate.rate_date, FxRate.rate)
+        .where(
+            FxRate.currency.in_({currency for currency, _ in missing}),
+            FxRate.rate_date >= min(day for _, day in missing) - max_age,
+            FxRate.rate_date <= max(day for _, day in missing),
+        )
+        .order_by(FxRate.currency, FxRate.rate_date)
+    ):
+        history[currency].append((rate_date, rate))
+
+    fetched = {}
+    for currency, day in missing:
+        series = history[currency]
+        i = bisect_right(series, (day, float("inf")))
+        if i and day - series[i - 1][0] <= max_age:
+            fetched[(currency, day)] = series[i - 1][1]
+    fx_rates.set_many(fetched)
+    rates.update(fetched)
+    return rates
+
+
+def conversion_factors(
+    db: Session, conversions: Iterable[Conversion]
+) -> Dict[Conversion, float]:
+    """
+    Factors that turn minor units of one currency into another on a date, for
+    a whole batch of conversions with one rate lookup. Conversions without a
+    usable rate are left out of the result.
+    """
+    conversions = set(conversions)
+    rates = get_rates(
+        db,
+        {(source, day) for source, _, day in conversions}
+        | {(target, day) for _, target, day in conversions},
+    )
+    return {
+        (source, target, day): rates[(source, day)] / rates[(target, day)]
+        for source, target, day in conversions
+        if (source, day) in rates and (target, day) in rates
+    }
+
+
+def missing_rate(key: Conversion) -> MissingRateError:
+    source, target, day = key
+    return MissingRateError(f"No {source} to {target} exchange rate for {day}")
+
+
+def convert(amount: int, factor: float) -> int:
+    return amount if factor == 1.0 else int(round(amount * factor))
+
+
+def convert_rows(
+    db: Session,
+    rows: Sequence[tuple],
+    from_currency: str,
+    to_currency: str,
+    when: Union[date, datetime],
+) -> List[tuple]:
+    """Convert the trailing minor-unit amount of each row, e.g. shares or debts."""
+    key = conversion(from_currency, to_currency, when)
+    if key[0] == key[1]:
+        return list(rows)
+    factor = conversion_factors(db, [key]).get(key)
+    if factor is None:
+        raise missing_rate(key)
+    return [(*row[:-1], convert(row[-1], factor)) for row in rows]
+
+
+def load_rates_csv(db: Session, path: str) -> int:
+    """Insert or update the rates in a `date,currency,rate` CSV file."""
+    with open(path, newline="") as f:
+        rates = {
+            (
+                row["currency"].strip().upper(),
+                date.fromisoformat(row["date"].strip()),
+            ): float(row["rate"])
+            for row in csv.DictReader(f)
+        }
+    if not rates:
+        return 0
+
+    existing = {
+        (row.currency, row.rate_date): row
+        for row in db.exec(
+            select(FxRate).where(
+                FxRate.currency.in_({currency for currency, _ in rates}),
+                FxRate.rate_date >= min(day for _, day in rates),
+                FxRate.rate_date <= max(day for _, day in rates),
+            )
+        )
+    }
+    for (currency, day), rate in rates.items():
+        row = existing.get((currency, day)) or FxRate(currency=currency, rate_date=day)
+        row.rate = rate
+        db.add(row)
+    db.commit()
+    fx_rates.clear()
+    return len(rates)
+
+
+def main():
+    from app.db.database import engine
+
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python -m app.core.fx RATES_CSV")
+    with Session(engine) as db:
+        count = load_rates_csv(db, sys.argv[1])
+    print(f"Loaded {count} FX rates")
+
+
+if __name__ == "__main__":
+    main()
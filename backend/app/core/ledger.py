@@ -0,0 +1,287 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlmodel import Session, delete, func, select
+
+from app.core import fx
+from app.core.balance_kernel import net_balances_columnar, to_columns
+from app.core.config import settings
+from app.core.friend_balances import apply_debt_changes
+from app.core.money import to_major
+from app.core.settlement import settle_balances
+from app.db.models import (
+    Expense,
+    ExpenseParticipantLink,
+    Group,
+    GroupBalance,
+    GroupDebtSummary,
+    GroupLedgerCheckpoint,
+    Settlement,
+)
+
+Share = Tuple[int, int]  # (participant_id, amount_owed in minor units)
+
+
+def apply_balance_deltas(db: Session, group_id: int, deltas: Dict[int, int]):
+    """Add per-user deltas to the group's balance rows, creating missing rows."""
+    if not deltas:
+        return
+    rows = db.exec(
+        select(GroupBalance)
+        .where(
+            GroupBalance.group_id == group_id,
+            GroupBalance.user_id.in_(list(deltas)),
+        )
+        .with_for_update()
+    ).all()
+    balances = {row.user_id: row for row in rows}
+
+    for user_id, delta in deltas.items():
+        balance = balances.get(user_id)
+        if balance is None:
+            balance = GroupBalance(group_id=group_id, user_id=user_id, net_amount=0)
+        balance.net_amount += delta
+        db.add(balance)
+
+
+def group_currency(db: Session, group_id: int) -> str:
+    return db.exec(select(Group.base_currency).where(Group.id == group_id)).one()
+
+
+def ledger_currency(db: Session, group_id: Optional[int]) -> str:
+    """Currency a ledger is kept in: the group's base currency, else DEFAULT_CURRENCY."""
+    return group_currency(db, group_id) if group_id else settings.DEFAULT_CURRENCY
+
+
+def to_ledger_amounts(
+    db: Session,
+    rows: Sequence[tuple],
+    currency: str,
+    group_id: Optional[int],
+    spent_at: datetime,
+) -> List[tuple]:
+    """
+    Convert the trailing minor-unit amount of each row, e.g. an expense's debts,
+    from the expense's currency into its ledger's at the rate of `spent_at`.
+    Only new expense versions are converted: the results are stored as
+    ExpenseParticipantLink.ledger_amount and reused for every later reversal.
+    """
+    return fx.convert_rows(db, rows, currency, ledger_currency(db, group_id), spent_at)
+
+
+def apply_expense(
+    db: Session,
+    group_id: int,
+    payer_id: int,
+    shares: Iterable[Share],
+    sign: int = 1,
+):
+    """
+    Apply one expense's participant shares, in ledger amounts, to the group
+    ledger in O(participants). Use sign=-1 with the stored ledger amounts to
+    reverse an expense that is being updated or deleted.
+    """
+    deltas = defaultdict(int)
+    for participant_id, amount_owed in shares:
+        deltas[participant_id] -= sign * amount_owed
+        deltas[payer_id] += sign * amount_owed
+    apply_balance_deltas(db, group_id, deltas)
+
+
+def apply_settlement(
+    db: Session, group_id: int, debtor_id: int, creditor_id: int, amount: int
+):
+    """Fold a settle-up into the group ledger: the debtor paid, the creditor was paid."""
+    apply_balance_deltas(db, group_id, {debtor_id: amount, creditor_id: -amount})
+    maybe_checkpoint(db, group_id)
+
+
+def _settlement_adjustments(
+    db: Session, group_id: int, after_id: int = 0
+) -> Dict[int, int]:
+    """Net effect of recorded settlements: the debtor paid, the creditor was paid."""
+    rows = db.exec(
+        select(
+            Settlement.debtor_id, Settlement.creditor_id, func.sum(Settlement.amount)
+        )
+        .where(Settlement.group_id == group_id, Settlement.id > after_id)
+        .group_by(Settlement.debtor_id, Settlement.creditor_id)
+    ).all()
+
+    adjustments = defaultdict(int)
+    for debtor_id, creditor_id, amount in rows:
+        adjustments[debtor_id] += amount
+        adjustments[creditor_id] -= amount
+    return adjustments
+
+
+def latest_checkpoint(db: Session, group_id: int) -> Optional[GroupLedgerCheckpoint]:
+    return db.exec(
+        select(GroupLedgerCheckpoint)
+        .where(GroupLedgerCheckpoint.group_id == group_id)
+        .order_by(GroupLedgerCheckpoint.id.desc())
+        .limit(1)
+    ).first()
+
+
+def replay_group_balances(db: Session, group_id: int) -> Dict[int, int]:
+    """
+    Recompute the group's net balances from its expense and settlement history,
+    starting from the latest checkpoint and replaying only newer rows.
+    """
+    checkpoint = latest_checkpoint(db, group_id)
+    last_expense_id = checkpoint.last_expense_id if checkpoint else 0
+    last_settlement_id = checkpoint.last_settlement_id if checkpoint else 0
+
+    # Participant links as (debtor, creditor, amount) rows, in the ledger
+    # amounts stored when each expense was written
+    rows = db.exec(
+        select(
+            ExpenseParticipantLink.user_id,
+            Expense.paid_by_id,
+            ExpenseParticipantLink.ledger_amount,
+        )
+        .join(Expense, Expense.id == ExpenseParticipantLink.expense_id)
+        .where(Expense.group_id == group_id, Expense.id > last_expense_id)
+    ).all()
+    columns = to_columns(rows)
+
+    balances = _settlement_adjustments(db, group_id, after_id=last_settlement_id)
+    if checkpoint:
+        for user_id, amount in checkpoint.balances.items():
+            balances[int(user_id)] += amount
+    for user_id, amount in net_balances_columnar(*columns).items():
+        balances[user_id] += amount
+    return balances
+
+
+def ensure_group_ledger(db: Session, group_id: int):
+    """
+    Backfill the balance rows of a group that predates the ledger.
+    Must run before the current write touches the group's expenses or settlements.
+    """
+    has_ledger = db.exec(
+        select(GroupBalance.user_id).where(GroupBalance.group_id == group_id).limit(1)
+    ).first()
+    if has_ledger is not None:
+        return
+
+    for user_id, net_amount in replay_group_balances(db, group_id).items():
+        db.add(GroupBalance(group_id=group_id, user_id=user_id, net_amount=net_amount))
+    db.flush()
+
+
+def refresh_group_debt_summaries(db: Session, group_id: int) -> List[dict]:
+    """Rewrite the group's GroupDebtSummary rows from its current balances."""
+    db.flush()
+    balances = dict(
+        db.exec(
+            select(GroupBalance.user_id, GroupBalance.net_amount).where(
+                GroupBalance.group_id == group_id
+            )
+        ).all()
+    )
+    reconciled_debts = settle_balances(balances)
+
+    previous_debts = db.exec(
+        select(
+            GroupDebtSummary.debtor_id,
+            GroupDebtSummary.creditor_id,
+            GroupDebtSummary.amount_owed,
+        ).where(GroupDebtSummary.group_id == group_id)
+    ).all()
+    db.exec(delete(GroupDebtSummary).where(GroupDebtSummary.group_id == group_id))
+    apply_debt_changes(
+        db,
+        group_currency(db, group_id),
+        added=reconciled_debts,
+        removed=previous_debts,
+    )
+    for debtor_id, creditor_id, amount in reconciled_debts:
+        db.add(
+            GroupDebtSummary(
+                group_id=group_id,
+                debtor_id=debtor_id,
+                creditor_id=creditor_id,
+                amount_owed=amount,
+            )
+        )
+
+    maybe_checkpoint(db, group_id)
+
+    return [
+        {"debtor": d[0], "creditor": d[1], "amount": to_major(d[2])}
+        for d in reconciled_debts
+    ]
+
+
+def reconcile_all_group_debts(db: Session, group_id: int) -> List[dict]:
+    """
+    Rebuild the group's ledger from its full history and rewrite its debt summaries.
+    Expense writes use apply_expense instead; this is the repair/backfill path.
+    """
+    db.exec(delete(GroupBalance).where(GroupBalance.group_id == group_id))
+    for user_id, net_amount in replay_group_balances(db, group_id).items():
+        db.add(GroupBalance(group_id=group_id, user_id=user_id, net_amount=net_amount))
+    return refresh_group_debt_summaries(db, group_id)
+
+
+def maybe_checkpoint(db: Session, group_id: int):
+    """
+    Snapshot the group's current balances once LEDGER_CHECKPOINT_INTERVAL
+    expenses and settlements have been added since the latest checkpoint,
+    then prune the group to LEDGER_CHECKPOINT_RETENTION checkpoints.
+    """
+    checkpoint = latest_checkpoint(db, group_id)
+    last_expense_id = checkpoint.last_expense_id if checkpoint else 0
+    last_settlement_id = checkpoint.last_settlement_id if checkpoint else 0
+
+    new_expenses, max_expense_id = db.exec(
+        select(func.count(Expense.id), func.max(Expense.id)).where(
+            Expense.group_id == group_id, Expense.id > last_expense_id
+        )
+    ).one()
+    new_settlements, max_settlement_id = db.exec(
+        select(func.count(Settlement.id), func.max(Settlement.id)).where(
+            Settlement.group_id == group_id, Settlement.id > last_settlement_id
+        )
+    ).one()
+    if new_expenses + new_settlements < settings.LEDGER_CHECKPOINT_INTERVAL:
+        return
+
+    balances = db.exec(
+        select(GroupBalance.user_id, GroupBalance.net_amount).where(
+            GroupBalance.group_id == group_id
+        )
+    ).all()
+    db.add(
+        GroupLedgerCheckpoint(
+            group_id=group_id,
+            last_expense_id=max_expense_id or last_expense_id,
+            last_settlement_id=max_settlement_id or last_settlement_id,
+            balances={str(user_id): amount for user_id, amount in balances if amount},
+        )
+    )
+    db.flush()
+
+    expired = db.exec(
+        select(GroupLedgerCheckpoint.id)
+        .where(GroupLedgerCheckpoint.group_id == group_id)
+        .order_by(GroupLedgerCheckpoint.id.desc())
+        .offset(settings.LEDGER_CHECKPOINT_RETENTION)
+    ).all()
+    if expired:
+        db.exec(
+            delete(GroupLedgerCheckpoint).where(GroupLedgerCheckpoint.id.in_(expired))
+        )
+
+
+def invalidate_checkpoints(db: Session, group_id: int, expense_id: int):
+    """Drop checkpoints that include an expense that is being changed or removed."""
+    db.exec(
+        delete(GroupLedgerCheckpoint).where(
+            GroupLedgerCheckpoint.group_id == group_id,
+            GroupLedgerCheckpoint.last_expense_id >= expense_id,
+        )
+    )
@@ -0,0 +1,181 @@
+"""
+Full ledger export of a group, for auditing.
+
+Records come out in chronological order: every expense followed by its
+participant splits, interleaved with the settlements, then the group's
+current debts. Expenses and settlements are each read in keyset batches of
+EXPORT_BATCH_SIZE on (created_at, id), the order of their group indexes, and
+the two streams are merged with `heapq.merge`. Short batch queries, rather
+than two open cursors, also work on drivers that allow only one unbuffered
+result per connection. Memory stays bounded by the batch size.
+
+All reads share one session and its transaction, so on databases with
+snapshot reads the export is a consistent view of the ledger.
+"""
+
+import heapq
+from typing import Iterator, List
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, and_, or_, select
+
+from app.core.config import settings
+from app.core.money import to_major
+from app.db.models import Expense, ExpenseParticipantLink, GroupDebtSummary, Settlement
+
+LEDGER_EXPORT_COLUMNS = (
+    "type",  # expense, split, settlement or debt
+    "id",
+    "created_at",
+    "expense_id",
+    "description",
+    "paid_by_id",
+    "user_id",
+    "debtor_id",
+    "creditor_id",
+    "amount",
+    "currency",
+)
+
+# Expenses sort before settlements made at the same instant
+_EXPENSE, _SETTLEMENT = 0, 1
+
+
+def _keyset_batches(
+    session: Session, statement, created_column, id_column, batch_size: int
+) -> Iterator[List]:
+    """Rows of `statement` in (created_at, id) order, one keyset batch at a time."""
+    last = None
+    while True:
+        batch = statement
+        if last is not None:
+            batch = batch.where(
+                or_(
+                    created_column > last.created_at,
+                    and_(created_column == last.created_at, id_column > last.id),
+                )
+            )
+        rows = session.exec(
+            batch.order_by(created_column, id_column).limit(batch_size)
+        ).all()
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        last = rows[-1]
+
+
+def _expense_entries(session: Session, group_id: int, batch_size: int):
+    statement = select(
+        Expense.id,
+        Expense.created_at,
+        Expense.description,
+        Expense.paid_by_id,
+        Expense.amount,
+        Expense.currency,
+    ).where(Expense.group_id == group_id)
+    for expenses in _keyset_batches(
+        session, statement, Expense.created_at, Expense.id, batch_size
+    ):
+        splits = {expense.id: [] for expense in expenses}
+        for expense_id, user_id, amount_owed in session.exec(
+            select(
+                ExpenseParticipantLink.expense_id,
+                ExpenseParticipantLink.user_id,
+                ExpenseParticipantLink.amount_owed,
+            )
+            .where(ExpenseParticipantLink.expense_id.in_(list(splits)))
+            .order_by(ExpenseParticipantLink.expense_id, ExpenseParticipantLink.user_id)
+        ):
+            splits[expense_id].append((user_id, amount_owed))
+
+        for expense in expenses:
+            records = [
+                {
+                    "type": "expense",
+                    "id": expense.id,
+                    "created_at": expense.created_at,
+                    "description": expense.description,
+                    "paid_by_id": expense.paid_by_id,
+                    "amount": to_major(expense.amount),
+                    "currency": expense.currency,
+                }
+            ]
+            records.extend(
+                {
+                    "type": "split",
+                    "created_at": expense.created_at,
+                    "expense_id": expense.id,
+                    "user_id": user_id,
+                    "amount": to_major(amount_owed),
+                    "currency": expense.currency,
+                }
+                for user_id, amount_owed in splits[expense.id]
+            )
+            yield (expense.created_at, _EXPENSE, expense.id), records
+
+
+def _settlement_entries(
+    session: Session, group_id: int, currency: str, batch_size: int
+):
+    statement = select(
+        Settlement.id,
+        Settlement.created_at,
+        Settlement.debtor_id,
+        Settlement.creditor_id,
+        Settlement.amount,
+    ).where(Settlement.group_id == group_id)
+    for settlements in _keyset_batches(
+        session, statement, Settlement.created_at, Settlement.id, batch_size
+    ):
+        for settlement in settlements:
+            record = {
+                "type": "settlement",
+                "id": settlement.id,
+                "created_at": settlement.created_at,
+                "debtor_id": settlement.debtor_id,
+                "creditor_id": settlement.creditor_id,
+                "amount": to_major(settlement.amount),
+                "currency": currency,
+            }
+            yield (settlement.created_at, _SETTLEMENT, settlement.id), [record]
+
+
+def stream_group_ledger(
+    engine: Engine, group_id: int, currency: str, batch_size: int = None
+) -> Iterator[dict]:
+    """
+    Yield the ledger records of a group (see LEDGER_EXPORT_COLUMNS). Settlement
+    and debt amounts are in the group's base `currency`, expense and split
+    amounts in the expense's own currency.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    with Session(engine) as session:
+        for _, records in heapq.merge(
+            _expense_entries(session, group_id, batch_size),
+            _settlement_entries(session, group_id, currency, batch_size),
+            key=lambda entry: entry[0],
+        ):
+            yield from records
+
+        debts = session.exec(
+            select(
+                GroupDebtSummary.debtor_id,
+                GroupDebtSummary.creditor_id,
+                GroupDebtSummary.amount_owed,
+            )
+            .where(
+                GroupDebtSummary.group_id == group_id,
+                GroupDebtSummary.amount_owed != 0,
+            )
+            .order_by(GroupDebtSummary.debtor_id, GroupDebtSummary.creditor_id)
+            .execution_options(yield_per=batch_size)
+        )
+        for debtor_id, creditor_id, amount_owed in debts:
+            yield {
+                "type": "debt",
+                "debtor_id": debtor_id,
+                "creditor_id": creditor_id,
+                "amount": to_major(amount_owed),
+                "currency": currency,
+            }
@@ -0,0 +1,42 @@
+from typing import List, Sequence
+
+# Ledger amounts are stored and computed as integer minor units (paise/cents);
+# the API keeps accepting and returning major-unit decimals.
+MINOR_UNITS = 100
+
+
+def to_minor(amount: float) -> int:
+    return int(round(amount * MINOR_UNITS))
+
+
+def to_major(amount: int) -> float:
+    return amount / MINOR_UNITS
+
+
+def format_amount(amount: float, currency: str) -> str:
+    """Display form of a major-unit amount, e.g. ₹12.50 or USD 12.50."""
+    return f"₹{amount:.2f}" if currency == "INR" else f"{currency} {amount:.2f}"
+
+
+def allocate(total: int, weights: Sequence[float]) -> List[int]:
+    """
+    Split `total` minor units in proportion to `weights` so the parts sum to
+    exactly `total`. Leftover units go to the largest fractional remainders,
+    earliest weight first on ties.
+    """
+    weight_sum = sum(weights)
+    if not weight_sum:
+        raise ValueError("Cannot allocate against zero total weight")
+    exact = [total * weight / weight_sum for weight in weights]
+    parts = [int(share // 1) for share in exact]
+    leftover = total - sum(parts)
+    by_remainder = sorted(range(len(weights)), key=lambda i: (parts[i] - exact[i], i))
+    for i in by_remainder[:leftover]:
+        parts[i] += 1
+    return parts
+
+
+def split_evenly(total: int, count: int) -> List[int]:
+    """Split `total` minor units into `count` parts differing by at most one unit."""
+    base, leftover = divmod(total, count)
+    return [base + 1 if i < leftover else base for i in range(count)]
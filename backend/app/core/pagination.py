@@ -0,0 +1,74 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Clients read the cursor for the next page from this header; the body stays a list.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class PageParams:
+    cursor: Optional[str]
+    limit: int
+
+
+def page_params(
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the previous page's X-Next-Cursor"
+    ),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit)
+
+
+def encode_cursor(sort_value: datetime, row_id: int) -> str:
+    payload = json.dumps([sort_value.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+
+def paginate(statement, sort_column, id_column, page: PageParams):
+    """
+    Apply newest-first keyset pagination on (sort_column, id_column).
+    Fetches one extra row so `finish_page` can tell whether another page exists.
+    """
+    if page.cursor:
+        sort_value, row_id = decode_cursor(page.cursor)
+        statement = statement.where(
+            or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id),
+            )
+        )
+    return statement.order_by(sort_column.desc(), id_column.desc()).limit(
+        page.limit + 1
+    )
+
+
+def finish_page(
+    rows: List, page: PageParams, response: Response, sort_attr: str
+) -> List:
+    """Trim the look-ahead row and expose the next cursor, if any, as a header."""
+    if len(rows) <= page.limit:
+        return rows
+    rows = rows[: page.limit]
+    last = rows[-1]
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+        getattr(last, sort_attr), last.id
+    )
+    return rows
@@ -0,0 +1,145 @@
+import heapq
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.balance_kernel import net_balances_columnar, to_columns
+from app.core.config import settings
+
+# Amounts are integer minor units (paise/cents), so netting never accumulates
+# float drift or leaves dust transfers behind.
+Debt = Tuple[int, int, int]
+
+
+def net_balances(debts: Iterable[Debt]) -> Dict[int, int]:
+    """
+    Net (debtor, creditor, amount) tuples into one balance per user, in minor units.
+    Positive balances are owed money, negative balances owe money.
+    """
+    return net_balances_columnar(*to_columns(list(debts)))
+
+
+def settle_balances(balances: Dict[int, int]) -> List[Tuple[int, int, int]]:
+    """
+    Turn net balances (minor units) into a minimal set of (debtor, creditor, amount) transfers.
+
+    Debtors and creditors whose balances cancel exactly are paired first, then the
+    largest debtor repeatedly pays the largest creditor. Every transfer settles at
+    least one user, so the result never has more than n - 1 transfers.
+    """
+    transfers = []
+
+    # Pass 1: pair users whose balances match exactly, one transfer settles both.
+    creditors_by_amount = defaultdict(list)
+    for user, balance in sorted(balances.items()):
+        if balance > 0:
+            creditors_by_amount[balance].append(user)
+
+    creditors, debtors = [], []
+    for user, balance in sorted(balances.items()):
+        if balance < 0:
+            matches = creditors_by_amount.get(-balance)
+            if matches:
+                transfers.append((user, matches.pop(0), -balance))
+            else:
+                debtors.append((balance, user))
+    for amount, users in creditors_by_amount.items():
+        creditors.extend((-amount, user) for user in users)
+
+    # Pass 2: greedy largest-debtor-to-largest-creditor settlement on two max-heaps.
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append((debtor, creditor, amount))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+
+    return transfers
+
+
+def _reconcile_greedy(balances: Dict[int, int]) -> List[Debt]:
+    return settle_balances(balances)
+
+
+def _reconcile_lp(balances: Dict[int, int]) -> List[Debt]:
+    """Minimise the total amount transferred with PuLP; needs the optional `pulp` package."""
+    try:
+        from pulp import (
+            PULP_CBC_CMD,
+            LpContinuous,
+            LpMinimize,
+            LpProblem,
+            LpVariable,
+            lpSum,
+        )
+    except ImportError as e:
+        raise RuntimeError(
+            "The 'lp' settlement strategy requires PuLP: pip install pulp"
+        ) from e
+
+    net = balances
+    problem = LpProblem("DebtReconciliation", LpMinimize)
+
+    transactions = {}
+    for debtor in net:
+        for creditor in net:
+            if debtor != creditor:
+                transactions[(debtor, creditor)] = LpVariable(
+                    f"{debtor}_to_{creditor}", lowBound=0, cat=LpContinuous
+                )
+
+    problem += lpSum(transactions.values())
+
+    for user, balance in net.items():
+        if balance > 0:  # User is a creditor
+            problem += (
+                lpSum(transactions[(debtor, user)] for debtor in net if debtor != user)
+                == balance
+            )
+        elif balance < 0:  # User is a debtor
+            problem += (
+                lpSum(
+                    transactions[(user, creditor)]
+                    for creditor in net
+                    if creditor != user
+                )
+                == -balance
+            )
+
+    problem.solve(PULP_CBC_CMD(msg=False))
+
+    # Integer balances give an integral optimum; rounding only strips solver noise
+    results = []
+    for (debtor, creditor), var in transactions.items():
+        amount = int(round(var.varValue))
+        if amount > 0:
+            results.append((debtor, creditor, amount))
+    return results
+
+
+STRATEGIES = {
+    "greedy": _reconcile_greedy,
+    "lp": _reconcile_lp,
+}
+
+
+def reconcile_debts(
+    debts: Iterable[Debt], strategy: Optional[str] = None
+) -> List[Debt]:
+    """
+    Reconcile (debtor, creditor, amount) debts into the transfers that settle them.
+
+    `strategy` defaults to `settings.SETTLEMENT_STRATEGY`: "greedy" (native
+    min-cash-flow engine) or "lp" (PuLP linear program, optional dependency).
+    """
+    strategy = strategy or settings.SETTLEMENT_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown settlement strategy: {strategy}")
+    balances = net_balances(debts)
+    if not balances:
+        return []
+    return STRATEGIES[strategy](balances)
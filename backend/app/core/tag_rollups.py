@@ -0,0 +1,78 @@
+from datetime import date, datetime, time
+from typing import List, Optional
+
+from sqlmodel import Session, delete, func, select
+
+from app.db.models import SelfManagementExpense, TagMonthlySpend
+
+
+def month_of(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def apply_spend(
+    db: Session,
+    user_id: int,
+    tag_id: int,
+    spent_at: datetime,
+    amount: int,
+    count: int,
+):
+    """
+    Add one self-expense change to its tag's rollup for the month of `spent_at`:
+    `amount` is the change in minor units, and `count` is 1 for a new expense,
+    -1 for a deleted one and 0 for an amount change. Call it in the same
+    transaction as the expense write, after the expense was added, changed or
+    deleted.
+    """
+    month = month_of(spent_at)
+    row = db.exec(
+        select(TagMonthlySpend)
+        .where(TagMonthlySpend.tag_id == tag_id, TagMonthlySpend.month == month)
+        .with_for_update()
+    ).first()
+    if row is None:
+        row = TagMonthlySpend(tag_id=tag_id, month=month, user_id=user_id)
+    row.total_amount += amount
+    row.expense_count += count
+    if row.expense_count <= 0:
+        db.delete(row)
+        return
+    if count > 0:
+        row.latest_expense_at = max(row.latest_expense_at or spent_at, spent_at)
+    elif count < 0 and spent_at >= row.latest_expense_at:
+        # The month's latest expense went away; find the next one by index
+        row.latest_expense_at = db.exec(
+            select(func.max(SelfManagementExpense.created_at)).where(
+                SelfManagementExpense.tag_id == tag_id,
+                SelfManagementExpense.created_at >= datetime.combine(month, time.min),
+                SelfManagementExpense.created_at
+                < datetime.combine(_next_month(month), time.min),
+            )
+        ).one()
+    db.add(row)
+
+
+def delete_tag_rollups(db: Session, tag_id: int):
+    db.exec(delete(TagMonthlySpend).where(TagMonthlySpend.tag_id == tag_id))
+
+
+def monthly_spend(
+    db: Session,
+    user_id: int,
+    from_month: Optional[date] = None,
+    to_month: Optional[date] = None,
+) -> List[TagMonthlySpend]:
+    """A user's rollup rows between two months (inclusive), oldest first."""
+    statement = select(TagMonthlySpend).where(TagMonthlySpend.user_id == user_id)
+    if from_month:
+        statement = statement.where(TagMonthlySpend.month >= month_of(from_month))
+    if to_month:
+        statement = statement.where(TagMonthlySpend.month <= month_of(to_month))
+    return db.exec(
+        statement.order_by(TagMonthlySpend.month, TagMonthlySpend.tag_id)
+    ).all()
@@ -0,0 +1,52 @@
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from sqlmodel import Session, select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.models import User
+
+
+class UserProfile(NamedTuple):
+    id: int
+    name: str
+    email: str
+    avatar_url: Optional[str]
+
+
+# Process-wide cache of user profiles used to resolve names in debt and settlement views.
+user_profiles = TTLCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+def get_user_profiles(
+    session: Session, user_ids: Iterable[int]
+) -> Dict[int, UserProfile]:
+    """Resolve profiles from the cache, fetching all misses in a single `id IN (...)` query."""
+    user_ids = set(user_ids)
+    profiles = user_profiles.get_many(user_ids)
+    missing = user_ids - profiles.keys()
+    if missing:
+        rows = session.exec(
+            select(User.id, User.name, User.email, User.avatar_url).where(
+                User.id.in_(missing)
+            )
+        ).all()
+        fetched = {row[0]: UserProfile(*row) for row in rows}
+        user_profiles.set_many(fetched)
+        profiles.update(fetched)
+    return profiles
+
+
+def get_user_names(session: Session, user_ids: Iterable[int]) -> Dict[int, str]:
+    return {
+        user_id: profile.name
+        for user_id, profile in get_user_profiles(session, user_ids).items()
+    }
+
+
+def invalidate_user(*user_ids: int):
+    """Drop cached profiles after a user row is created or changed."""
+    user_profiles.invalidate(*user_ids)
@@ -0,0 +1,87 @@
+"""
+Typeahead search over users.
+
+Each user carries normalized copies of their name and email (NFKC, casefolded,
+single-spaced) in indexed columns, set by `set_search_columns` when the user
+is created. A search returns at most `limit` users, ranked by tier:
+
+1. exact email
+2. name prefix
+3. email prefix
+4. name or email substring
+
+The first three tiers are index lookups or range scans, ordered by the
+matched column. Later tiers run only while the result is short of `limit`.
+The substring tier cannot use an index. It is left unordered so the scan
+stops as soon as it has enough matches. It only runs for terms of at least
+USER_SEARCH_SUBSTRING_MIN_LENGTH characters that are not email addresses,
+since those are served by the email tiers.
+"""
+
+import re
+import unicodedata
+from typing import List
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.models import User
+
+# Sorts after any character a normalized term can end in, closing prefix ranges
+PREFIX_RANGE_END = "\U0010ffff"
+
+
+def normalize_search_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def set_search_columns(user: User) -> User:
+    user.search_name = normalize_search_text(user.name)
+    user.search_email = normalize_search_text(user.email)
+    return user
+
+
+def _escape_like(term: str) -> str:
+    return re.sub(r"([\\%_])", r"\\\1", term)
+
+
+def search_users(
+    session: Session, term: str, exclude_user_id: int, limit: int
+) -> List[User]:
+    """Up to `limit` users matching `term`, best matches first."""
+    term = normalize_search_text(term)
+    if not term:
+        return []
+
+    def prefix(column):
+        return (column >= term) & (column < term + PREFIX_RANGE_END)
+
+    tiers = [
+        (User.search_email == term, User.id),
+        (prefix(User.search_name), User.search_name),
+        (prefix(User.search_email), User.search_email),
+    ]
+    if len(term) >= settings.USER_SEARCH_SUBSTRING_MIN_LENGTH and "@" not in term:
+        pattern = f"%{_escape_like(term)}%"
+        tiers.append(
+            (
+                User.search_name.like(pattern, escape="\\")
+                | User.search_email.like(pattern, escape="\\"),
+                None,
+            )
+        )
+
+    found = {}
+    for condition, order in tiers:
+        if len(found) >= limit:
+            break
+        statement = (
+            select(User)
+            .where(condition, User.id.not_in([exclude_user_id, *found]))
+            .limit(limit - len(found))
+        )
+        if order is not None:
+            statement = statement.order_by(order, User.id)
+        for user in session.exec(statement):
+            found[user.id] = user
+    return list(found.values())
@@ -0,0 +1,38 @@
+from typing import Iterable, Optional
+
+from sqlmodel import Session, update
+
+from app.db.models import Group, User
+
+
+def bump_group_versions(db: Session, group_ids: Iterable[Optional[int]]):
+    """Advance the version of each group touched by the current write."""
+    group_ids = {group_id for group_id in group_ids if group_id}
+    if group_ids:
+        db.exec(
+            update(Group)
+            .where(Group.id.in_(group_ids))
+            .values(version=Group.version + 1)
+        )
+
+
+def bump_ledger_versions(db: Session, user_ids: Iterable[int]):
+    """Advance the untagged-ledger version of each user whose untagged debts changed."""
+    user_ids = set(user_ids)
+    if user_ids:
+        db.exec(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(ledger_version=User.ledger_version + 1)
+        )
+
+
+def bump_friend_versions(db: Session, user_ids: Iterable[int]):
+    """Advance the friend-list version of each user whose friendships changed."""
+    user_ids = set(user_ids)
+    if user_ids:
+        db.exec(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(friends_version=User.friends_version + 1)
+        )
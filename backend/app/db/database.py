@@ -3,8 +3,12 @@ import os
 import mysql.connector
 from dotenv import load_dotenv
 from mysql.connector import Error
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel, create_engine
 
+from app.db.pool import instrument_pool, pool_options
+
 # Load environment variables
 load_dotenv()
 
@@ -14,8 +18,35 @@ DB_HOST = os.getenv("DB_HOST")  # Host for MySQL connection
 DB_USER = os.getenv("DB_USER")  # MySQL user
 DB_PASSWORD = os.getenv("DB_PASSWORD")  # MySQL password
 
-# SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# Async drivers used for the async engine, keyed by backend
+ASYNC_DRIVERS = {
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """Swap the sync driver of DATABASE_URL for its async counterpart."""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {url.get_backend_name()}")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+# Full URL for the async engine, derived from DATABASE_URL unless set explicitly
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# SQLAlchemy engines: sync for def handlers and scripts, async for async def handlers.
+# Pool sizing follows the DB_POOL_PROFILE setting, whose connection budget is
+# split between the two engines.
+engine = create_engine(DATABASE_URL, **pool_options())
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(is_async=True))
+instrument_pool("sync", engine)
+instrument_pool("async", async_engine.sync_engine)
 
 
 def extract_db_name(database_url: str) -> str:
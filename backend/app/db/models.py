@@ -1,8 +1,20 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from sqlmodel import Column, Field, Relationship, SQLModel, String, UniqueConstraint
+from sqlmodel import (
+    JSON,
+    BigInteger,
+    Column,
+    Field,
+    Index,
+    Relationship,
+    SQLModel,
+    String,
+    UniqueConstraint,
+)
+
+from app.core.config import settings
 
 
 # Define an Enum for Activity Types
@@ -13,6 +25,7 @@ class ActivityTypes(str, Enum):
     GROUP_CREATED = "Group Created"
     DELETED_EXPENSE = "Deleted Expense"
     UPDATED_GROUP = "Updated Group"
+    IMPORTED_EXPENSES = "Imported Expenses"
 
 
 # Many-to-Many Link Table for Users and Groups
@@ -20,15 +33,25 @@ class UserGroupLink(SQLModel, table=True):
     user_id: int = Field(foreign_key="user.id", primary_key=True)
     group_id: int = Field(foreign_key="group.id", primary_key=True)
 
+    # Members of a group; the primary key only serves lookups by user
+    __table_args__ = (Index("ix_usergrouplink_group", "group_id", "user_id"),)
+
 
 class UserBase(SQLModel):
     name: str
-    email: str
+    email: str = Field(index=True)
     avatar_url: Optional[str] = None
 
 
 class User(UserBase, table=True):
     id: int = Field(default=None, primary_key=True)
+    # Bumped whenever the user's untagged debts change; internal to ETags
+    ledger_version: int = Field(default=0, exclude=True)
+    # Bumped whenever the user's friendships change; validates cached friend lists
+    friends_version: int = Field(default=0, exclude=True)
+    # Normalized name and email for search (see app/core/user_search.py)
+    search_name: str = Field(default="", max_length=255, exclude=True)
+    search_email: str = Field(default="", max_length=255, exclude=True)
     groups: List["Group"] = Relationship(
         back_populates="members", link_model=UserGroupLink
     )
@@ -45,6 +68,12 @@ class User(UserBase, table=True):
     )
     tags: List["Tag"] = Relationship(back_populates="user")
 
+    # Exact and prefix lookups of user search
+    __table_args__ = (
+        Index("ix_user_search_name", "search_name", "id"),
+        Index("ix_user_search_email", "search_email", "id"),
+    )
+
 
 class Friendship(SQLModel, table=True):
     user_id: int = Field(foreign_key="user.id", primary_key=True)
@@ -59,15 +88,22 @@ class Friendship(SQLModel, table=True):
         sa_relationship_kwargs={"foreign_keys": "[Friendship.friend_id]"}
     )
 
+    # Reverse lookups (who has befriended a user)
+    __table_args__ = (Index("ix_friendship_friend", "friend_id", "user_id"),)
+
 
 class GroupBase(SQLModel):
     name: str
     description: Optional[str] = None
     settled: bool = Field(default=False)  # Mark group as settled
+    # Currency the group's balances, debts and settlements are kept in
+    base_currency: str = Field(default=settings.DEFAULT_CURRENCY, max_length=3)
 
 
 class Group(GroupBase, table=True):
     id: int = Field(default=None, primary_key=True)
+    # Bumped by every expense, settlement and membership write to the group
+    version: int = Field(default=0)
     members: List[User] = Relationship(
         back_populates="groups", link_model=UserGroupLink
     )
@@ -82,19 +118,88 @@ class GroupDebtSummary(SQLModel, table=True):
     group_id: Optional[int] = Field(foreign_key="group.id")
     creditor_id: int = Field(foreign_key="user.id")
     debtor_id: int = Field(foreign_key="user.id")
-    amount_owed: float
+    amount_owed: int = Field(sa_type=BigInteger)  # Minor units (paise/cents)
     group: Group = Relationship(back_populates="debt_summaries")
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    # A group's debts and the single pair looked up on settle-up; the per-user
+    # indexes serve the creditor-or-debtor friend summary
+    __table_args__ = (
+        Index("ix_groupdebtsummary_group_pair", "group_id", "debtor_id", "creditor_id"),
+        Index("ix_groupdebtsummary_creditor", "creditor_id"),
+        Index("ix_groupdebtsummary_debtor", "debtor_id"),
+    )
+
+
+class GroupBalance(SQLModel, table=True):
+    """
+    Running net balance of a user within a group, updated by every expense write
+    and settle-up, so it already reflects the group's settlement history.
+    """
+
+    group_id: int = Field(foreign_key="group.id", primary_key=True)
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    # Minor units (paise/cents), positive if the user is owed
+    net_amount: int = Field(default=0, sa_type=BigInteger)
+
+
+class GroupLedgerCheckpoint(SQLModel, table=True):
+    """
+    Snapshot of a group's net balances covering every expense and settlement up
+    to the given ids, so ledger rebuilds replay only newer rows.
+    """
+
+    id: int = Field(default=None, primary_key=True)
+    group_id: int = Field(foreign_key="group.id")
+    last_expense_id: int = Field(default=0)
+    last_settlement_id: int = Field(default=0)
+    balances: Dict[str, int] = Field(default_factory=dict, sa_column=Column(JSON))
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    # Latest checkpoint of a group
+    __table_args__ = (Index("ix_groupledgercheckpoint_group", "group_id", "id"),)
+
+
+class FriendBalance(SQLModel, table=True):
+    """
+    Net balance between a user and a friend across all groups and untagged debts,
+    kept in step with GroupDebtSummary. Stored once per direction and per ledger
+    currency, since groups keep their debts in different base currencies.
+    """
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    friend_id: int = Field(foreign_key="user.id", primary_key=True)
+    currency: str = Field(primary_key=True, max_length=3)
+    # Minor units (paise/cents), positive if the friend owes the user
+    balance: int = Field(default=0, sa_type=BigInteger)
+
+
+class FxRate(SQLModel, table=True):
+    """
+    Value of one unit of `currency` in DEFAULT_CURRENCY on `rate_date`, loaded
+    from a local rates file (see app/core/fx.py).
+    """
+
+    currency: str = Field(primary_key=True, max_length=3)
+    rate_date: date = Field(primary_key=True)
+    rate: float
+
 
 class ExpenseParticipantLink(SQLModel, table=True):
     expense_id: int = Field(foreign_key="expense.id", primary_key=True)
     user_id: int = Field(foreign_key="user.id", primary_key=True)
-    amount_owed: float = Field(default=0.0)
+    amount_owed: int = Field(default=0, sa_type=BigInteger)  # Minor units
+    # amount_owed converted into the ledger's currency (the group's base
+    # currency, else DEFAULT_CURRENCY) when the expense was written. Reversals
+    # and replays use it, so later rate changes never touch recorded balances.
+    ledger_amount: int = Field(sa_type=BigInteger)
+
+    # Expenses a user participates in; the primary key only serves lookups by expense
+    __table_args__ = (Index("ix_expenseparticipantlink_user", "user_id", "expense_id"),)
 
 
 class ExpenseBase(SQLModel):
-    amount: float
+    amount: int = Field(sa_type=BigInteger)  # Minor units (paise/cents)
     description: str
     currency: str
     created_at: datetime
@@ -110,6 +215,13 @@ class Expense(ExpenseBase, table=True):
         back_populates="expenses", sa_relationship_kwargs={"viewonly": True}
     )
 
+    # Keyset pagination of a group's expenses, newest first (also serves plain
+    # group_id lookups), and untagged expenses paid by a user
+    __table_args__ = (
+        Index("ix_expense_group_created", "group_id", "created_at", "id"),
+        Index("ix_expense_paid_by", "paid_by_id", "group_id"),
+    )
+
 
 class ActivityBase(SQLModel):
     action: str
@@ -134,12 +246,73 @@ class Activity(ActivityBase, table=True):
         back_populates="activities", sa_relationship_kwargs={"viewonly": True}
     )
 
+    # Keyset pagination of a user's activity feed, newest first, and the id
+    # cursors of the activity stream for a user and for their groups
+    __table_args__ = (
+        Index("ix_activity_user_timestamp", "user_id", "timestamp", "id"),
+        Index("ix_activity_user_id", "user_id", "id"),
+        Index("ix_activity_group_id", "group_id", "id"),
+    )
+
+
+class ActivityInbox(SQLModel, table=True):
+    """
+    Entry of an activity in one user's feed. Group events are written once and
+    delivered to every member through these pointers.
+    """
+
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    activity_id: int = Field(foreign_key="activity.id", primary_key=True)
+    timestamp: datetime  # Copied from the activity, for keyset pagination
+    activity: Activity = Relationship()
+
+    # Keyset pagination of a user's feed, newest first, and archival by activity
+    __table_args__ = (
+        Index("ix_activityinbox_user_timestamp", "user_id", "timestamp", "activity_id"),
+        Index("ix_activityinbox_activity", "activity_id"),
+    )
+
+
+class ActivityArchive(SQLModel, table=True):
+    """
+    Activity moved out of the live table by the monthly archive job (see
+    app/core/activity_inbox.py). Ids are kept; the referenced expenses and
+    groups may since have been deleted.
+    """
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    action: str
+    user_id: int
+    expense_id: Optional[int] = None
+    group_id: Optional[int] = None
+    timestamp: datetime
+    activity_type: ActivityTypes = Field(sa_type=String(50), nullable=True)
+    self_expense_id: Optional[int] = None
+
+
+class ActivityInboxArchive(SQLModel, table=True):
+    """ActivityInbox entry of an archived activity."""
+
+    user_id: int = Field(primary_key=True)
+    activity_id: int = Field(primary_key=True)
+    timestamp: datetime
+
+    # Keyset pagination of a user's archived feed, after their live entries
+    __table_args__ = (
+        Index(
+            "ix_activityinboxarchive_user_timestamp",
+            "user_id",
+            "timestamp",
+            "activity_id",
+        ),
+    )
+
 
 class Settlement(SQLModel, table=True):
     id: int = Field(default=None, primary_key=True)
     creditor_id: int = Field(index=True)
     debtor_id: int = Field(index=True)
-    amount: float  # Assuming the amount is a float for currency
+    amount: int = Field(sa_type=BigInteger)  # Minor units (paise/cents)
     created_at: datetime = Field(
         default_factory=datetime.utcnow
     )  # Set default to current UTC time
@@ -150,6 +323,11 @@ class Settlement(SQLModel, table=True):
     # Relationship with the Group table
     group: Optional["Group"] = Relationship(back_populates="settlements")
 
+    # Keyset pagination of a group's settlements, newest first
+    __table_args__ = (
+        Index("ix_settlement_group_created", "group_id", "created_at", "id"),
+    )
+
 
 class SelfManagementExpenseBase(SQLModel):
     amount: float = Field(..., description="The amount of the expense.")
@@ -178,6 +356,29 @@ class SelfManagementExpense(SelfManagementExpenseBase, table=True):
     user: "User" = Relationship(back_populates="self_management_expenses")
     tag: "Tag" = Relationship(back_populates="expenses")
 
+    # Keyset pagination per user and per tag, newest first
+    __table_args__ = (
+        Index("ix_selfexpense_user_created", "user_id", "created_at", "id"),
+        Index("ix_selfexpense_tag_created", "tag_id", "created_at", "id"),
+    )
+
+
+class TagMonthlySpend(SQLModel, table=True):
+    """
+    Self-expense spend per tag and calendar month (UTC), kept in step with
+    SelfManagementExpense by every self-expense and tag write.
+    """
+
+    tag_id: int = Field(foreign_key="tag.id", primary_key=True)
+    month: date = Field(primary_key=True)  # First day of the month
+    user_id: int = Field(foreign_key="user.id")
+    total_amount: int = Field(default=0, sa_type=BigInteger)  # Minor units
+    expense_count: int = Field(default=0)
+    latest_expense_at: Optional[datetime] = None
+
+    # A user's rollups, by month
+    __table_args__ = (Index("ix_tagmonthlyspend_user_month", "user_id", "month"),)
+
 
 class TagBase(SQLModel):
     name: str = Field(..., description="The name of the tag.")
@@ -195,4 +396,7 @@ class Tag(TagBase, table=True):
     user: "User" = Relationship(back_populates="tags")
     expenses: List["SelfManagementExpense"] = Relationship(back_populates="tag")
 
-    __table_args__ = (UniqueConstraint("name", "user_id", name="unique_user_tag"),)
+    __table_args__ = (
+        UniqueConstraint("name", "user_id", name="unique_user_tag"),
+        Index("ix_tag_user", "user_id"),
+    )
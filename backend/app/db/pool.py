@@ -0,0 +1,199 @@
+import bisect
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+# Pool settings per deployment. Every process runs two engines, sync for def
+# handlers and scripts and async for async def handlers, each with its own
+# pool, so pool_size and max_overflow are split between them: a process opens
+# at most the sum of both. pool_recycle stays well below MySQL's wait_timeout
+# and the idle timeouts of proxies in front of it, and pre-ping replaces
+# connections the server closed while they sat in the pool.
+POOL_PROFILES = {
+    # Long-running uvicorn container serving concurrent requests: 10 pooled
+    # connections plus 20 overflow per process, most of them for the async
+    # handlers that serve the bulk of the traffic
+    "server": {
+        "pool_size": {"sync": 3, "async": 7},
+        "max_overflow": {"sync": 6, "async": 14},
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    },
+    # One request at a time per Lambda worker, which may be frozen for minutes
+    # between invocations: one warm connection per engine, so two per worker
+    # with one in use at a time, checked on reuse.
+    "lambda": {
+        "pool_size": {"sync": 1, "async": 1},
+        "max_overflow": {"sync": 0, "async": 0},
+        "pool_timeout": 10,
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    },
+    # Local runs and scripts: one connection per engine, failing fast on leaks
+    "test": {
+        "pool_size": {"sync": 1, "async": 1},
+        "max_overflow": {"sync": 0, "async": 0},
+        "pool_timeout": 5,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+    },
+}
+
+# Upper bounds, in milliseconds, of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Checkout counters and wait times for one engine's pool."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.peak_checked_out = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_checkout(self, waited: float, checked_out: int):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, waited * 1000)] += 1
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self, *args):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in WAIT_BUCKETS_MS]
+            labels.append(f">{WAIT_BUCKETS_MS[-1]}ms")
+            return {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "wait_ms_avg": (
+                    self.wait_seconds_total / self.checkouts * 1000
+                    if self.checkouts
+                    else 0.0
+                ),
+                "wait_ms_max": self.wait_seconds_max * 1000,
+                "wait_ms_histogram": dict(zip(labels, self.wait_buckets)),
+            }
+
+
+class _TimedPoolMixin:
+    """Times how long each checkout waits for a connection, including connects."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics:
+                self.metrics.record_timeout()
+            raise
+        if self.metrics:
+            self.metrics.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool; keep counting on it
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _split_budget(total: int, shares: Dict[str, int], minimum: int) -> Dict[str, int]:
+    """Divide a per-process total between the engines in the profile's proportions."""
+    if total < 2 * minimum:
+        raise ValueError(f"Pool budget {total} leaves less than {minimum} per engine")
+    share_total = sum(shares.values())
+    async_part = round(total * shares["async"] / share_total) if share_total else total
+    async_part = max(minimum, min(async_part, total - minimum))
+    return {"sync": total - async_part, "async": async_part}
+
+
+def pool_options(profile: Optional[str] = None, is_async: bool = False) -> dict:
+    """
+    Engine keyword arguments for one engine's share of a pool profile. The
+    DB_POOL_SIZE and DB_MAX_OVERFLOW overrides are per-process totals, split
+    between the engines like the profile's own sizes.
+    """
+    profile = profile or settings.DB_POOL_PROFILE
+    if profile not in POOL_PROFILES:
+        raise ValueError(
+            f"Unknown DB_POOL_PROFILE {profile!r}, expected one of {list(POOL_PROFILES)}"
+        )
+    options = dict(POOL_PROFILES[profile])
+    pool_size, max_overflow = options["pool_size"], options["max_overflow"]
+    # A pool_size of 0 would mean an unbounded pool, so each engine keeps one
+    if settings.DB_POOL_SIZE is not None:
+        pool_size = _split_budget(settings.DB_POOL_SIZE, pool_size, minimum=1)
+    if settings.DB_MAX_OVERFLOW is not None:
+        max_overflow = _split_budget(settings.DB_MAX_OVERFLOW, max_overflow, minimum=0)
+    engine_kind = "async" if is_async else "sync"
+    options["pool_size"] = pool_size[engine_kind]
+    options["max_overflow"] = max_overflow[engine_kind]
+
+    overrides = {
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    options.update(
+        {key: value for key, value in overrides.items() if value is not None}
+    )
+    options["poolclass"] = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+    return options
+
+
+# Metrics of every instrumented engine, keyed by name
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def instrument_pool(name: str, engine: Engine) -> PoolMetrics:
+    """Collect checkout metrics for `engine` (pass `async_engine.sync_engine`)."""
+    metrics = PoolMetrics(engine)
+    engine.pool.metrics = metrics
+    event.listen(engine, "connect", metrics.record_connect)
+    event.listen(engine, "invalidate", metrics.record_invalidation)
+    pool_metrics[name] = metrics
+    return metrics
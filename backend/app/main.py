@@ -1,19 +1,48 @@
 import logging
 from collections import defaultdict
+from datetime import timedelta
 from typing import Dict, Literal, Optional, Tuple
 
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, Query, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from mangum import Mangum
-from pulp import LpContinuous, LpMinimize, LpProblem, LpVariable, lpSum
-from pydantic import BaseModel
-from sqlalchemy import and_, or_
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, or_
 from sqlalchemy.orm import selectinload
-from sqlmodel import Session, func, select, update
-
-from app.db.database import create_db_and_tables, engine
+from sqlmodel import Session, delete, func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import fx, ledger, tag_rollups, user_search
+from app.core.activity_inbox import deliver
+from app.core.activity_stream import stream_activities
+from app.core.config import settings
+from app.core.etag import make_etag, not_modified
+from app.core.expense_import import IMPORT_FORMATS, detect_format, iter_rows
+from app.core.export import EXPORT_FORMATS, export_response, stream_rows
+from app.core.friend_balances import apply_debt_changes
+from app.core.friend_graph import get_friend_ids, invalidate_friends, suggest_friends
+from app.core.ledger_export import LEDGER_EXPORT_COLUMNS, stream_group_ledger
+from app.core.money import allocate, format_amount, split_evenly, to_major, to_minor
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER,
+    PageParams,
+    encode_cursor,
+    finish_page,
+    page_params,
+    paginate,
+)
+from app.core.settlement import reconcile_debts
+from app.core.user_cache import get_user_names, get_user_profiles, invalidate_user
+from app.core.versions import (
+    bump_friend_versions,
+    bump_group_versions,
+    bump_ledger_versions,
+)
+from app.db.database import async_engine, create_db_and_tables, engine
 from app.db.models import *
+from app.db.pool import pool_metrics
 
 logging.basicConfig(level=logging.INFO)
 uvicorn_logger = logging.getLogger("uvicorn")
@@ -36,9 +65,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all HTTP methods
     allow_headers=["*"],  # Allows all headers
+    # Let browsers read pagination cursors and ETags
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 
+@app.exception_handler(fx.MissingRateError)
+def missing_rate_handler(request: Request, exc: fx.MissingRateError):
+    # Expenses in a currency without a loaded rate cannot enter a ledger
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
 class ExpenseSummary(BaseModel):
     friend_id: int
     friend_name: str
@@ -61,6 +98,13 @@ def get_session():
         yield session
 
 
+# Dependency to get an async session for `async def` handlers, so DB round trips
+# await instead of blocking the event loop. Objects stay loaded after commit.
+async def get_async_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
 class Friend(BaseModel):
     friend_id: int
     friend_name: str
@@ -69,11 +113,13 @@ class Friend(BaseModel):
 class GroupModel(BaseModel):
     group_id: Optional[str]
     group_name: str
+    currency: str
     debt_summary: str
 
 
 class FriendDebtSummary(Friend):
     amount_owed: float
+    currency: str  # Balances in different ledger currencies are never added up
     is_debtor: bool
     groups: list[GroupModel]
 
@@ -84,58 +130,98 @@ class ParticipantResponse(BaseModel):
     amount_owed: float
 
 
-@app.get("/expense-summary/{user_id}", response_model=List[FriendDebtSummary])
-def get_friend_debt_summary(
-    user_id: int, session: Session = Depends(get_session)
-) -> List[FriendDebtSummary]:
-    # Query GroupDebtSummary directly
-    stmt = select(GroupDebtSummary).where(
-        (GroupDebtSummary.creditor_id == user_id)
-        | (GroupDebtSummary.debtor_id == user_id)
+def build_friend_group_breakdown(
+    session: Session, user_id: int, names: Dict[int, str], friend_id: int = None
+) -> Dict[int, List[GroupModel]]:
+    """Per-group debts between the user and each friend (or one friend), in one query."""
+    stmt = (
+        select(GroupDebtSummary, Group.name, Group.base_currency)
+        .outerjoin(Group, Group.id == GroupDebtSummary.group_id)
+        .where(
+            (GroupDebtSummary.creditor_id == user_id)
+            | (GroupDebtSummary.debtor_id == user_id)
+        )
     )
-    group_debts = session.exec(stmt).all()
-    # Aggregate debts by friend
-    friend_debts = {}
-    for debt in group_debts:
-        is_debtor = debt.debtor_id == user_id
-        friend_id = debt.creditor_id if is_debtor else debt.debtor_id
-        friend_name = (
-            session.get(User, friend_id).name
-            if session.get(User, friend_id)
-            else "Unknown"
-        )
-
-        if friend_id not in friend_debts:
-            friend_debts[friend_id] = {
-                "friend_id": friend_id,
-                "friend_name": friend_name,
-                "amount_owed": 0,
-                "is_debtor": is_debtor,
-                "groups": [],
-            }
-
-        # Update amount owed based on debtor/creditor role
-        friend_debts[friend_id]["amount_owed"] += debt.amount_owed
+    if friend_id is not None:
+        stmt = stmt.where(
+            (GroupDebtSummary.creditor_id == friend_id)
+            | (GroupDebtSummary.debtor_id == friend_id)
+        )
 
+    groups_by_friend = defaultdict(list)
+    for debt, group_name, currency in session.exec(stmt).all():
+        is_debtor = debt.debtor_id == user_id
+        other_id = debt.creditor_id if is_debtor else debt.debtor_id
+        other_name = names.get(other_id, "Unknown")
+        # Untagged debts are kept in the default currency
+        currency = currency or settings.DEFAULT_CURRENCY
         # Format debt summary based on debtor/creditor role
+        amount = format_amount(to_major(debt.amount_owed), currency)
         debt_summary = (
-            f"You owe {friend_name} ₹{debt.amount_owed:.2f}"
+            f"You owe {other_name} {amount}"
             if is_debtor
-            else f"{friend_name} owes you ₹{debt.amount_owed:.2f}"
+            else f"{other_name} owes you {amount}"
         )
-
-        # Append group details with formatted debt summary
-        friend_debts[friend_id]["groups"].append(
+        groups_by_friend[other_id].append(
             GroupModel(
                 group_id=debt.group_id,
-                group_name=debt.group.name if debt.group else "Non Group Expenses",
+                group_name=group_name or "Non Group Expenses",
+                currency=currency,
                 debt_summary=debt_summary,
             )
         )
+    return groups_by_friend
+
+
+@app.get("/expense-summary/{user_id}", response_model=List[FriendDebtSummary])
+def get_friend_debt_summary(
+    user_id: int,
+    include_groups: bool = Query(
+        False, description="Also return the per-group breakdown for every friend"
+    ),
+    session: Session = Depends(get_session),
+) -> List[FriendDebtSummary]:
+    # Net balance per friend and ledger currency, maintained alongside
+    # GroupDebtSummary; a friend with debts in several currencies gets one
+    # entry per currency, each with that currency's groups
+    balances = session.exec(
+        select(FriendBalance)
+        .where(FriendBalance.user_id == user_id)
+        .order_by(FriendBalance.friend_id, FriendBalance.currency)
+    ).all()
+    names = get_user_names(session, {balance.friend_id for balance in balances})
+    groups_by_friend = (
+        build_friend_group_breakdown(session, user_id, names) if include_groups else {}
+    )
+
+    return [
+        FriendDebtSummary(
+            friend_id=balance.friend_id,
+            friend_name=names.get(balance.friend_id, "Unknown"),
+            amount_owed=to_major(abs(balance.balance)),
+            currency=balance.currency,
+            is_debtor=balance.balance < 0,
+            groups=[
+                group
+                for group in groups_by_friend.get(balance.friend_id, [])
+                if group.currency == balance.currency
+            ],
+        )
+        for balance in balances
+    ]
+
 
-    # Prepare final response
-    response = [FriendDebtSummary(**friend) for friend in friend_debts.values()]
-    return response
+@app.get(
+    "/expense-summary/{user_id}/friends/{friend_id}", response_model=List[GroupModel]
+)
+def get_friend_group_breakdown(
+    user_id: int, friend_id: int, session: Session = Depends(get_session)
+) -> List[GroupModel]:
+    """Per-group breakdown of the balance between a user and one friend."""
+    names = get_user_names(session, [friend_id])
+    return build_friend_group_breakdown(session, user_id, names, friend_id).get(
+        friend_id, []
+    )
 
 
 class EmailRequest(BaseModel):
@@ -144,7 +230,9 @@ class EmailRequest(BaseModel):
 
 
 @app.post("/auth/google")
-async def auth_google(request: EmailRequest, session: Session = Depends(get_session)):
+async def auth_google(
+    request: EmailRequest, session: AsyncSession = Depends(get_async_session)
+):
     """
     Authenticates or registers a user based on their email.
     """
@@ -158,9 +246,9 @@ async def auth_google(request: EmailRequest, session: Session = Depends(get_sess
 
         # Check if user exists in the database
         query = select(User).where(User.email == email)
-        users = session.exec(query).all()
+        users = (await session.exec(query)).all()
 
-        if users and isinstance(users, list) and len(users) == 1:
+        if users and len(users) == 1:
             user = users[0]
             return {"user_id": user.id, "email": user.email, "name": user.name}
         else:
@@ -170,10 +258,11 @@ async def auth_google(request: EmailRequest, session: Session = Depends(get_sess
                     status_code=400,
                     detail="Name is required for new user registration.",
                 )
-            user = User(name=name, email=email)
+            user = user_search.set_search_columns(User(name=name, email=email))
             session.add(user)
-            session.commit()
-            session.refresh(user)  # Refresh to get the new user ID
+            await session.commit()
+            await session.refresh(user)  # Refresh to get the new user ID
+            invalidate_user(user.id)
 
             return {"user_id": user.id, "email": user.email, "name": user.name}
 
@@ -191,22 +280,70 @@ class DebtEntry(SQLModel):
     created_at: datetime
 
 
+def build_debt_entries(
+    session: Session, debts: List[GroupDebtSummary]
+) -> List[DebtEntry]:
+    """Format debt rows, resolving debtor and creditor names through the user cache."""
+    names = get_user_names(
+        session,
+        {debt.debtor_id for debt in debts} | {debt.creditor_id for debt in debts},
+    )
+    return [
+        DebtEntry(
+            debtor_id=debt.debtor_id,
+            debtor_name=names.get(debt.debtor_id, "Unknown"),
+            creditor_id=debt.creditor_id,
+            creditor_name=names.get(debt.creditor_id, "Unknown"),
+            amount_owed=to_major(debt.amount_owed),
+            created_at=debt.created_at,
+        )
+        for debt in debts
+    ]
+
+
 class GroupDebtResponse(SQLModel):
     group_id: Optional[int]
     group_name: str
+    currency: str = settings.DEFAULT_CURRENCY  # Currency of the debt amounts
     members: List[User] = []
     debts: List[DebtEntry]
 
 
 @app.get("/api/groups/debts", response_model=List[GroupDebtResponse])
 async def get_group_debts(
-    user_id: int = Query(...), session: Session = Depends(get_session)
+    request: Request,
+    response: Response,
+    user_id: int = Query(...),
+    session: AsyncSession = Depends(get_async_session),
 ):
+    # The payload only changes with the user's groups, their versions and the
+    # user's untagged debts, all read in one query
+    versions = (
+        await session.exec(
+            select(User.ledger_version, Group.id, Group.version)
+            .select_from(User)
+            .outerjoin(UserGroupLink, UserGroupLink.user_id == User.id)
+            .outerjoin(Group, Group.id == UserGroupLink.group_id)
+            .where(User.id == user_id)
+            .order_by(Group.id)
+        )
+    ).all()
+    cached = not_modified(
+        request,
+        response,
+        make_etag("groups-debts", user_id, [tuple(row) for row in versions]),
+    )
+    if cached:
+        return cached
+
     # Step 1: Query groups where the user is a member
     group_statement = (
-        select(Group).join(UserGroupLink).where(UserGroupLink.user_id == user_id)
+        select(Group)
+        .join(UserGroupLink)
+        .where(UserGroupLink.user_id == user_id)
+        .options(selectinload(Group.members))
     )
-    groups = session.exec(group_statement).all()
+    groups = (await session.exec(group_statement)).all()
 
     # Collect group IDs for debt queries
     group_ids = [group.id for group in groups]
@@ -227,47 +364,31 @@ async def get_group_debts(
         )
     )
 
-    group_debts_summary = session.exec(debt_statement).all()
+    group_debts_summary = (await session.exec(debt_statement)).all()
 
     # Step 3: Organize debts by group and format responses
+    debt_entries_by_group = defaultdict(list)
+    debt_entries = await session.run_sync(build_debt_entries, group_debts_summary)
+    for debt, entry in zip(group_debts_summary, debt_entries):
+        debt_entries_by_group[debt.group_id].append(entry)
+
     group_debts = []
     for group in groups:
-        # Filter debts relevant to the current group
-        group_debt_entries = [
-            DebtEntry(
-                debtor_id=debt.debtor_id,
-                debtor_name=session.get(User, debt.debtor_id).name,
-                creditor_id=debt.creditor_id,
-                creditor_name=session.get(User, debt.creditor_id).name,
-                amount_owed=debt.amount_owed,
-                created_at=debt.created_at,
-            )
-            for debt in group_debts_summary
-            if debt.group_id == group.id
-        ]
+        # Debts relevant to the current group
+        group_debt_entries = debt_entries_by_group[group.id]
 
         group_debts.append(
             GroupDebtResponse(
                 group_id=group.id,
                 group_name=group.name,
+                currency=group.base_currency,
                 debts=group_debt_entries,  # List of structured debt entries
                 members=[member for member in group.members],
             )
         )
 
     # Step 4: Handle untagged debts
-    untagged_debts = [
-        DebtEntry(
-            debtor_id=debt.debtor_id,
-            debtor_name=session.get(User, debt.debtor_id).name,
-            creditor_id=debt.creditor_id,
-            creditor_name=session.get(User, debt.creditor_id).name,
-            amount_owed=debt.amount_owed,
-            created_at=debt.created_at,
-        )
-        for debt in group_debts_summary
-        if debt.group_id is None
-    ]
+    untagged_debts = debt_entries_by_group[None]
 
     # Add untagged debts to a special entry in the response
     if untagged_debts:
@@ -284,10 +405,32 @@ async def get_group_debts(
 
 @app.get("/api/group/debts", response_model=GroupDebtResponse)
 async def get_group_debt_summary(
+    request: Request,
+    response: Response,
     group_id: Optional[int] = None,  # Make group_id optional
     user_id: int = Query(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
+    if group_id is None:
+        version = (
+            await session.exec(select(User.ledger_version).where(User.id == user_id))
+        ).first()
+    else:
+        version = (
+            await session.exec(
+                select(Group.version)
+                .join(UserGroupLink, UserGroupLink.group_id == Group.id)
+                .where(Group.id == group_id, UserGroupLink.user_id == user_id)
+            )
+        ).first()
+    # Unknown users, groups and non-members fall through to the full checks
+    if version is not None:
+        cached = not_modified(
+            request, response, make_etag("group-debts", group_id, user_id, version)
+        )
+        if cached:
+            return cached
+
     # Step 1: If group_id is None, retrieve all untagged debts
 
     if group_id is None:
@@ -299,20 +442,12 @@ async def get_group_debt_summary(
                 | (GroupDebtSummary.creditor_id == user_id)
             )
         )
-        group_debts_summary = session.exec(debt_statement).all()
+        group_debts_summary = (await session.exec(debt_statement)).all()
 
         # Build response for untagged debts
-        untagged_debt_entries = [
-            DebtEntry(
-                debtor_id=debt.debtor_id,
-                debtor_name=session.get(User, debt.debtor_id).name,
-                creditor_id=debt.creditor_id,
-                creditor_name=session.get(User, debt.creditor_id).name,
-                amount_owed=debt.amount_owed,
-                created_at=debt.created_at,
-            )
-            for debt in group_debts_summary
-        ]
+        untagged_debt_entries = await session.run_sync(
+            build_debt_entries, group_debts_summary
+        )
 
         return GroupDebtResponse(
             group_id=None,  # Indicating untagged debts
@@ -321,9 +456,11 @@ async def get_group_debt_summary(
         )
 
     # Step 2: Verify that the user is a member of the group if group_id is provided
-    user_in_group = session.exec(
-        select(UserGroupLink).where(
-            UserGroupLink.user_id == user_id, UserGroupLink.group_id == group_id
+    user_in_group = (
+        await session.exec(
+            select(UserGroupLink).where(
+                UserGroupLink.user_id == user_id, UserGroupLink.group_id == group_id
+            )
         )
     ).first()
 
@@ -333,7 +470,7 @@ async def get_group_debt_summary(
         )
 
     # Step 3: Retrieve the group and its name
-    group = session.get(Group, group_id)
+    group = await session.get(Group, group_id, options=[selectinload(Group.members)])
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
@@ -341,157 +478,149 @@ async def get_group_debt_summary(
     debt_statement = select(GroupDebtSummary).where(
         GroupDebtSummary.group_id == group_id
     )
-    group_debts_summary = session.exec(debt_statement).all()
+    group_debts_summary = (await session.exec(debt_statement)).all()
 
     # Step 5: Build the response with debt entries formatted
-    group_debt_entries = [
-        DebtEntry(
-            debtor_id=debt.debtor_id,
-            debtor_name=session.get(User, debt.debtor_id).name,
-            creditor_id=debt.creditor_id,
-            creditor_name=session.get(User, debt.creditor_id).name,
-            amount_owed=debt.amount_owed,
-            created_at=debt.created_at,
-        )
-        for debt in group_debts_summary
-    ]
+    group_debt_entries = await session.run_sync(build_debt_entries, group_debts_summary)
 
     return GroupDebtResponse(
         group_id=group.id,
         group_name=group.name,
+        currency=group.base_currency,
         debts=group_debt_entries,
         members=[member for member in group.members],
     )
 
 
-from collections import defaultdict
-
-from pulp import LpMinimize, LpProblem, LpVariable, lpSum
-
-
-def reconcile_debts(debts):
-    # Step 1: Calculate net balances for each user
-    net_balances = defaultdict(float)
-
-    # Calculate net balances based on debts
-    for debtor, creditor, amount in debts:
-        net_balances[debtor] -= amount
-        net_balances[creditor] += amount
-
-    # Step 2: Set up the LP problem
-    problem = LpProblem("DebtReconciliation", LpMinimize)
-
-    # Step 3: Create variables for transactions
-    transactions = {}
-    for debtor in net_balances:
-        for creditor in net_balances:
-            if debtor != creditor:
-                transactions[(debtor, creditor)] = LpVariable(
-                    f"{debtor}_to_{creditor}", lowBound=0, cat=LpContinuous
-                )
-
-    # Step 4: Objective function: Minimize the total amount transferred
-    problem += lpSum(
-        transactions[(debtor, creditor)]
-        for debtor in net_balances
-        for creditor in net_balances
-        if debtor != creditor
-    )
-
-    # Step 5: Add constraints for the net balances
-    for user, balance in net_balances.items():
-        if balance > 0:  # User is a creditor
-            problem += (
-                lpSum(
-                    transactions[(debtor, user)]
-                    for debtor in net_balances
-                    if debtor != user
-                )
-                == balance
-            )
-        elif balance < 0:  # User is a debtor
-            problem += (
-                lpSum(
-                    transactions[(user, creditor)]
-                    for creditor in net_balances
-                    if creditor != user
-                )
-                == -balance
-            )
-
-    # Step 6: Solve the problem
-    problem.solve()
-
-    # Step 7: Collect results
-    results = []
-    for (debtor, creditor), var in transactions.items():
-        if var.varValue > 0:
-            results.append((debtor, creditor, var.varValue))
-
-    return results
-
-
 class ExpenseDetailResponse(BaseModel):
     id: int
     amount: float
+    currency: str
     description: str
     paid_by: dict  # Or you can define a separate model for the payer
     participants: List[ParticipantResponse]
     created_at: datetime
 
 
+def build_expense_details(session: Session, expenses: List[Expense]) -> List[dict]:
+    """
+    Build ExpenseDetailResponse payloads for the given expenses.
+    Participant links and names are loaded in one joined query for all expenses,
+    so the query count does not grow with the number of expenses.
+    """
+    participants_by_expense = defaultdict(list)
+    if expenses:
+        participant_rows = session.exec(
+            select(
+                ExpenseParticipantLink.expense_id,
+                ExpenseParticipantLink.user_id,
+                User.name,
+                ExpenseParticipantLink.amount_owed,
+            )
+            .join(User, User.id == ExpenseParticipantLink.user_id)
+            .where(
+                ExpenseParticipantLink.expense_id.in_(
+                    [expense.id for expense in expenses]
+                )
+            )
+            .order_by(ExpenseParticipantLink.user_id)
+        ).all()
+        for expense_id, user_id, name, amount_owed in participant_rows:
+            participants_by_expense[expense_id].append(
+                {"id": user_id, "name": name, "amount_owed": to_major(amount_owed)}
+            )
+
+    return [
+        {
+            "id": expense.id,
+            "amount": to_major(expense.amount),
+            "currency": expense.currency,
+            "description": expense.description,
+            "paid_by": {
+                "id": expense.paid_by.id,
+                "name": expense.paid_by.name,
+            },
+            "participants": participants_by_expense[expense.id],
+            "created_at": expense.created_at,
+        }
+        for expense in expenses
+    ]
+
+
 # Endpoint to get detailed expenses for a specific group
 @app.get("/api/groups/{group_id}/expenses", response_model=List[ExpenseDetailResponse])
-async def get_group_expenses(group_id: int, session: Session = Depends(get_session)):
-    # Fetch expenses for the specified group
-    expense_statement = (
+async def get_group_expenses(
+    group_id: int,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_async_session),
+):
+    version = (
+        await session.exec(select(Group.version).where(Group.id == group_id))
+    ).first()
+    cached = not_modified(
+        request,
+        response,
+        make_etag("group-expenses", group_id, page.cursor, page.limit, version),
+    )
+    if cached:
+        return cached
+
+    # Fetch one page of expenses for the specified group, newest first
+    expense_statement = paginate(
         select(Expense)
         .where(Expense.group_id == group_id)
-        .options(selectinload(Expense.paid_by))
-    ).order_by(Expense.created_at.desc())
-    expenses = session.exec(expense_statement).all()
+        .options(selectinload(Expense.paid_by)),
+        Expense.created_at,
+        Expense.id,
+        page,
+    )
+    expenses = finish_page(
+        (await session.exec(expense_statement)).all(), page, response, "created_at"
+    )
 
-    # Build detailed expense information
-    expense_details = []
-    for expense in expenses:
-        # Query ExpenseParticipantLink to get amount owed for each participant
-        participant_links_statement = select(ExpenseParticipantLink).where(
-            ExpenseParticipantLink.expense_id == expense.id
-        )
-        participant_links = session.exec(participant_links_statement).all()
+    return await session.run_sync(build_expense_details, expenses)
 
-        # Construct participant information with amount owed
-        participants = [
-            {
-                "id": link.user_id,
-                "name": session.get(User, link.user_id).name,
-                "amount_owed": link.amount_owed,
-            }
-            for link in participant_links
-        ]
 
-        # Append detailed expense information
-        expense_details.append(
-            {
-                "id": expense.id,
-                "amount": expense.amount,
-                "description": expense.description,
-                "paid_by": {
-                    "id": expense.paid_by.id,
-                    "name": expense.paid_by.name,
-                },
-                "participants": participants,
-                "created_at": expense.created_at,
-            }
-        )
+@app.get("/api/groups/{group_id}/ledger/export")
+def export_group_ledger(
+    group_id: int,
+    user_id: int = Query(...),
+    format: Literal[EXPORT_FORMATS] = Query("ndjson", description="ndjson or csv"),
+):
+    """
+    Stream a group's whole ledger for auditing, as NDJSON or CSV: expenses with
+    their participant splits and settlements in chronological order, then the
+    current debts. Rows are read in bounded batches, however large the group.
+    """
+    with Session(engine) as session:
+        group = session.get(Group, group_id)
+        if not group:
+            raise HTTPException(status_code=404, detail="Group not found")
+        user_in_group = session.exec(
+            select(UserGroupLink).where(
+                UserGroupLink.user_id == user_id, UserGroupLink.group_id == group_id
+            )
+        ).first()
+        if not user_in_group:
+            raise HTTPException(
+                status_code=403, detail="User is not a member of this group"
+            )
+        currency = group.base_currency
 
-    return expense_details
+    return export_response(
+        stream_group_ledger(engine, group_id, currency),
+        LEDGER_EXPORT_COLUMNS,
+        format,
+        f"group-{group_id}-ledger",
+    )
 
 
 @app.get("/api/expenses/untagged", response_model=List[ExpenseDetailResponse])
 async def get_untagged_expenses(
     user_id: int = Query(...),  # Accept user_id as a query parameter
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     # Fetch expenses that are not associated with any group
     expense_statement = (
@@ -511,43 +640,9 @@ async def get_untagged_expenses(
         )
         .options(selectinload(Expense.paid_by))
     )
-    expenses = session.exec(expense_statement).all()
-
-    # Build detailed expense information
-    expense_details = []
-    for expense in expenses:
-        # Query ExpenseParticipantLink to get amount owed for each participant
-        participant_links_statement = select(ExpenseParticipantLink).where(
-            ExpenseParticipantLink.expense_id == expense.id
-        )
-        participant_links = session.exec(participant_links_statement).all()
-
-        # Construct participant information with amount owed
-        participants = [
-            {
-                "id": link.user_id,
-                "name": session.get(User, link.user_id).name,
-                "amount_owed": link.amount_owed,
-            }
-            for link in participant_links
-        ]
-
-        # Append detailed expense information
-        expense_details.append(
-            {
-                "id": expense.id,
-                "amount": expense.amount,
-                "description": expense.description,
-                "paid_by": {
-                    "id": expense.paid_by.id,
-                    "name": expense.paid_by.name,
-                },
-                "participants": participants,
-                "created_at": expense.created_at,
-            }
-        )
+    expenses = (await session.exec(expense_statement)).all()
 
-    return expense_details
+    return await session.run_sync(build_expense_details, expenses)
 
 
 class ExpenseStatus(str, Enum):
@@ -572,22 +667,26 @@ class SettledExpenseResponse(SQLModel):
 
 
 @app.post("/settle-up")
-async def settle_debt(request: SettleRequest, session: Session = Depends(get_session)):
+async def settle_debt(
+    request: SettleRequest, session: AsyncSession = Depends(get_async_session)
+):
     # Step 1: Start a transaction block to manage all operations
-    with session.begin():
-        debtor = session.query(User).filter(User.id == request.debtor_id).first()
-        creditor = session.query(User).filter(User.id == request.creditor_id).first()
+    async with session.begin():
+        debtor = await session.get(User, request.debtor_id)
+        creditor = await session.get(User, request.creditor_id)
         if not debtor or not creditor:
             raise HTTPException(
                 status_code=404,
                 detail="Creditor or debtor not found",
             )
         # Fetch the specific debt entry for the given group, debtor, and creditor
-        debt_summary = session.exec(
-            select(GroupDebtSummary)
-            .where(GroupDebtSummary.group_id == request.group_id)
-            .where(GroupDebtSummary.debtor_id == request.debtor_id)
-            .where(GroupDebtSummary.creditor_id == request.creditor_id)
+        debt_summary = (
+            await session.exec(
+                select(GroupDebtSummary)
+                .where(GroupDebtSummary.group_id == request.group_id)
+                .where(GroupDebtSummary.debtor_id == request.debtor_id)
+                .where(GroupDebtSummary.creditor_id == request.creditor_id)
+            )
         ).one_or_none()
 
         if not debt_summary:
@@ -597,36 +696,54 @@ async def settle_debt(request: SettleRequest, session: Session = Depends(get_ses
             )
 
         # Check if the settlement amount is valid
-        if (
-            request.settle_up_amount <= 0
-            or request.settle_up_amount > debt_summary.amount_owed
-        ):
+        amount = to_minor(request.settle_up_amount)
+        if amount <= 0 or amount > debt_summary.amount_owed:
             raise HTTPException(status_code=400, detail="Invalid settlement amount.")
 
+        # Bring the group onto the ledger before this settlement is recorded
+        await session.run_sync(ledger.ensure_group_ledger, request.group_id)
+
         # Update the debt amount owed by the settle-up amount
-        debt_summary.amount_owed -= request.settle_up_amount
+        debt_summary.amount_owed -= amount
         session.add(debt_summary)
+        await session.run_sync(
+            apply_debt_changes,
+            await session.run_sync(ledger.group_currency, request.group_id),
+            removed=[(request.debtor_id, request.creditor_id, amount)],
+        )
 
         # Create a new settlement record
         settlement_record = Settlement(
             creditor_id=request.creditor_id,
             debtor_id=request.debtor_id,
-            amount=request.settle_up_amount,
+            amount=amount,
             created_at=datetime.now(),
             group_id=request.group_id,
         )
         session.add(settlement_record)
+        # Fold the settlement into the group's running balances once, here,
+        # so expense writes never need to re-read the settlement history
+        await session.run_sync(
+            ledger.apply_settlement,
+            request.group_id,
+            request.debtor_id,
+            request.creditor_id,
+            amount,
+        )
+        await session.run_sync(bump_group_versions, [request.group_id])
 
         # Check for pending debts after settlement
         remaining_debts = (
-            session.query(GroupDebtSummary)
-            .filter(GroupDebtSummary.group_id == request.group_id)
-            .count()
-        )
+            await session.exec(
+                select(func.count())
+                .select_from(GroupDebtSummary)
+                .where(GroupDebtSummary.group_id == request.group_id)
+            )
+        ).one()
 
         # If no debts remain, mark the group as settled
         if remaining_debts == 0:
-            group = session.get(Group, request.group_id)
+            group = await session.get(Group, request.group_id)
             if group:
                 group.settled = True
                 session.add(group)
@@ -638,29 +755,29 @@ async def settle_debt(request: SettleRequest, session: Session = Depends(get_ses
             group_id=request.group_id,
             activity_type=ActivityTypes.SETTLED_DEBT,
         )
-        session.add(activity)
+        session.add_all(deliver(activity))
 
         # If this debt is fully paid, delete the debt entry from GroupDebtSummary
-        if debt_summary.amount_owed <= 0:
-            session.delete(debt_summary)
+        if debt_summary.amount_owed == 0:
+            await session.delete(debt_summary)
 
         # Check if the group is fully settled
-        remaining_debts = session.exec(
-            select(GroupDebtSummary).where(
-                GroupDebtSummary.group_id == request.group_id
+        remaining_debts = (
+            await session.exec(
+                select(GroupDebtSummary).where(
+                    GroupDebtSummary.group_id == request.group_id
+                )
             )
         ).all()
         if not remaining_debts:
-            group = session.get(Group, request.group_id)
+            group = await session.get(Group, request.group_id)
             group.settled = True
             session.add(group)
 
     # Return the response with remaining debt amount if any
     return {
         "message": "Debt successfully settled.",
-        "remaining_amount": (
-            debt_summary.amount_owed if debt_summary.amount_owed > 0 else 0
-        ),
+        "remaining_amount": to_major(debt_summary.amount_owed),
     }
 
 
@@ -670,17 +787,17 @@ async def search_users(
     user_id: int = Query(
         ..., description="ID of the current user to exclude from search results"
     ),
-    session: Session = Depends(get_session),
+    limit: int = Query(
+        settings.USER_SEARCH_LIMIT, ge=1, le=settings.USER_SEARCH_MAX_LIMIT
+    ),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
     Search for users by name or email, excluding the user with the provided user_id.
+    Returns the top `limit` matches: exact email, then name prefix, then email
+    prefix, then substring.
     """
-    statement = select(User).where(
-        ((User.name.ilike(f"%{term}%")) | (User.email.ilike(f"%{term}%")))
-        & (User.id != user_id)  # Exclude the current user
-    )
-
-    results = session.exec(statement).all()
+    results = await session.run_sync(user_search.search_users, term, user_id, limit)
     if not results:
         raise HTTPException(status_code=404, detail="No users found")
 
@@ -693,39 +810,70 @@ class FriendIdsRequest(BaseModel):
 
 @app.post("/users/{user_id}/friends", status_code=status.HTTP_201_CREATED)
 async def add_friends(
-    user_id: int, request: FriendIdsRequest, session: Session = Depends(get_session)
+    user_id: int,
+    request: FriendIdsRequest,
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
     Add multiple friends for a given user.
     If any friendship already exists, raise a 409 Conflict error.
     """
-    # Fetch the user to validate they exist
-    user = session.get(User, user_id)
-    if not user:
+    # Validate the user and every requested friend with one lookup
+    friend_ids = [
+        friend_id
+        for friend_id in dict.fromkeys(request.friend_ids)
+        if friend_id != user_id
+    ]
+    profiles = await session.run_sync(get_user_profiles, [user_id, *friend_ids])
+    if user_id not in profiles:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-
-    # Track existing friendships to avoid duplicates
-    existing_friendships = []
-    for friend_id in request.friend_ids:
-        # Check if the friendship already exists (bidirectional check)
-        statement = select(Friendship).where(
-            (Friendship.user_id == user_id) & (Friendship.friend_id == friend_id)
-            | (Friendship.user_id == friend_id) & (Friendship.friend_id == user_id)
+    unknown = [friend_id for friend_id in friend_ids if friend_id not in profiles]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Users not found: {unknown}",
         )
-        friendship = session.exec(statement).first()
 
-        if friendship:
-            user = session.get(User, friend_id)
-            existing_friendships.append(f"{user.name} -- {user.email}")
-        else:
-            # Create a new friendship relationship
-            new_friendship = Friendship(user_id=user_id, friend_id=friend_id)
-            session.add(new_friendship)
+    # Find the pairs that are already friends, in either direction, in one query
+    existing_ids = set()
+    if friend_ids:
+        for pair_user_id, pair_friend_id in await session.exec(
+            select(Friendship.user_id, Friendship.friend_id).where(
+                or_(
+                    (Friendship.user_id == user_id)
+                    & Friendship.friend_id.in_(friend_ids),
+                    (Friendship.friend_id == user_id)
+                    & Friendship.user_id.in_(friend_ids),
+                )
+            )
+        ):
+            existing_ids.add(
+                pair_friend_id if pair_user_id == user_id else pair_user_id
+            )
+    existing_friendships = [
+        f"{profiles[friend_id].name} -- {profiles[friend_id].email}"
+        for friend_id in friend_ids
+        if friend_id in existing_ids
+    ]
 
-    # Commit all new friendships at once
-    session.commit()
+    # Insert all new friendships in a single statement
+    new_friend_ids = [
+        friend_id for friend_id in friend_ids if friend_id not in existing_ids
+    ]
+    if new_friend_ids:
+        await session.exec(
+            insert(Friendship).values(
+                [
+                    {"user_id": user_id, "friend_id": friend_id}
+                    for friend_id in new_friend_ids
+                ]
+            )
+        )
+        await session.run_sync(bump_friend_versions, [user_id, *new_friend_ids])
+        await session.commit()
+        invalidate_friends(user_id, *new_friend_ids)
 
     if existing_friendships:
         raise HTTPException(
@@ -738,25 +886,49 @@ async def add_friends(
 
 @app.get("/api/friends/{user_id}", response_model=List[User])
 def get_friends(user_id: int, db: Session = Depends(get_session)):
-    statement = select(Friendship).where(
-        (Friendship.user_id == user_id) | (Friendship.friend_id == user_id)
-    )
-    friends = db.exec(statement).all()
+    friend_ids = get_friend_ids(db, [user_id])[user_id]
 
-    if not friends:
+    if not friend_ids:
         raise HTTPException(status_code=404, detail="No friends found")
 
-    friend_ids = []
-    for friend in friends:
-        u_id = friend.friend_id
-        if friend.friend_id == user_id:
-            u_id = friend.user_id
-        friend_ids.append(u_id)
     friend_users = db.exec(select(User).where(User.id.in_(friend_ids))).all()
 
     return friend_users
 
 
+class FriendSuggestion(BaseModel):
+    user_id: int
+    name: str
+    email: str
+    avatar_url: Optional[str]
+    mutual_friends: int
+
+
+@app.get("/api/friends/{user_id}/suggestions", response_model=List[FriendSuggestion])
+def get_friend_suggestions(
+    user_id: int,
+    limit: int = Query(settings.FRIEND_SUGGESTIONS_LIMIT, ge=1, le=50),
+    db: Session = Depends(get_session),
+):
+    """
+    People the user may know: friends of their friends, most mutual friends
+    first. Built from cached friend lists, with one query for any uncached ones.
+    """
+    suggestions = suggest_friends(db, user_id, limit)
+    profiles = get_user_profiles(db, [suggested for suggested, _ in suggestions])
+    return [
+        FriendSuggestion(
+            user_id=suggested,
+            name=profiles[suggested].name,
+            email=profiles[suggested].email,
+            avatar_url=profiles[suggested].avatar_url,
+            mutual_friends=mutual,
+        )
+        for suggested, mutual in suggestions
+        if suggested in profiles
+    ]
+
+
 @app.get("/api/groups/{user_id}", response_model=List[Group])
 def list_groups(user_id: int, db: Session = Depends(get_session)):
     # Query to get the user's groups and their last expense creation date
@@ -780,56 +952,8 @@ def list_groups(user_id: int, db: Session = Depends(get_session)):
 from sqlalchemy.exc import SQLAlchemyError
 
 
-def reconcile_all_group_debts(
-    db: Session,
-    expenses: List[Expense],
-    group_id: int,
-    adjusted_debts: list[tuple[str, str, float]],
-):
-    """
-    Reconcile debts for all expenses in the group, deleting existing summaries and upserting the new reconciled debts.
-    """
-    all_debts = []
-
-    # Calculate debts for each expense in the group
-    for expense in expenses:
-        participant_links = (
-            db.query(ExpenseParticipantLink)
-            .filter(ExpenseParticipantLink.expense_id == expense.id)
-            .all()
-        )
-
-        for link in participant_links:
-            all_debts.append((link.user_id, expense.paid_by_id, link.amount_owed))
-
-    # factor in for adjustments (settlements)
-    all_debts.extend(adjusted_debts)
-
-    # Reconcile debts based on all accumulated debts in the group
-    reconciled_debts = reconcile_debts(all_debts)
-
-    # Delete all existing debt summaries within this group
-    db.query(GroupDebtSummary).filter(GroupDebtSummary.group_id == group_id).delete(
-        synchronize_session=False
-    )
-
-    # Insert the new reconciled debt summaries
-    for debtor_id, creditor_id, amount in reconciled_debts:
-        debt_summary = GroupDebtSummary(
-            group_id=group_id,
-            debtor_id=debtor_id,
-            creditor_id=creditor_id,
-            amount_owed=amount,
-        )
-        db.add(debt_summary)
-
-    return [
-        {"debtor": d[0], "creditor": d[1], "amount": d[2]} for d in reconciled_debts
-    ]
-
-
 def reconcile_single_expense(
-    db: Session, debts: List[Tuple[int, int, float]], group_id: int
+    db: Session, debts: List[Tuple[int, int, int]], group_id: int
 ):
     """
     Reconcile debts for a single expense, updating or inserting individual debt records as necessary.
@@ -884,14 +1008,15 @@ def reconcile_single_expense(
             db.add(new_summary)
 
         debt_summary_updates.append(
-            {"debtor": debtor_id, "creditor": creditor_id, "amount": amount}
+            {"debtor": debtor_id, "creditor": creditor_id, "amount": to_major(amount)}
         )
+    apply_debt_changes(db, ledger.ledger_currency(db, group_id), added=reconciled_debts)
 
     return debt_summary_updates
 
 
 def reconcile_single_expense_delete(
-    db: Session, debts: List[Tuple[int, int, float]], group_id: int
+    db: Session, debts: List[Tuple[int, int, int]], group_id: int
 ):
     """
     Reconcile debts for a single expense, updating or inserting individual debt records as necessary.
@@ -945,8 +1070,11 @@ def reconcile_single_expense_delete(
             db.add(new_summary)
 
         debt_summary_updates.append(
-            {"debtor": debtor_id, "creditor": creditor_id, "amount": amount}
+            {"debtor": debtor_id, "creditor": creditor_id, "amount": to_major(amount)}
         )
+    apply_debt_changes(
+        db, ledger.ledger_currency(db, group_id), removed=reconciled_debts
+    )
 
     return debt_summary_updates
 
@@ -965,6 +1093,7 @@ class ExpenseData(SQLModel):
 
 
 def validate_expense_data(expense_data: ExpenseData):
+    expense_data.currency = expense_data.currency.upper()
     if expense_data.amount <= 0:
         raise HTTPException(status_code=400, detail="Amount must be greater than zero.")
     if not expense_data.payer_id or not expense_data.participants:
@@ -981,14 +1110,14 @@ def store_expense(
         expense = db.query(Expense).get(expense_id)
         if not expense:
             raise HTTPException(status_code=404, detail="Expense not found.")
-        expense.amount = expense_data.amount
+        expense.amount = to_minor(expense_data.amount)
         expense.description = expense_data.description
         expense.currency = expense_data.currency
         expense.paid_by_id = expense_data.payer_id
         expense.group_id = expense_data.group_id
     else:
         expense = Expense(
-            amount=expense_data.amount,
+            amount=to_minor(expense_data.amount),
             description=expense_data.description,
             currency=expense_data.currency,
             created_at=datetime.utcnow(),
@@ -1000,62 +1129,56 @@ def store_expense(
     return expense.id, expense.description
 
 
-def calculate_debts(expense_data: ExpenseData) -> List[Tuple[int, int, float]]:
-    """Calculates debts for each participant based on split type."""
-    debts = []
-    total_shares = (
-        sum(expense_data.customSplits.values())
-        if expense_data.splitMode == "share"
-        else None
-    )
-
-    for participant_id in expense_data.participants:
-        if expense_data.splitType == "equal":
-            amount_owed = expense_data.amount / len(expense_data.participants)
-        elif expense_data.splitType == "custom":
-            if expense_data.splitMode == "amount":
-                amount_owed = expense_data.customSplits.get(participant_id, 0)
-            elif expense_data.splitMode == "share" and total_shares:
-                amount_owed = (
-                    expense_data.customSplits.get(participant_id, 0) / total_shares
-                ) * expense_data.amount
-            else:
-                raise HTTPException(
-                    status_code=400, detail="Invalid split configuration."
-                )
-
-        debts.append((participant_id, expense_data.payer_id, amount_owed))
-
-    return debts
-
-
-def provide_expense_adjustments(
-    expense_data: ExpenseData, db: Session
-) -> list[tuple[str, str, float]]:
-    # Fetch existing settlements for the group (if any)
-    settlement_records = (
-        db.query(Settlement)
-        .filter(
-            Settlement.group_id == expense_data.group_id,
-            or_(
-                and_(
-                    Settlement.debtor_id == expense_data.payer_id,
-                    Settlement.creditor_id.in_(expense_data.participants),
-                ),
-                and_(
-                    Settlement.creditor_id == expense_data.payer_id,
-                    Settlement.debtor_id.in_(expense_data.participants),
-                ),
-            ),
+def calculate_debts(expense_data: ExpenseData) -> List[Tuple[int, int, int]]:
+    """
+    Calculates each participant's debt in minor units based on split type.
+    Equal and share splits always add up to exactly the expense amount.
+    """
+    participants = expense_data.participants
+    total = to_minor(expense_data.amount)
+
+    if expense_data.splitType == "equal":
+        shares = split_evenly(total, len(participants))
+    elif expense_data.splitMode == "amount":
+        shares = [
+            to_minor(expense_data.customSplits.get(participant_id, 0))
+            for participant_id in participants
+        ]
+    elif expense_data.splitMode == "share" and sum(expense_data.customSplits.values()):
+        shares = allocate(
+            total,
+            [
+                expense_data.customSplits.get(participant_id, 0)
+                for participant_id in participants
+            ],
         )
-        .all()
-    )
+    else:
+        raise HTTPException(status_code=400, detail="Invalid split configuration.")
 
-    adjusted_debts: list[tuple[str, str, float]] = [
-        (record.creditor_id, record.debtor_id, record.amount)
-        for record in settlement_records
+    return [
+        (participant_id, expense_data.payer_id, amount_owed)
+        for participant_id, amount_owed in zip(participants, shares)
     ]
-    return adjusted_debts
+
+
+def add_participant_links(
+    db: Session,
+    expense_id: int,
+    debts: List[Tuple[int, int, int]],
+    ledger_debts: List[Tuple[int, int, int]],
+):
+    """Store each participant's share and its ledger-currency amount."""
+    for (participant_id, _, amount_owed), (_, _, ledger_amount) in zip(
+        debts, ledger_debts
+    ):
+        db.add(
+            ExpenseParticipantLink(
+                expense_id=expense_id,
+                user_id=participant_id,
+                amount_owed=amount_owed,
+                ledger_amount=ledger_amount,
+            )
+        )
 
 
 @app.post("/expenses")
@@ -1067,38 +1190,41 @@ def create_expense(expense_data: ExpenseData, db: Session = Depends(get_session)
             user = db.query(User).filter(User.id == expense_data.user_id).first()
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
+            if expense_data.group_id:
+                ledger.ensure_group_ledger(db, expense_data.group_id)
             stored_expense_id, expense_name = store_expense(db, expense_data)
+            spent_at = db.get(Expense, stored_expense_id).created_at
             debts = calculate_debts(expense_data)
+            # Converted into the ledger's currency once, and stored for reversals
+            ledger_debts = ledger.to_ledger_amounts(
+                db, debts, expense_data.currency, expense_data.group_id, spent_at
+            )
 
             # Insert ExpenseParticipantLink for each participant
-            for participant_id, _, amount_owed in debts:
-                participant_link = ExpenseParticipantLink(
-                    expense_id=stored_expense_id,
-                    user_id=participant_id,
-                    amount_owed=amount_owed,
-                )
-                db.add(participant_link)
-
-            # Fetch existing settlements for the group (if any)
-            adjusted_debts = provide_expense_adjustments(expense_data, db)
-
-            # Include the adjustment of the settlement before reconcillation
-            debts.extend(adjusted_debts)
+            add_participant_links(db, stored_expense_id, debts, ledger_debts)
 
             # Reconcile debts
             if expense_data.group_id:
-                all_expenses = (
-                    db.query(Expense)
-                    .filter(Expense.group_id == expense_data.group_id)
-                    .all()
+                ledger.apply_expense(
+                    db,
+                    expense_data.group_id,
+                    expense_data.payer_id,
+                    [
+                        (participant_id, amount)
+                        for participant_id, _, amount in ledger_debts
+                    ],
                 )
-                debt_summary = reconcile_all_group_debts(
-                    db, all_expenses, expense_data.group_id, adjusted_debts
+                debt_summary = ledger.refresh_group_debt_summaries(
+                    db, expense_data.group_id
                 )
             else:
                 debt_summary = reconcile_single_expense(
-                    db, debts, expense_data.group_id
+                    db, ledger_debts, expense_data.group_id
                 )
+                bump_ledger_versions(
+                    db, [expense_data.payer_id, *expense_data.participants]
+                )
+            bump_group_versions(db, [expense_data.group_id])
 
             # Log activity
             activity = Activity(
@@ -1109,7 +1235,7 @@ def create_expense(expense_data: ExpenseData, db: Session = Depends(get_session)
                 timestamp=datetime.utcnow(),
                 activity_type=ActivityTypes.CREATED_EXPENSE,
             )
-            db.add(activity)
+            db.add_all(deliver(activity))
 
             # Commit transaction
             db.commit()
@@ -1126,6 +1252,224 @@ def create_expense(expense_data: ExpenseData, db: Session = Depends(get_session)
         )
 
 
+class ExpenseImportRow(ExpenseData):
+    created_at: Optional[datetime] = None  # Keeps the original date of migrated history
+
+
+IMPORT_CHUNK_SIZE = 500
+
+
+class ExpenseImportState:
+    """Ledger effects accumulated across chunks and applied once per group at the end."""
+
+    def __init__(self):
+        self.imported = 0
+        self.errors: List[dict] = []
+        self.group_deltas: Dict[int, Dict[int, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self.untagged_debts: Dict[frozenset, list] = defaultdict(list)
+
+
+def import_expense_chunk(
+    db: Session,
+    rows: List[Tuple[int, ExpenseImportRow, List[Tuple[int, int, int]]]],
+    state: ExpenseImportState,
+):
+    """Bulk-insert one chunk of validated rows; rows with unknown users or groups are reported."""
+    user_ids = set()
+    group_ids = set()
+    for _, expense_data, _ in rows:
+        user_ids.update(
+            [expense_data.user_id, expense_data.payer_id, *expense_data.participants]
+        )
+        if expense_data.group_id:
+            group_ids.add(expense_data.group_id)
+    known_users = set(db.exec(select(User.id).where(User.id.in_(user_ids))).all())
+    group_currencies = dict(
+        db.exec(
+            select(Group.id, Group.base_currency).where(Group.id.in_(group_ids))
+        ).all()
+        if group_ids
+        else []
+    )
+
+    # One batched rate lookup converts every row into its ledger's currency
+    now = datetime.utcnow()
+    conversions = {
+        row_number: fx.conversion(
+            expense_data.currency,
+            group_currencies.get(expense_data.group_id, settings.DEFAULT_CURRENCY),
+            expense_data.created_at or now,
+        )
+        for row_number, expense_data, _ in rows
+    }
+    factors = fx.conversion_factors(db, conversions.values())
+
+    accepted = []
+    for row_number, expense_data, debts in rows:
+        missing_users = {
+            expense_data.user_id,
+            expense_data.payer_id,
+            *expense_data.participants,
+        } - known_users
+        if missing_users:
+            state.errors.append(
+                {
+                    "row": row_number,
+                    "error": f"Unknown user(s): {sorted(missing_users)}",
+                }
+            )
+        elif expense_data.group_id and expense_data.group_id not in group_currencies:
+            state.errors.append({"row": row_number, "error": "Group not found"})
+        elif conversions[row_number] not in factors:
+            state.errors.append(
+                {
+                    "row": row_number,
+                    "error": str(fx.missing_rate(conversions[row_number])),
+                }
+            )
+        else:
+            accepted.append((expense_data, debts, factors[conversions[row_number]]))
+
+    # Backfill any pre-ledger group before its imported expenses are inserted
+    for group_id in {data.group_id for data, _, _ in accepted if data.group_id}:
+        if group_id not in state.group_deltas:
+            ledger.ensure_group_ledger(db, group_id)
+
+    expenses = [
+        Expense(
+            amount=to_minor(expense_data.amount),
+            description=expense_data.description,
+            currency=expense_data.currency,
+            created_at=expense_data.created_at or now,
+            paid_by_id=expense_data.payer_id,
+            group_id=expense_data.group_id,
+        )
+        for expense_data, _, _ in accepted
+    ]
+    db.add_all(expenses)
+    db.flush()
+
+    participant_links = []
+    for expense, (expense_data, debts, factor) in zip(expenses, accepted):
+        for participant_id, payer_id, amount_owed in debts:
+            amount = fx.convert(amount_owed, factor)
+            participant_links.append(
+                {
+                    "expense_id": expense.id,
+                    "user_id": participant_id,
+                    "amount_owed": amount_owed,
+                    "ledger_amount": amount,
+                }
+            )
+            if expense_data.group_id:
+                deltas = state.group_deltas[expense_data.group_id]
+                deltas[participant_id] -= amount
+                deltas[payer_id] += amount
+            else:
+                state.untagged_debts[frozenset((participant_id, payer_id))].append(
+                    (participant_id, payer_id, amount)
+                )
+    if participant_links:
+        db.exec(insert(ExpenseParticipantLink).values(participant_links))
+
+    state.imported += len(accepted)
+
+
+def finish_expense_import(
+    db: Session, state: ExpenseImportState, user: User
+) -> Dict[int, list]:
+    """Reconcile every affected group exactly once and log one activity per group."""
+    debt_summaries = {}
+    for group_id, deltas in state.group_deltas.items():
+        ledger.apply_balance_deltas(db, group_id, deltas)
+        debt_summaries[group_id] = ledger.refresh_group_debt_summaries(db, group_id)
+        db.add_all(
+            deliver(
+                Activity(
+                    action=f"Expenses imported into the group by {user.name}",
+                    user_id=user.id,
+                    group_id=group_id,
+                    timestamp=datetime.utcnow(),
+                    activity_type=ActivityTypes.IMPORTED_EXPENSES,
+                )
+            )
+        )
+
+    # Untagged debts are only netted within each pair of users, as for single expenses
+    for debts in state.untagged_debts.values():
+        reconcile_single_expense(db, debts, None)
+
+    bump_group_versions(db, state.group_deltas)
+    bump_ledger_versions(db, set().union(*state.untagged_debts))
+
+    return debt_summaries
+
+
+@app.post("/expenses/import")
+async def import_expenses(
+    request: Request,
+    user_id: int = Query(..., description="User performing the import"),
+    format: Optional[Literal[IMPORT_FORMATS]] = Query(
+        None, description="Defaults to the request Content-Type"
+    ),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Import expenses streamed as CSV (with a header row) or NDJSON, one expense
+    per line with the same fields as POST /expenses plus an optional created_at.
+    Rows that fail validation are reported and skipped; the rest are inserted
+    in chunks and each affected group is reconciled once at the end.
+    """
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    fmt = detect_format(format, request.headers.get("content-type"))
+    state = ExpenseImportState()
+    pending = []
+    try:
+        async for row_number, row, error in iter_rows(request.stream(), fmt):
+            if error:
+                state.errors.append({"row": row_number, "error": error})
+                continue
+            try:
+                row.setdefault("user_id", user_id)
+                expense_data = ExpenseImportRow(**row)
+                validate_expense_data(expense_data)
+                debts = calculate_debts(expense_data)
+            except ValidationError as e:
+                state.errors.append({"row": row_number, "error": str(e)})
+                continue
+            except HTTPException as e:
+                state.errors.append({"row": row_number, "error": e.detail})
+                continue
+
+            pending.append((row_number, expense_data, debts))
+            if len(pending) >= IMPORT_CHUNK_SIZE:
+                await db.run_sync(import_expense_chunk, pending, state)
+                pending = []
+
+        if pending:
+            await db.run_sync(import_expense_chunk, pending, state)
+        debt_summaries = await db.run_sync(finish_expense_import, state, user)
+        await db.commit()
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500, detail="An error occurred while importing expenses."
+        )
+
+    return {
+        "status": "success",
+        "imported": state.imported,
+        "failed": len(state.errors),
+        "errors": state.errors,
+        "debt_summary": debt_summaries,
+    }
+
+
 @app.put("/expenses/{expense_id}")
 def update_expense(
     expense_id: int, expense_data: ExpenseData, db: Session = Depends(get_session)
@@ -1137,45 +1481,82 @@ def update_expense(
             user = db.query(User).filter(User.id == expense_data.user_id).first()
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
+            # Reverse the previous version of the expense in its group ledger
+            previous = db.get(Expense, expense_id)
+            if previous and previous.group_id:
+                ledger.ensure_group_ledger(db, previous.group_id)
+                previous_links = db.exec(
+                    select(ExpenseParticipantLink).where(
+                        ExpenseParticipantLink.expense_id == expense_id
+                    )
+                ).all()
+                ledger.apply_expense(
+                    db,
+                    previous.group_id,
+                    previous.paid_by_id,
+                    [(link.user_id, link.ledger_amount) for link in previous_links],
+                    sign=-1,
+                )
+            previous_group_id = previous.group_id if previous else None
+            if previous and not previous.group_id:
+                bump_ledger_versions(
+                    db,
+                    [
+                        previous.paid_by_id,
+                        *db.exec(
+                            select(ExpenseParticipantLink.user_id).where(
+                                ExpenseParticipantLink.expense_id == expense_id
+                            )
+                        ).all(),
+                    ],
+                )
+            bump_group_versions(db, [previous_group_id, expense_data.group_id])
+            if expense_data.group_id and expense_data.group_id != previous_group_id:
+                ledger.ensure_group_ledger(db, expense_data.group_id)
+            # Checkpoints taken after this expense no longer match its history
+            for group_id in {previous_group_id, expense_data.group_id} - {None}:
+                ledger.invalidate_checkpoints(db, group_id, expense_id)
+
             # Store or update the expense
             stored_expense_id, expense_name = store_expense(
                 db, expense_data, expense_id=expense_id
             )
 
             # Calculate debts for the expense
+            spent_at = db.get(Expense, stored_expense_id).created_at
             debts = calculate_debts(expense_data)
-
-            # Fetch existing settlements for the group (if any)
-            adjusted_debts = provide_expense_adjustments(expense_data, db)
+            ledger_debts = ledger.to_ledger_amounts(
+                db, debts, expense_data.currency, expense_data.group_id, spent_at
+            )
 
             # Update ExpenseParticipantLink entries
             db.query(ExpenseParticipantLink).filter(
                 ExpenseParticipantLink.expense_id == expense_id
             ).delete()
-
-            for participant_id, _, amount_owed in debts:
-                participant_link = ExpenseParticipantLink(
-                    expense_id=expense_id,
-                    user_id=participant_id,
-                    amount_owed=amount_owed,
-                )
-                db.add(participant_link)
-            # add adjustment to the current debt for untagged expense
-            debts.extend(adjusted_debts)
+            add_participant_links(db, expense_id, debts, ledger_debts)
 
             # Handle debt reconciliation
+            if previous_group_id and previous_group_id != expense_data.group_id:
+                ledger.refresh_group_debt_summaries(db, previous_group_id)
             if expense_data.group_id:
-                all_expenses = (
-                    db.query(Expense)
-                    .filter(Expense.group_id == expense_data.group_id)
-                    .all()
+                ledger.apply_expense(
+                    db,
+                    expense_data.group_id,
+                    expense_data.payer_id,
+                    [
+                        (participant_id, amount)
+                        for participant_id, _, amount in ledger_debts
+                    ],
                 )
-                debt_summary = reconcile_all_group_debts(
-                    db, all_expenses, expense_data.group_id, adjusted_debts
+                debt_summary = ledger.refresh_group_debt_summaries(
+                    db, expense_data.group_id
                 )
             else:
                 debt_summary = reconcile_single_expense(
-                    db, debts, expense_data.group_id
+                    db, ledger_debts, expense_data.group_id
+                )
+                bump_ledger_versions(
+                    db, [expense_data.payer_id, *expense_data.participants]
                 )
 
             # Log activity
@@ -1187,7 +1568,7 @@ def update_expense(
                 timestamp=datetime.utcnow(),
                 activity_type=ActivityTypes.UPDATED_EXPENSE,
             )
-            db.add(activity)
+            db.add_all(deliver(activity))
 
             # Commit happens automatically when the context manager exits
             return {
@@ -1224,38 +1605,45 @@ def delete_expense(expense_id: int, user_id: int, db: Session = Depends(get_sess
             .all()
         )
 
-        # Handle debt reconciliation before deleting the expense
-        expense_data = ExpenseData(
-            user_id=user.id,
-            amount=expense.amount,
-            description=expense.description,
-            currency=expense.currency,
-            payer_id=expense.paid_by_id,
-            group_id=expense.group_id,
-            participants=[link.user_id for link in participant_links],
-        )
-        debts = calculate_debts(expense_data)
-        adjusted_debts = provide_expense_adjustments(expense_data, db)
-
-        if expense_data.group_id:
-            all_expenses = (
-                db.query(Expense)
-                .filter(
-                    Expense.group_id == expense_data.group_id, Expense.id != expense_id
-                )
-                .all()
-            )
-            _ = reconcile_all_group_debts(
-                db, all_expenses, expense_data.group_id, adjusted_debts
+        # Handle debt reconciliation before deleting the expense, reversing
+        # exactly the shares that were stored for it
+        if expense.group_id:
+            ledger.ensure_group_ledger(db, expense.group_id)
+            ledger.invalidate_checkpoints(db, expense.group_id, expense_id)
+            ledger.apply_expense(
+                db,
+                expense.group_id,
+                expense.paid_by_id,
+                [(link.user_id, link.ledger_amount) for link in participant_links],
+                sign=-1,
             )
+            _ = ledger.refresh_group_debt_summaries(db, expense.group_id)
         else:
-            _ = reconcile_single_expense_delete(db, debts, expense_data.group_id)
+            debts = [
+                (link.user_id, expense.paid_by_id, link.ledger_amount)
+                for link in participant_links
+            ]
+            _ = reconcile_single_expense_delete(db, debts, expense.group_id)
+            bump_ledger_versions(
+                db, [expense.paid_by_id, *(link.user_id for link in participant_links)]
+            )
+        bump_group_versions(db, [expense.group_id])
 
         # Step 4: Delete the participant links
         for link in participant_links:
             db.delete(link)
 
-        # Step 5: Update related activities to set expense_id to None
+        # Step 5: Update related activities to set expense_id to None, moving
+        # them from their authors' feeds to the deleting user's
+        db.exec(
+            update(ActivityInbox)
+            .where(
+                ActivityInbox.activity_id.in_(
+                    select(Activity.id).where(Activity.expense_id == expense_id)
+                )
+            )
+            .values(user_id=user_id)
+        )
         db.query(Activity).filter(Activity.expense_id == expense_id).update(
             {
                 "expense_id": None,
@@ -1283,6 +1671,7 @@ class GroupCreateRequest(BaseModel):
     user_id: int
     group_name: str
     participants: List[int]  # List of user IDs participating in the group
+    base_currency: Optional[str] = None  # Defaults to DEFAULT_CURRENCY
 
 
 class GroupGetResponse(BaseModel):
@@ -1297,17 +1686,19 @@ class GroupGetResponse(BaseModel):
     response_model=GroupGetResponse,
 )
 async def get_group(
-    user_id: int, group_id: int, session: Session = Depends(get_session)
+    user_id: int, group_id: int, session: AsyncSession = Depends(get_async_session)
 ):
     data = None
     try:
         query = select(User).where(User.id == user_id)
-        users = session.exec(query).all()
+        users = (await session.exec(query)).all()
         if not users:
             raise HTTPException(status_code=400, detail="Invalid User")
         user = users[0]
         # Step 1: Create the Group
-        group = session.get(Group, group_id)
+        group = await session.get(
+            Group, group_id, options=[selectinload(Group.members)]
+        )
         if not group:
             raise HTTPException(status_code=404, detail="Group not found")
         data = GroupGetResponse(
@@ -1323,48 +1714,58 @@ async def get_group(
 
 @app.post("/groups", status_code=status.HTTP_201_CREATED)
 async def create_group(
-    request: GroupCreateRequest, session: Session = Depends(get_session)
+    request: GroupCreateRequest, session: AsyncSession = Depends(get_async_session)
 ):
     try:
-        query = select(User).where(User.id == request.user_id)
-        users = session.exec(query).all()
-        if not users:
+        # Step 1: Check the requesting user and every participant in one query
+        participants = list(dict.fromkeys(request.participants))
+        names = dict(
+            (
+                await session.exec(
+                    select(User.id, User.name).where(
+                        User.id.in_({request.user_id, *participants})
+                    )
+                )
+            ).all()
+        )
+        if request.user_id not in names:
             raise HTTPException(status_code=400, detail="Invalid User")
-        user = users[0]
-        # Step 1: Create the Group
-        new_group = Group(name=request.group_name)
+        if not names.keys() >= set(participants):
+            raise HTTPException(status_code=400, detail=f"Participant not found")
+
+        # Step 2: Create the Group
+        new_group = Group(
+            name=request.group_name,
+            base_currency=(request.base_currency or settings.DEFAULT_CURRENCY).upper(),
+        )
         session.add(new_group)
-        session.flush()
-        # Step 2: Add Participants to UserGroupLink
-        user_group_links = []
-        activity_links = []
-        for user_id in request.participants:
-            # Check if the user exists
-            result = session.exec(select(User).where(User.id == user_id)).all()
-            if not result:
-                raise HTTPException(status_code=400, detail=f"Participant not found")
-
-            # Create a link between the user and the group
-            user_group_link = UserGroupLink(user_id=user_id, group_id=new_group.id)
-            user_group_links.append(user_group_link)
-
-            # Step 3: Create Activity Log
-            activity_links.append(
-                Activity(
-                    action=f"New group, {new_group.name} created by {user.name}",
-                    user_id=user_id,
-                    group_id=new_group.id,
-                    activity_type=ActivityTypes.GROUP_CREATED,
-                    timestamp=datetime.utcnow(),
+        await session.flush()
+
+        # Step 3: Link all participants with a single insert
+        if participants:
+            await session.exec(
+                insert(UserGroupLink).values(
+                    [
+                        {"user_id": user_id, "group_id": new_group.id}
+                        for user_id in participants
+                    ]
                 )
             )
-        session.add_all(activity_links)
-        session.add_all(user_group_links)
+
+        # Step 4: Log the creation once, in every participant's feed
+        activity = Activity(
+            action=f"New group, {new_group.name} created by {names[request.user_id]}",
+            user_id=request.user_id,
+            group_id=new_group.id,
+            activity_type=ActivityTypes.GROUP_CREATED,
+            timestamp=datetime.utcnow(),
+        )
+        session.add_all(deliver(activity, participants))
 
         # Commit all changes
-        session.commit()
+        await session.commit()
     except SQLAlchemyError as e:
-        session.rollback()  # Rollback in case of any error
+        await session.rollback()  # Rollback in case of any error
         print(f"Transaction failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to create group")
 
@@ -1373,59 +1774,83 @@ async def create_group(
 
 @app.put("/groups/{group_id}", status_code=status.HTTP_200_OK)
 async def modify_group(
-    group_id: int, request: GroupCreateRequest, session: Session = Depends(get_session)
+    group_id: int,
+    request: GroupCreateRequest,
+    session: AsyncSession = Depends(get_async_session),
 ):
     try:
         # Step 1: Verify that the user making the request exists
         query = select(User).where(User.id == request.user_id)
-        users = session.exec(query).all()
+        users = (await session.exec(query)).all()
         if not users:
             raise HTTPException(status_code=400, detail="Invalid User")
         user = users[0]
 
         # Step 2: Get the group to modify
-        group = session.get(Group, group_id)
+        group = await session.get(Group, group_id)
         if not group:
             raise HTTPException(status_code=404, detail="Group not found")
 
-        existing_members = {member.id for member in group.members}
-
-        # Step 3: Delete UserGroupLink associations
-        user_group_links = session.exec(
-            select(UserGroupLink).where(UserGroupLink.group_id == group_id)
-        ).all()
-        for link in user_group_links:
-            session.delete(link)
-
-        # Step 4: Add participants with a get-or-create approach
-        user_group_links = []
-        activity_links = []
-        for user_id in request.participants:
-            # Create a new link if one does not exist
-            user_group_link = UserGroupLink(user_id=user_id, group_id=group.id)
-            user_group_links.append(user_group_link)
-            if user_id in existing_members:
-                continue
-            # Log this addition as an activity
-            activity_links.append(
-                Activity(
-                    action=f"Added participant to group {group.name} by {user.name}",
-                    user_id=user_id,
-                    group_id=group.id,
-                    activity_type=ActivityTypes.UPDATED_GROUP,
-                    timestamp=datetime.utcnow(),
+        # Step 3: Diff the requested membership against the existing links
+        existing_members = set(
+            (
+                await session.exec(
+                    select(UserGroupLink.user_id).where(
+                        UserGroupLink.group_id == group_id
+                    )
+                )
+            ).all()
+        )
+        participants = list(dict.fromkeys(request.participants))
+        added_members = [
+            user_id for user_id in participants if user_id not in existing_members
+        ]
+        removed_members = existing_members - set(participants)
+        if not added_members and not removed_members:
+            return {"group_id": group.id, "message": "Group updated successfully"}
+
+        # Step 4: Check the new participants in one query
+        if added_members:
+            found = (
+                await session.exec(select(User.id).where(User.id.in_(added_members)))
+            ).all()
+            if len(found) < len(added_members):
+                raise HTTPException(status_code=400, detail="Participant not found")
+
+        # Step 5: Apply only the changed links, one bulk statement each way
+        if removed_members:
+            await session.exec(
+                delete(UserGroupLink).where(
+                    UserGroupLink.group_id == group_id,
+                    UserGroupLink.user_id.in_(removed_members),
+                )
+            )
+        if added_members:
+            await session.exec(
+                insert(UserGroupLink).values(
+                    [
+                        {"user_id": user_id, "group_id": group_id}
+                        for user_id in added_members
+                    ]
                 )
             )
 
-        # Step 5: Add all new links and activities to the session
-        session.add_all(activity_links)
-        session.add_all(user_group_links)
+            # Log the additions once, in the feeds of the added participants
+            activity = Activity(
+                action=f"Added participant to group {group.name} by {user.name}",
+                user_id=user.id,
+                group_id=group.id,
+                activity_type=ActivityTypes.UPDATED_GROUP,
+                timestamp=datetime.utcnow(),
+            )
+            session.add_all(deliver(activity, added_members))
+        await session.run_sync(bump_group_versions, [group_id])
 
         # Commit the changes
-        session.commit()
+        await session.commit()
 
     except SQLAlchemyError as e:
-        session.rollback()  # Rollback if there's an error
+        await session.rollback()  # Rollback if there's an error
         print(f"Transaction failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to modify group")
 
@@ -1433,43 +1858,65 @@ async def modify_group(
 
 
 @app.delete("/groups/{group_id}")
-async def delete_group(group_id: int, session: Session = Depends(get_session)):
+async def delete_group(
+    group_id: int, session: AsyncSession = Depends(get_async_session)
+):
     try:
         # Step 1: Fetch the group
-        group = session.get(Group, group_id)
+        group = await session.get(Group, group_id)
         if not group:
             raise HTTPException(status_code=404, detail="Group not found")
 
         # Step 2: Delete UserGroupLink associations
-        user_group_links = session.exec(
-            select(UserGroupLink).where(UserGroupLink.group_id == group_id)
+        user_group_links = (
+            await session.exec(
+                select(UserGroupLink).where(UserGroupLink.group_id == group_id)
+            )
         ).all()
         for link in user_group_links:
-            session.delete(link)
+            await session.delete(link)
 
         # Step 3: Update Activities to set group_id to null
-        activities = session.exec(
-            select(Activity).where(Activity.group_id == group_id)
+        activities = (
+            await session.exec(select(Activity).where(Activity.group_id == group_id))
         ).all()
         for activity in activities:
             activity.group_id = None
             session.add(activity)  # mark as dirty to update the DB
 
         # Delete the group debt summaries
-        group_deby_summaries = session.exec(
-            select(GroupDebtSummary).where(GroupDebtSummary.group_id == group_id)
+        group_deby_summaries = (
+            await session.exec(
+                select(GroupDebtSummary).where(GroupDebtSummary.group_id == group_id)
+            )
         ).all()
         for group_debt_summary in group_deby_summaries:
-            session.delete(group_debt_summary)
+            await session.delete(group_debt_summary)
+        await session.run_sync(
+            apply_debt_changes,
+            group.base_currency,
+            removed=[
+                (debt.debtor_id, debt.creditor_id, debt.amount_owed)
+                for debt in group_deby_summaries
+            ],
+        )
+        await session.exec(
+            delete(GroupBalance).where(GroupBalance.group_id == group_id)
+        )
+        await session.exec(
+            delete(GroupLedgerCheckpoint).where(
+                GroupLedgerCheckpoint.group_id == group_id
+            )
+        )
 
         # Step 5: Delete the Group entry
-        session.delete(group)
+        await session.delete(group)
 
         # Commit all changes
-        session.commit()
+        await session.commit()
 
     except SQLAlchemyError as e:
-        session.rollback()  # Rollback in case of any error
+        await session.rollback()  # Rollback in case of any error
         print(f"Transaction failed: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete group")
 
@@ -1489,9 +1936,11 @@ class SettlementResponse(SQLModel):
 
 @app.get("/api/settlements", response_model=List[SettlementResponse])
 async def list_settlements(
+    response: Response,
     user_id: int = Query(...),
     group_id: Optional[int] = Query(None),
-    session: Session = Depends(get_session),
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_async_session),
 ):
     # Define the query to fetch settlements based on group_id and user_id criteria
     query = select(Settlement).where(
@@ -1504,18 +1953,24 @@ async def list_settlements(
     else:
         query = query.where(Settlement.group_id.is_(None))
 
-    # Add sorting by created_at in descending order
-    query = query.order_by(Settlement.created_at.desc())
+    # Page through settlements by created_at in descending order
+    query = paginate(query, Settlement.created_at, Settlement.id, page)
     # Execute the query
-    settlements = session.exec(query).all()
+    settlements = finish_page(
+        (await session.exec(query)).all(), page, response, "created_at"
+    )
+    names = await session.run_sync(
+        get_user_names,
+        {settlement.creditor_id for settlement in settlements}
+        | {settlement.debtor_id for settlement in settlements},
+    )
     data = []
     for settlement in settlements:
-        creditor_name = session.get(User, settlement.creditor_id).name
-        debtor_name = session.get(User, settlement.debtor_id).name
         data_dict = {
             **settlement.dict(),
-            "creditor_name": creditor_name,
-            "debtor_name": debtor_name,
+            "amount": to_major(settlement.amount),
+            "creditor_name": names.get(settlement.creditor_id, "Unknown"),
+            "debtor_name": names.get(settlement.debtor_id, "Unknown"),
         }
         data.append(SettlementResponse(**data_dict))
     return data
@@ -1523,63 +1978,103 @@ async def list_settlements(
 
 # Endpoint to get detail for a single expenses
 @app.get("/api/expenses/{expense_id}", response_model=ExpenseDetailResponse)
-async def get_expense_detail(expense_id: int, session: Session = Depends(get_session)):
+async def get_expense_detail(
+    expense_id: int, session: AsyncSession = Depends(get_async_session)
+):
     # Fetch expenses for the specified group
-    expense_statement = select(Expense).where(Expense.id == expense_id)
-    expenses = session.exec(expense_statement).all()
+    expense_statement = (
+        select(Expense)
+        .where(Expense.id == expense_id)
+        .options(selectinload(Expense.paid_by))
+    )
+    expenses = (await session.exec(expense_statement)).all()
     if not expenses:
         raise HTTPException(status_code=404, detail="Expense not found")
-    expense = expenses[0]
-    # Build detailed expense information
-
-    # Query ExpenseParticipantLink to get amount owed for each participant
-    participant_links_statement = select(ExpenseParticipantLink).where(
-        ExpenseParticipantLink.expense_id == expense.id
-    )
-    participant_links = session.exec(participant_links_statement).all()
 
-    # Construct participant information with amount owed
-    participants = [
-        {
-            "id": link.user_id,
-            "name": session.get(User, link.user_id).name,
-            "amount_owed": link.amount_owed,
-        }
-        for link in participant_links
-    ]
-
-    # Append detailed expense information
-    expense_data = {
-        "id": expense.id,
-        "amount": expense.amount,
-        "description": expense.description,
-        "paid_by": {
-            "id": expense.paid_by.id,
-            "name": expense.paid_by.name,
-        },
-        "participants": participants,
-        "created_at": expense.created_at,
-    }
-
-    return ExpenseDetailResponse(**expense_data)
+    details = await session.run_sync(build_expense_details, expenses)
+    return ExpenseDetailResponse(**details[0])
 
 
 @app.get("/users/{user_id}/activities", response_model=List[Activity])
 async def get_user_activities(
     user_id: int,
-    session: Session = Depends(get_session),  # Dependency to get the session
+    response: Response,
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    user = session.query(User).filter(User.id == user_id).first()
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    statement = (
+    statement = paginate(
         select(Activity)
-        .where(Activity.user_id == user_id)
-        .order_by(Activity.timestamp.desc())
+        .join(ActivityInbox, ActivityInbox.activity_id == Activity.id)
+        .where(ActivityInbox.user_id == user_id),
+        ActivityInbox.timestamp,
+        ActivityInbox.activity_id,
+        page,
+    )
+    activities = (await session.exec(statement)).all()
+    if len(activities) <= page.limit:
+        # Past the oldest live entry: continue into the archive, which only
+        # holds older entries
+        archive_page = PageParams(
+            cursor=(
+                encode_cursor(activities[-1].timestamp, activities[-1].id)
+                if activities
+                else page.cursor
+            ),
+            limit=page.limit - len(activities),
+        )
+        statement = paginate(
+            select(ActivityArchive)
+            .join(
+                ActivityInboxArchive,
+                ActivityInboxArchive.activity_id == ActivityArchive.id,
+            )
+            .where(ActivityInboxArchive.user_id == user_id),
+            ActivityInboxArchive.timestamp,
+            ActivityInboxArchive.activity_id,
+            archive_page,
+        )
+        activities += [
+            Activity(**archived.dict())
+            for archived in (await session.exec(statement)).all()
+        ]
+    return finish_page(activities, page, response, "timestamp")
+
+
+@app.get("/users/{user_id}/activities/stream")
+async def stream_user_activities(
+    user_id: int,
+    request: Request,
+    last_event_id: Optional[int] = Query(
+        None,
+        description="Resume after this activity id (else the Last-Event-ID header)",
+    ),
+):
+    """
+    Server-Sent Events stream of new activities of the user and of their groups.
+    Each event's id is the activity id; reconnecting with Last-Event-ID resumes
+    right after it, and without one the stream starts from the latest activity.
+    """
+    if last_event_id is None and request.headers.get("last-event-id"):
+        try:
+            last_event_id = int(request.headers["last-event-id"])
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    # Not a session dependency: that would hold a connection for the whole stream
+    async with AsyncSession(async_engine) as session:
+        if not await session.get(User, user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+
+    return StreamingResponse(
+        stream_activities(async_engine, user_id, last_event_id),
+        media_type="text/event-stream",
+        # Keep proxies from caching or buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    activities = session.exec(statement)
-    return activities.all()
 
 
 class TagCreateRequest(BaseModel):
@@ -1589,20 +2084,20 @@ class TagCreateRequest(BaseModel):
 
 @app.post("/api/tags/", response_model=Tag)
 async def create_tag(
-    request: TagCreateRequest, session: Session = Depends(get_session)
+    request: TagCreateRequest, session: AsyncSession = Depends(get_async_session)
 ):
     tag_name = request.tag_name
     user_id = request.user_id
     statement = select(Tag).where(Tag.name == tag_name, Tag.user_id == user_id)
-    existing_tag = session.exec(statement).first()
+    existing_tag = (await session.exec(statement)).first()
 
     if existing_tag:
         raise HTTPException(status_code=400, detail="Tag already exists for this user.")
 
     tag = Tag(name=tag_name, user_id=user_id)
     session.add(tag)
-    session.commit()
-    session.refresh(tag)
+    await session.commit()
+    await session.refresh(tag)
 
     return tag
 
@@ -1611,34 +2106,33 @@ from sqlalchemy.sql import func
 
 
 @app.get("/api/tags/{user_id}")
-async def list_tags(user_id: int, session: Session = Depends(get_session)):
+async def list_tags(user_id: int, session: AsyncSession = Depends(get_async_session)):
     """
     List tags for a user, ordered by the latest associated expense date.
     Includes the total amount of expenses for each tag.
     """
-    # Query to fetch tags with total amount and latest expense date
+    # Totals and latest expense dates come from the monthly rollups, one row
+    # per tag and month, instead of every expense
     statement = (
         select(
             Tag,
-            func.coalesce(func.sum(SelfManagementExpense.amount), 0).label(
+            func.coalesce(func.sum(TagMonthlySpend.total_amount), 0).label(
                 "total_amount"
             ),
             func.coalesce(
-                func.max(SelfManagementExpense.created_at), datetime.min
+                func.max(TagMonthlySpend.latest_expense_at), datetime.min
             ).label("latest_expense_date"),
         )
-        .join(
-            SelfManagementExpense, Tag.id == SelfManagementExpense.tag_id, isouter=True
-        )
+        .join(TagMonthlySpend, Tag.id == TagMonthlySpend.tag_id, isouter=True)
         .where(Tag.user_id == user_id)
         .group_by(Tag.id)
         .order_by(
             func.coalesce(
-                func.max(SelfManagementExpense.created_at), datetime.min
+                func.max(TagMonthlySpend.latest_expense_at), datetime.min
             ).desc()
         )
     )
-    results = session.exec(statement).all()
+    results = (await session.exec(statement)).all()
 
     # Combine tag data with total amounts and latest expense date
     tags_with_totals = [
@@ -1646,7 +2140,7 @@ async def list_tags(user_id: int, session: Session = Depends(get_session)):
             "id": tag.id,
             "name": tag.name,
             "user_id": tag.user_id,
-            "total_amount": total_amount,
+            "total_amount": to_major(total_amount),
         }
         for tag, total_amount, _ in results
     ]
@@ -1654,6 +2148,81 @@ async def list_tags(user_id: int, session: Session = Depends(get_session)):
     return tags_with_totals
 
 
+class MonthlySpend(BaseModel):
+    month: date
+    total_amount: float
+    expense_count: int
+
+
+class TagSpendSummary(BaseModel):
+    tag_id: int
+    name: str
+    total_amount: float
+    expense_count: int
+    months: List[MonthlySpend]  # Oldest first
+
+
+class SpendSummaryResponse(BaseModel):
+    total_amount: float
+    tags: List[TagSpendSummary]  # Highest spend first
+    months: List[MonthlySpend]  # All tags together, oldest first
+
+
+@app.get("/api/tags/{user_id}/summary", response_model=SpendSummaryResponse)
+async def get_spend_summary(
+    user_id: int,
+    from_month: Optional[date] = Query(None, description="First month (any day in it)"),
+    to_month: Optional[date] = Query(None, description="Last month (any day in it)"),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Self-expense spend per tag and per month, read from the monthly rollups in
+    O(tags x months) regardless of the number of expenses.
+    """
+    rollups = await session.run_sync(
+        tag_rollups.monthly_spend, user_id, from_month, to_month
+    )
+    names = dict(
+        (
+            await session.exec(select(Tag.id, Tag.name).where(Tag.user_id == user_id))
+        ).all()
+    )
+
+    by_tag = defaultdict(list)
+    by_month = defaultdict(lambda: [0, 0])
+    for rollup in rollups:
+        by_tag[rollup.tag_id].append(rollup)
+        by_month[rollup.month][0] += rollup.total_amount
+        by_month[rollup.month][1] += rollup.expense_count
+
+    tags = [
+        TagSpendSummary(
+            tag_id=tag_id,
+            name=names.get(tag_id, ""),
+            total_amount=to_major(sum(rollup.total_amount for rollup in months)),
+            expense_count=sum(rollup.expense_count for rollup in months),
+            months=[
+                MonthlySpend(
+                    month=rollup.month,
+                    total_amount=to_major(rollup.total_amount),
+                    expense_count=rollup.expense_count,
+                )
+                for rollup in months
+            ],
+        )
+        for tag_id, months in by_tag.items()
+    ]
+    tags.sort(key=lambda tag: (-tag.total_amount, tag.tag_id))
+    return SpendSummaryResponse(
+        total_amount=to_major(sum(total for total, _ in by_month.values())),
+        tags=tags,
+        months=[
+            MonthlySpend(month=month, total_amount=to_major(total), expense_count=count)
+            for month, (total, count) in sorted(by_month.items())
+        ],
+    )
+
+
 @app.delete("/api/tags/{tag_id}", status_code=204)
 def delete_tag(
     tag_id: int, user_id: int = Query(...), session: Session = Depends(get_session)
@@ -1687,9 +2256,10 @@ def delete_tag(
                 .values(self_expense_id=None)
             )
 
-        # Delete associated expenses
+        # Delete associated expenses and their monthly rollups
         for expense in associated_expenses:
             session.delete(expense)
+        tag_rollups.delete_tag_rollups(session, tag_id)
 
         # Delete the tag
         session.delete(tag)
@@ -1701,8 +2271,6 @@ def delete_tag(
         )
 
 
-
-
 class SelfExpenseCreateRequest(BaseModel):
     amount: float
     user_id: int
@@ -1713,10 +2281,10 @@ class SelfExpenseCreateRequest(BaseModel):
 @app.post("/api/self-expenses/", response_model=SelfManagementExpense)
 async def create_self_expense(
     request: SelfExpenseCreateRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     # Validate the tag
-    tag = session.get(Tag, request.tag_id)
+    tag = await session.get(Tag, request.tag_id)
     if not tag or tag.user_id != request.user_id:
         raise HTTPException(status_code=400, detail="Invalid or unauthorized tag.")
 
@@ -1728,8 +2296,16 @@ async def create_self_expense(
         tag_id=request.tag_id,
     )
     session.add(expense)
-    session.commit()
-    session.refresh(expense)
+    await session.run_sync(
+        tag_rollups.apply_spend,
+        expense.user_id,
+        expense.tag_id,
+        expense.created_at,
+        to_minor(expense.amount),
+        1,
+    )
+    await session.commit()
+    await session.refresh(expense)
 
     # Log activity
     activity = Activity(
@@ -1738,9 +2314,9 @@ async def create_self_expense(
         self_expense_id=expense.id,
         activity_type=ActivityTypes.CREATED_EXPENSE,
     )
-    session.add(activity)
-    session.commit()
-    session.refresh(activity)
+    session.add_all(deliver(activity))
+    await session.commit()
+    await session.refresh(activity)
 
     return expense
 
@@ -1749,10 +2325,10 @@ async def create_self_expense(
 async def update_self_expense(
     expense_id: int,
     request: SelfExpenseCreateRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     # Fetch the expense
-    expense = session.get(SelfManagementExpense, expense_id)
+    expense = await session.get(SelfManagementExpense, expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found.")
 
@@ -1764,14 +2340,22 @@ async def update_self_expense(
 
     # Update fields if provided
     if request.amount is not None:
+        await session.run_sync(
+            tag_rollups.apply_spend,
+            expense.user_id,
+            expense.tag_id,
+            expense.created_at,
+            to_minor(request.amount) - to_minor(expense.amount),
+            0,
+        )
         expense.amount = request.amount
     if request.description is not None:
         expense.description = request.description
 
     # Commit changes
     session.add(expense)
-    session.commit()
-    session.refresh(expense)
+    await session.commit()
+    await session.refresh(expense)
 
     # Log activity
     activity = Activity(
@@ -1780,28 +2364,115 @@ async def update_self_expense(
         self_expense_id=expense.id,
         activity_type=ActivityTypes.UPDATED_EXPENSE,
     )
-    session.add(activity)
-    session.commit()
-    session.refresh(activity)
+    session.add_all(deliver(activity))
+    await session.commit()
+    await session.refresh(activity)
 
     return expense
 
 
+def self_expense_filters(
+    user_id: int,
+    from_date: Optional[date] = Query(
+        None, alias="from", description="Only expenses on or after this day"
+    ),
+    to_date: Optional[date] = Query(
+        None, alias="to", description="Only expenses on or before this day"
+    ),
+    tag_id: Optional[int] = Query(None, description="Only expenses with this tag"),
+) -> list:
+    """
+    Conditions selecting a user's self-expenses in a day range, served by the
+    (user_id, created_at, id) index.
+    """
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'.")
+    conditions = [SelfManagementExpense.user_id == user_id]
+    if from_date:
+        conditions.append(
+            SelfManagementExpense.created_at
+            >= datetime.combine(from_date, datetime.min.time())
+        )
+    if to_date:
+        conditions.append(
+            SelfManagementExpense.created_at
+            < datetime.combine(to_date + timedelta(days=1), datetime.min.time())
+        )
+    if tag_id is not None:
+        conditions.append(SelfManagementExpense.tag_id == tag_id)
+    return conditions
+
+
 @app.get("/api/self-expenses/{user_id}/", response_model=List[SelfManagementExpense])
-async def list_self_expenses(user_id: int, session: Session = Depends(get_session)):
-    cursor = select(SelfManagementExpense).where(
-        SelfManagementExpense.user_id == user_id
+async def list_self_expenses(
+    user_id: int,
+    response: Response,
+    conditions: list = Depends(self_expense_filters),
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    List a user's self-management expenses, newest first, one page at a time,
+    optionally only those between two days or with one tag.
+    """
+    cursor = paginate(
+        select(SelfManagementExpense).where(*conditions),
+        SelfManagementExpense.created_at,
+        SelfManagementExpense.id,
+        page,
+    )
+    expenses = (await session.exec(cursor)).all()
+    return finish_page(expenses, page, response, "created_at")
+
+
+SELF_EXPENSE_EXPORT_COLUMNS = (
+    "id",
+    "created_at",
+    "amount",
+    "description",
+    "tag_id",
+    "tag",
+)
+
+
+@app.get("/api/self-expenses/{user_id}/export")
+def export_self_expenses(
+    user_id: int,
+    format: Literal[EXPORT_FORMATS] = Query("csv", description="csv or ndjson"),
+    conditions: list = Depends(self_expense_filters),
+):
+    """
+    Stream a user's self-management expenses, oldest first, as CSV or NDJSON,
+    with the same filters as the list. Rows are read from a server-side cursor
+    in batches, so memory stays flat however long the history is.
+    """
+    statement = (
+        select(
+            SelfManagementExpense.id,
+            SelfManagementExpense.created_at,
+            SelfManagementExpense.amount,
+            SelfManagementExpense.description,
+            SelfManagementExpense.tag_id,
+            Tag.name.label("tag"),
+        )
+        .join(Tag, Tag.id == SelfManagementExpense.tag_id)
+        .where(*conditions)
+        .order_by(SelfManagementExpense.created_at, SelfManagementExpense.id)
+    )
+    return export_response(
+        stream_rows(engine, statement),
+        SELF_EXPENSE_EXPORT_COLUMNS,
+        format,
+        f"self-expenses-{user_id}",
     )
-    expenses = session.exec(cursor).all()
-    return expenses
 
 
 @app.delete("/api/self-expenses/{expense_id}", status_code=204)
 async def delete_self_expense(
-    expense_id: int, user_id: int, session: Session = Depends(get_session)
+    expense_id: int, user_id: int, session: AsyncSession = Depends(get_async_session)
 ):
     # Fetch the expense
-    expense = session.get(SelfManagementExpense, expense_id)
+    expense = await session.get(SelfManagementExpense, expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found.")
 
@@ -1812,28 +2483,44 @@ async def delete_self_expense(
         )
 
     # Update associated activities
-    session.query(Activity).filter(Activity.self_expense_id == expense_id).update(
-        {"self_expense_id": None}
+    await session.exec(
+        update(Activity)
+        .where(Activity.self_expense_id == expense_id)
+        .values(self_expense_id=None)
     )
 
-    # Delete the expense
-    session.delete(expense)
-    session.commit()
+    # Delete the expense and take it out of its monthly rollup
+    await session.delete(expense)
+    await session.run_sync(
+        tag_rollups.apply_spend,
+        expense.user_id,
+        expense.tag_id,
+        expense.created_at,
+        -to_minor(expense.amount),
+        -1,
+    )
+    await session.commit()
 
 
 @app.get("/api/tags/{tag_id}/expenses", response_model=List[SelfManagementExpense])
 async def list_self_expenses_by_tag(
-    tag_id: int, session: Session = Depends(get_session)
+    tag_id: int,
+    response: Response,
+    page: PageParams = Depends(page_params),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """
-    List self-management expenses for a given tag.
+    List self-management expenses for a given tag, newest first, one page at a time.
     """
-    cursor = (
-        select(SelfManagementExpense)
-        .where(SelfManagementExpense.tag_id == tag_id)
-        .order_by(SelfManagementExpense.created_at.desc())
+    cursor = paginate(
+        select(SelfManagementExpense).where(SelfManagementExpense.tag_id == tag_id),
+        SelfManagementExpense.created_at,
+        SelfManagementExpense.id,
+        page,
+    )
+    expenses = finish_page(
+        (await session.exec(cursor)).all(), page, response, "created_at"
     )
-    expenses = session.exec(cursor).all()
 
     if not expenses:
         raise HTTPException(
@@ -1843,4 +2530,16 @@ async def list_self_expenses_by_tag(
     return expenses
 
 
+@app.get("/api/metrics/db-pool")
+def get_db_pool_metrics():
+    """
+    Connection pool checkouts, wait times and connection churn per engine
+    since the worker started, for sizing DB_POOL_* from real traffic.
+    """
+    return {
+        "profile": settings.DB_POOL_PROFILE,
+        "engines": {name: metrics.snapshot() for name, metrics in pool_metrics.items()},
+    }
+
+
 handler = Mangum(app)
@@ -0,0 +1,165 @@
+"""
+Compare the Python-loop and NumPy net balance kernels on participant-link rows.
+
+Usage:
+    python -m benchmarks.bench_balances [--rows 1000000] [--users 1000]
+        [--repeat 3] [--no-db]
+
+Both kernels start from (debtor, creditor, amount) rows, so the timings include
+turning rows into columns. The in-memory run uses synthetic rows. The database
+run seeds one group with --rows participant links, then times the fetch, both
+kernels on the fetched rows, and a full `ledger.replay_group_balances`. Needs NumPy (the "fast" extra).
+"""
+
+from benchmarks.common import (  # isort: split -- points DATABASE_URL at the bench db
+    reset_database,
+    seed_users,
+)
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app.core import balance_kernel, ledger
+from app.db.database import engine
+from app.db.models import Expense, ExpenseParticipantLink, Group
+
+PARTICIPANTS_PER_EXPENSE = 4
+
+
+def make_rows(rows: int, users: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [
+        (
+            rng.randrange(1, users + 1),
+            rng.randrange(1, users + 1),
+            rng.randint(100, 500_000),
+        )
+        for _ in range(rows)
+    ]
+
+
+def loop_kernel(rows):
+    """The per-row Python accumulation the ledger used before the kernel."""
+    return balance_kernel._net_balances_loop(
+        [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows]
+    )
+
+
+def numpy_kernel(rows):
+    return balance_kernel._net_balances_numpy(*balance_kernel.to_columns(rows))
+
+
+def best_of(repeat: int, fn, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def seed_group_links(rows: int, users: int, seed: int = 42) -> int:
+    """One group whose expenses have `rows` participant links in total."""
+    reset_database()
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        user_ids = seed_users(session, users)
+        group = Group(name="Balance bench")
+        session.add(group)
+        session.flush()
+        expenses = rows // PARTICIPANTS_PER_EXPENSE
+        payers = [rng.choice(user_ids) for _ in range(expenses)]
+        session.execute(
+            insert(Expense),
+            [
+                {
+                    "amount": 0,
+                    "description": f"Expense {i}",
+                    "currency": "INR",
+                    "created_at": start + timedelta(minutes=i),
+                    "paid_by_id": payer_id,
+                    "group_id": group.id,
+                }
+                for i, payer_id in enumerate(payers)
+            ],
+        )
+        expense_ids = session.exec(
+            select(Expense.id).where(Expense.group_id == group.id).order_by(Expense.id)
+        ).all()
+        links = []
+        for expense_id in expense_ids:
+            for user_id in rng.sample(user_ids, k=PARTICIPANTS_PER_EXPENSE):
+                amount = rng.randint(100, 500_000)
+                links.append(
+                    {
+                        "expense_id": expense_id,
+                        "user_id": user_id,
+                        "amount_owed": amount,
+                        "ledger_amount": amount,
+                    }
+                )
+        session.execute(insert(ExpenseParticipantLink), links)
+        session.commit()
+        return group.id
+
+
+def fetch_rows(group_id: int):
+    with Session(engine) as session:
+        return session.exec(
+            select(
+                ExpenseParticipantLink.user_id,
+                Expense.paid_by_id,
+                ExpenseParticipantLink.ledger_amount,
+            )
+            .join(Expense, Expense.id == ExpenseParticipantLink.expense_id)
+            .where(Expense.group_id == group_id)
+        ).all()
+
+
+def replay(group_id: int):
+    with Session(engine) as session:
+        return ledger.replay_group_balances(session, group_id)
+
+
+def report(label: str, loop_s: float, numpy_s: float):
+    print(f"{label:<10} {loop_s:>10.3f} {numpy_s:>10.3f} {loop_s / numpy_s:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-db", action="store_true", help="Skip the database run")
+    args = parser.parse_args()
+    assert balance_kernel.np is not None, "NumPy is required: install the fast extra"
+
+    print(f"{args.rows} rows, {args.users} users")
+    print(f"{'input':<10} {'loop s':>10} {'numpy s':>10} {'speedup':>10}")
+    rows = make_rows(args.rows, args.users)
+    loop_s, expected = best_of(args.repeat, loop_kernel, rows)
+    numpy_s, actual = best_of(args.repeat, numpy_kernel, rows)
+    assert actual == expected, "kernels disagree"
+    report("memory", loop_s, numpy_s)
+
+    if args.no_db:
+        return
+    group_id = seed_group_links(args.rows, args.users)
+    fetch_s, rows = best_of(1, fetch_rows, group_id)
+    loop_s, expected = best_of(args.repeat, loop_kernel, rows)
+    numpy_s, actual = best_of(args.repeat, numpy_kernel, rows)
+    assert actual == expected, "kernels disagree"
+    report("database", loop_s, numpy_s)
+    replay_s, balances = best_of(1, replay, group_id)
+    assert {user: amount for user, amount in balances.items() if amount} == actual
+    print(f"fetch {fetch_s:.3f}s, full replay_group_balances {replay_s:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
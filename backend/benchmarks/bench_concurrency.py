@@ -0,0 +1,166 @@
+"""
+Measure throughput of the expense list endpoint under concurrent clients,
+comparing the previous handler (an `async def` route running a blocking
+Session on the event loop) with the AsyncSession handler.
+
+Usage:
+    python -m benchmarks.bench_concurrency [--clients 100] [--requests 5] [--latency-ms 5]
+
+Network latency to the database is simulated inside the DBAPI cursor, so the
+blocking driver stalls the event loop for it while aiosqlite waits in its
+worker thread, as a remote MySQL connection would with mysqlconnector/aiomysql.
+"""
+
+from benchmarks.common import (  # isort: split -- points DATABASE_URL at the bench db
+    BENCH_DB_PATH,
+    reset_database,
+    seed_group,
+    seed_users,
+)
+
+import argparse
+import asyncio
+import sqlite3
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.database import engine
+from app.db.models import Expense
+from app.main import app, build_expense_details, get_async_session
+
+LATENCY_SECONDS = 0.005
+
+
+class SlowCursor(sqlite3.Cursor):
+    def execute(self, *args, **kwargs):
+        time.sleep(LATENCY_SECONDS)
+        return super().execute(*args, **kwargs)
+
+
+class SlowConnection(sqlite3.Connection):
+    def cursor(self, factory=SlowCursor):
+        return super().cursor(factory)
+
+
+def make_engines(pool_size: int):
+    connect_args = {"factory": SlowConnection, "check_same_thread": False}
+    sync_engine = create_engine(
+        f"sqlite:///{BENCH_DB_PATH}", connect_args=connect_args, pool_size=pool_size
+    )
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{BENCH_DB_PATH}",
+        connect_args=connect_args,
+        pool_size=pool_size,
+    )
+    return sync_engine, async_engine
+
+
+def blocking_app(sync_engine) -> FastAPI:
+    """The expense list handler as it was before the async session."""
+    before = FastAPI()
+
+    def get_blocking_session():
+        with Session(sync_engine) as session:
+            yield session
+
+    @before.get("/api/groups/{group_id}/expenses")
+    async def get_group_expenses(
+        group_id: int, session: Session = Depends(get_blocking_session)
+    ):
+        expenses = session.exec(
+            select(Expense)
+            .where(Expense.group_id == group_id)
+            .order_by(Expense.created_at.desc(), Expense.id.desc())
+            .limit(50)
+        ).all()
+        return build_expense_details(session, expenses)
+
+    return before
+
+
+async def run_clients(asgi_app, url: str, clients: int, requests: int):
+    latencies = []
+
+    async def client_task(client):
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_task(client) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies
+
+
+def report(name: str, elapsed: float, latencies: list):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:<10} {len(latencies) / elapsed:>10.1f} "
+        f"{statistics.median(latencies) * 1000:>10.1f} {p95 * 1000:>10.1f}"
+    )
+
+
+def main():
+    global LATENCY_SECONDS
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--expenses", type=int, default=200)
+    args = parser.parse_args()
+    LATENCY_SECONDS = args.latency_ms / 1000
+
+    reset_database()
+    with Session(engine) as session:
+        group_id = seed_group(session, seed_users(session, 10), args.expenses)
+        session.commit()
+
+    sync_engine, async_engine = make_engines(pool_size=args.clients)
+
+    async def get_slow_async_session():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = get_slow_async_session
+    url = f"/api/groups/{group_id}/expenses?limit=50"
+
+    print(
+        f"{args.clients} clients x {args.requests} requests, "
+        f"{args.latency_ms} ms simulated latency per statement"
+    )
+    print(f"{'handler':<10} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10}")
+
+    async def bench():
+        # One event loop for both runs: aiosqlite connections are bound to it
+        for name, asgi_app in (
+            ("blocking", blocking_app(sync_engine)),
+            ("async", app),
+        ):
+            elapsed, latencies = await run_clients(
+                asgi_app, url, args.clients, args.requests
+            )
+            report(name, elapsed, latencies)
+        await async_engine.dispose()
+
+    try:
+        asyncio.run(bench())
+    finally:
+        app.dependency_overrides.clear()
+        sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Latency and SQL statement count of the API routes against seeded synthetic data.
+
+Usage:
+    python -m benchmarks.bench_endpoints [--users 200] [--groups 20] [--members 8]
+        [--expenses 500] [--settlements 50] [--iterations 50] [--only ROUTE ...]
+        [--json results.json] [--compare baseline.json]
+
+Every run rebuilds the database from a fixed seed, so numbers are comparable
+across runs. Routes are driven in-process through `app`. Set DATABASE_URL to a
+local MySQL database to benchmark against MySQL (its tables are dropped).
+"""
+
+from benchmarks.common import (  # isort: split -- points DATABASE_URL at the bench db
+    count_queries,
+    reset_database,
+    seed_expenses,
+    seed_group,
+    seed_settlements,
+    seed_users,
+)
+
+import argparse
+import json
+import math
+import random
+import statistics
+import time
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core import ledger
+from app.core.activity_inbox import deliver
+from app.db.database import engine
+from app.db.models import Activity, ActivityTypes, Expense, Friendship, GroupDebtSummary
+from app.main import app
+
+
+def seed(args) -> dict:
+    """Build the dataset and return the ids the routes are driven with."""
+    reset_database()
+    rng = random.Random(7)
+    with Session(engine) as session:
+        user_ids = seed_users(session, args.users)
+        group_members = []
+        for i in range(args.groups):
+            members = rng.sample(user_ids, k=min(args.members, len(user_ids)))
+            group_id = seed_group(
+                session, members, args.expenses, name=f"Group {i}", seed=i
+            )
+            seed_settlements(
+                session, members, args.settlements, group_id=group_id, seed=i
+            )
+            group_members.append((group_id, members))
+        seed_expenses(session, user_ids, args.expenses, seed=args.groups)
+
+        session.add_all(
+            Friendship(user_id=user_id, friend_id=friend_id)
+            for user_id in user_ids
+            for friend_id in rng.sample(user_ids, k=min(10, len(user_ids)))
+            if friend_id != user_id
+        )
+        session.add_all(
+            entry
+            for expense_id, paid_by_id, group_id, created_at in session.exec(
+                select(
+                    Expense.id, Expense.paid_by_id, Expense.group_id, Expense.created_at
+                )
+            )
+            for entry in deliver(
+                Activity(
+                    action=f"Created expense {expense_id}",
+                    user_id=paid_by_id,
+                    expense_id=expense_id,
+                    group_id=group_id,
+                    activity_type=ActivityTypes.CREATED_EXPENSE,
+                    timestamp=created_at,
+                )
+            )
+        )
+        for group_id, _ in group_members:
+            ledger.reconcile_all_group_debts(session, group_id)
+        session.commit()
+
+        group_id, members = group_members[0]
+        expense_id = session.exec(
+            select(Expense.id).where(Expense.group_id == group_id).limit(1)
+        ).one()
+    return {
+        "user_id": members[0],
+        "group_id": group_id,
+        "members": members,
+        "expense_id": expense_id,
+    }
+
+
+def open_debt(group_id: int):
+    with Session(engine) as session:
+        return session.exec(
+            select(GroupDebtSummary)
+            .where(GroupDebtSummary.group_id == group_id)
+            .order_by(GroupDebtSummary.amount_owed.desc())
+            .limit(1)
+        ).first()
+
+
+def routes(ids: dict) -> dict:
+    """Route name -> callable returning (method, url, json body) for one call."""
+    user_id, group_id, members = ids["user_id"], ids["group_id"], ids["members"]
+    expense = {
+        "user_id": user_id,
+        "amount": 120.0,
+        "description": "Bench expense",
+        "currency": "INR",
+        "payer_id": user_id,
+        "group_id": group_id,
+        "participants": members,
+    }
+
+    def settle():
+        debt = open_debt(group_id)
+        return (
+            "POST",
+            "/settle-up",
+            {
+                "user_id": debt.debtor_id,
+                "group_id": group_id,
+                "debtor_id": debt.debtor_id,
+                "creditor_id": debt.creditor_id,
+                "settle_up_amount": 0.01,
+            },
+        )
+
+    return {
+        "get_friend_debt_summary": lambda: (
+            "GET",
+            f"/expense-summary/{user_id}",
+            None,
+        ),
+        "get_group_debts": lambda: (
+            "GET",
+            f"/api/groups/debts?user_id={user_id}",
+            None,
+        ),
+        "get_group_debt_summary": lambda: (
+            "GET",
+            f"/api/group/debts?group_id={group_id}&user_id={user_id}",
+            None,
+        ),
+        "get_group_expenses": lambda: (
+            "GET",
+            f"/api/groups/{group_id}/expenses",
+            None,
+        ),
+        "get_untagged_expenses": lambda: (
+            "GET",
+            f"/api/expenses/untagged?user_id={user_id}",
+            None,
+        ),
+        "get_expense_detail": lambda: (
+            "GET",
+            f"/api/expenses/{ids['expense_id']}",
+            None,
+        ),
+        "get_group": lambda: ("GET", f"/groups/{group_id}?user_id={user_id}", None),
+        "list_groups": lambda: ("GET", f"/api/groups/{user_id}", None),
+        "get_friends": lambda: ("GET", f"/api/friends/{user_id}", None),
+        "search_users": lambda: (
+            "GET",
+            f"/users/search?term=user%201&user_id={user_id}",
+            None,
+        ),
+        "list_settlements": lambda: (
+            "GET",
+            f"/api/settlements?user_id={user_id}&group_id={group_id}",
+            None,
+        ),
+        "get_user_activities": lambda: ("GET", f"/users/{user_id}/activities", None),
+        "create_expense": lambda: ("POST", "/expenses", expense),
+        "update_expense": lambda: ("PUT", f"/expenses/{ids['expense_id']}", expense),
+        "settle_debt": settle,
+    }
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def run_route(client: TestClient, make_call, iterations: int, warmup: int) -> dict:
+    latencies, queries = [], []
+    for i in range(warmup + iterations):
+        method, url, body = make_call()
+        with count_queries() as counter:
+            start = time.perf_counter()
+            response = client.request(method, url, json=body)
+            elapsed = time.perf_counter() - start
+        assert response.status_code < 400, f"{method} {url}: {response.text}"
+        if i >= warmup:
+            latencies.append(elapsed * 1000)
+            queries.append(counter.count)
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "queries": statistics.median(queries),
+        "max_queries": max(queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--members", type=int, default=8)
+    parser.add_argument("--expenses", type=int, default=500, help="per group")
+    parser.add_argument("--settlements", type=int, default=50, help="per group")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--only", nargs="+", help="route names to run")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="baseline results file to diff against")
+    args = parser.parse_args()
+
+    ids = seed(args)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["routes"]
+
+    print(
+        f"{args.users} users, {args.groups} groups x {args.members} members, "
+        f"{args.expenses} expenses and {args.settlements} settlements per group"
+    )
+    print(
+        f"{'route':<26} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'queries':>8} {'p95 vs base':>12}"
+    )
+    results = {}
+    with TestClient(app) as client:
+        for name, make_call in routes(ids).items():
+            if args.only and name not in args.only:
+                continue
+            result = results[name] = run_route(
+                client, make_call, args.iterations, args.warmup
+            )
+            change = ""
+            if name in baseline:
+                change = (
+                    f"{(result['p95_ms'] / baseline[name]['p95_ms'] - 1) * 100:+.0f}%"
+                )
+            queries = f"{result['queries']:g}"
+            if result["max_queries"] != result["queries"]:
+                queries += f"-{result['max_queries']}"
+            print(
+                f"{name:<26} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                f"{result['p99_ms']:>8.2f} {queries:>8} {change:>12}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"params": vars(args), "routes": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare the native greedy settlement engine with the PuLP LP strategy.
+
+Usage:
+    python -m benchmarks.bench_settlement [--sizes 10 100 1000] [--lp-limit 100]
+
+The LP builds n^2 variables, so sizes above --lp-limit skip it unless raised.
+"""
+
+import argparse
+import random
+import time
+
+from app.core.money import split_evenly
+from app.core.settlement import net_balances, reconcile_debts
+
+
+def make_debts(members: int, expenses: int, seed: int = 42):
+    rng = random.Random(seed)
+    debts = []
+    for _ in range(expenses):
+        payer = rng.randrange(members)
+        participants = rng.sample(range(members), k=min(members, rng.randint(2, 6)))
+        amount = rng.randint(1_000, 500_000)  # minor units
+        for participant, share in zip(
+            participants, split_evenly(amount, len(participants))
+        ):
+            if participant != payer:
+                debts.append((participant, payer, share))
+    return debts
+
+
+def check(debts, transfers):
+    expected = net_balances(debts)
+    actual = net_balances((d, c, -a) for d, c, a in transfers)
+    # Settling must move exactly the opposite of every net balance
+    assert {u: -b for u, b in actual.items()} == expected, "transfers do not settle"
+
+
+def run(strategy, debts):
+    start = time.perf_counter()
+    transfers = reconcile_debts(debts, strategy=strategy)
+    elapsed = time.perf_counter() - start
+    check(debts, transfers)
+    return elapsed, len(transfers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--lp-limit", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'members':>8} {'engine':>7} {'seconds':>10} {'transfers':>10}")
+    for members in args.sizes:
+        debts = make_debts(members, expenses=members * 5)
+        for strategy in ("greedy", "lp"):
+            if strategy == "lp" and members > args.lp_limit:
+                print(f"{members:>8} {strategy:>7} {'skipped':>10} {'-':>10}")
+                continue
+            elapsed, count = run(strategy, debts)
+            print(f"{members:>8} {strategy:>7} {elapsed:>10.4f} {count:>10}")
+
+
+if __name__ == "__main__":
+    main()
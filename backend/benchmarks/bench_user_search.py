@@ -0,0 +1,91 @@
+"""
+Time /users/search against the old unbounded `ILIKE '%term%'` scan as the user
+table grows.
+
+Usage:
+    python -m benchmarks.bench_user_search [--sizes 1000 10000 100000]
+        [--repeat 20]
+
+For each size the user table is rebuilt, then typeahead terms (a name prefix,
+an exact email, a rare substring) are searched both ways. Timings are the median
+per search in milliseconds.
+"""
+
+from benchmarks.common import (  # isort: split -- points DATABASE_URL at the bench db
+    reset_database,
+    seed_users,
+)
+
+import argparse
+import statistics
+import time
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.user_search import search_users
+from app.db.database import engine
+from app.db.models import User
+
+
+def search_terms(size: int) -> dict:
+    """Typeahead terms that all match among `size` seeded users (user0, user1, ...)."""
+    return {
+        "name prefix": "user 12",
+        "exact email": f"user{size // 2}@example.com",
+        "substring": "er 99",
+    }
+
+
+def ilike_search(session: Session, term: str, exclude_user_id: int):
+    """The search before the normalized columns: every match, no ranking."""
+    return session.exec(
+        select(User).where(
+            (User.name.ilike(f"%{term}%") | User.email.ilike(f"%{term}%"))
+            & (User.id != exclude_user_id)
+        )
+    ).all()
+
+
+def median_ms(repeat: int, fn, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'term':<12} {'ilike ms':>10} {'indexed ms':>11} {'hits':>6}")
+    for size in args.sizes:
+        reset_database()
+        with Session(engine) as session:
+            seed_users(session, size)
+            session.commit()
+        with Session(engine) as session:
+            for label, term in search_terms(size).items():
+                old_ms = median_ms(args.repeat, ilike_search, session, term, 0)
+                new_ms = median_ms(
+                    args.repeat,
+                    search_users,
+                    session,
+                    term,
+                    0,
+                    settings.USER_SEARCH_LIMIT,
+                )
+                hits = len(search_users(session, term, 0, settings.USER_SEARCH_LIMIT))
+                # A term without matches would time a miss, not its tier
+                assert hits, f"{label} term {term!r} matches none of {size} users"
+                print(
+                    f"{size:>8} {label:<12} {old_ms:>10.2f} {new_ms:>11.2f} {hits:>6}"
+                )
+
+
+if __name__ == "__main__":
+    main()
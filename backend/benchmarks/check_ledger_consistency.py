@@ -0,0 +1,139 @@
+"""
+Assert that a group's running ledger stays consistent when exchange rates are
+reloaded between writes: a foreign-currency expense reverses exactly what it
+applied, replaying the history agrees with the incremental balances, and
+friend balances in different currencies are never added up.
+
+Usage:
+    python -m benchmarks.check_ledger_consistency
+"""
+
+from benchmarks.common import (  # isort: split -- points DATABASE_URL at the bench db
+    reset_database,
+)
+
+import os
+import tempfile
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core import fx, ledger
+from app.db.database import engine
+from app.db.models import FriendBalance, GroupBalance, GroupDebtSummary
+from app.main import app
+
+
+def load_usd_rate(rate: float):
+    """Load today's USD rate; expenses are dated when they are written."""
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+        f.write(f"date,currency,rate\n{datetime.utcnow().date()},USD,{rate}\n")
+    try:
+        with Session(engine) as session:
+            fx.load_rates_csv(session, f.name)
+    finally:
+        os.remove(f.name)
+
+
+def balances(group_id: int) -> dict:
+    with Session(engine) as session:
+        rows = session.exec(
+            select(GroupBalance).where(GroupBalance.group_id == group_id)
+        ).all()
+    return {row.user_id: row.net_amount for row in rows if row.net_amount}
+
+
+def assert_replay_matches(group_id: int):
+    incremental = balances(group_id)
+    with Session(engine) as session:
+        replayed = {
+            user_id: amount
+            for user_id, amount in ledger.replay_group_balances(
+                session, group_id
+            ).items()
+            if amount
+        }
+    assert incremental == replayed, (incremental, replayed)
+
+
+def expense(amount, currency, group_id, participants, description="Dinner"):
+    return {
+        "user_id": 1,
+        "amount": amount,
+        "description": description,
+        "currency": currency,
+        "payer_id": 1,
+        "group_id": group_id,
+        "participants": participants,
+    }
+
+
+def main():
+    reset_database()
+    client = TestClient(app)
+    for name in ("Asha", "Ben", "Chen"):
+        client.post("/auth/google", json={"email": f"{name}@example.com", "name": name})
+    inr_group = client.post(
+        "/groups",
+        json={"user_id": 1, "group_name": "Trip", "participants": [1, 2, 3]},
+    ).json()["group_id"]
+    usd_group = client.post(
+        "/groups",
+        json={
+            "user_id": 1,
+            "group_name": "Road trip",
+            "participants": [1, 2],
+            "base_currency": "USD",
+        },
+    ).json()["group_id"]
+
+    # A 10 USD expense in an INR group, with the rate reloaded before each
+    # later write
+    load_usd_rate(83)
+    response = client.post("/expenses", json=expense(10, "USD", inr_group, [1, 2, 3]))
+    assert response.status_code == 200, response.text
+    expense_id = response.json()["expense_id"]
+    load_usd_rate(84)
+    assert_replay_matches(inr_group)
+
+    response = client.put(
+        f"/expenses/{expense_id}", json=expense(12, "USD", inr_group, [1, 2, 3])
+    )
+    assert response.status_code == 200, response.text
+    load_usd_rate(85)
+    assert_replay_matches(inr_group)
+
+    response = client.delete(f"/expenses/{expense_id}", params={"user_id": 1})
+    assert response.status_code == 200, response.text
+    assert not balances(inr_group), balances(inr_group)
+    with Session(engine) as session:
+        assert not session.exec(select(GroupDebtSummary)).all()
+        assert not session.exec(
+            select(FriendBalance).where(FriendBalance.balance != 0)
+        ).all()
+    print("reversal        OK: deleting after a rate change leaves no balances")
+
+    # Debts with the same friend in two currencies stay separate totals
+    for amount, currency, group_id in (
+        (300, "INR", inr_group),
+        (10, "USD", usd_group),
+    ):
+        response = client.post(
+            "/expenses", json=expense(amount, currency, group_id, [1, 2])
+        )
+        assert response.status_code == 200, response.text
+    summary = client.get("/expense-summary/1", params={"include_groups": True}).json()
+    totals = {(entry["friend_id"], entry["currency"]): entry for entry in summary}
+    assert set(totals) == {(2, "INR"), (2, "USD")}, summary
+    assert totals[(2, "INR")]["amount_owed"] == 150
+    assert totals[(2, "USD")]["amount_owed"] == 5
+    for (_, currency), entry in totals.items():
+        assert all(group["currency"] == currency for group in entry["groups"]), entry
+    print("friend balances OK: one total per currency")
+
+    print("OK: ledgers are consistent across rate changes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Assert that the expense detail endpoints run a fixed number of SQL statements,
+however many expenses and participants they return.
+
+Usage:
+    python -m benchmarks.check_query_counts
+"""
+
+from benchmarks.common import (  # isort: split -- points DATABASE_URL at the bench db
+    count_queries,
+    reset_database,
+    seed_expenses,
+    seed_group,
+    seed_users,
+)
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.db.database import engine
+from app.main import app
+
+SIZES = (5, 50, 500)
+
+
+def seed():
+    groups, untagged_users = {}, {}
+    with Session(engine) as session:
+        member_ids = seed_users(session, 20)
+        for size in SIZES:
+            groups[size] = seed_group(
+                session, member_ids, expenses=size, name=f"{size} expenses"
+            )
+            friends = seed_users(session, 4, prefix=f"untagged{size}_")
+            seed_expenses(session, friends, size)
+            untagged_users[size] = friends[0]
+        session.commit()
+    return groups, untagged_users
+
+
+def main():
+    reset_database()
+    groups, untagged_users = seed()
+    client = TestClient(app)
+
+    endpoints = {
+        "get_group_expenses": lambda size: f"/api/groups/{groups[size]}/expenses",
+        "get_untagged_expenses": (
+            lambda size: f"/api/expenses/untagged?user_id={untagged_users[size]}"
+        ),
+        "get_expense_detail": lambda size: f"/api/expenses/{size}",
+    }
+
+    failures = []
+    for name, url in endpoints.items():
+        counts = []
+        for size in SIZES:
+            with count_queries() as counter:
+                response = client.get(url(size))
+            assert response.status_code == 200, response.text
+            counts.append(counter.count)
+        print(f"{name:<24} " + "  ".join(f"{n}:{c}" for n, c in zip(SIZES, counts)))
+        if len(set(counts)) != 1:
+            failures.append(name)
+
+    assert not failures, f"query count grows with expenses: {failures}"
+    print("OK: query counts are independent of the number of expenses")
+
+
+if __name__ == "__main__":
+    main()
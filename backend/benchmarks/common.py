@@ -0,0 +1,155 @@
+"""
+Shared helpers for the benchmark scripts: a throwaway SQLite database,
+synthetic data seeding and a SQL statement counter.
+
+Import this module before anything under `app` so DATABASE_URL points at the
+benchmark database instead of the configured one.
+"""
+
+import os
+import random
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+BENCH_DB_PATH = os.path.join(tempfile.gettempdir(), "hisaab_bench.db")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{BENCH_DB_PATH}")
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel
+
+from app.core.money import split_evenly
+from app.core.user_search import set_search_columns
+from app.db.database import async_engine, engine
+from app.db.models import (
+    Expense,
+    ExpenseParticipantLink,
+    Group,
+    Settlement,
+    User,
+    UserGroupLink,
+)
+
+
+def reset_database():
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+
+
+def seed_users(session: Session, count: int, prefix: str = "user") -> list:
+    users = [
+        set_search_columns(User(name=f"{prefix} {i}", email=f"{prefix}{i}@example.com"))
+        for i in range(count)
+    ]
+    session.add_all(users)
+    session.flush()
+    return [user.id for user in users]
+
+
+def seed_expenses(
+    session: Session,
+    member_ids: list,
+    count: int,
+    group_id: int = None,
+    seed: int = 42,
+):
+    """Add `count` equally split expenses between `member_ids`."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        participants = rng.sample(member_ids, k=min(len(member_ids), 4))
+        amount = rng.randint(1_000, 500_000)  # minor units
+        expense = Expense(
+            amount=amount,
+            description=f"Expense {i}",
+            currency="INR",
+            created_at=start + timedelta(minutes=i),
+            paid_by_id=rng.choice(member_ids),
+            group_id=group_id,
+        )
+        session.add(expense)
+        session.flush()
+        session.add_all(
+            ExpenseParticipantLink(
+                expense_id=expense.id,
+                user_id=user_id,
+                amount_owed=amount_owed,
+                ledger_amount=amount_owed,
+            )
+            for user_id, amount_owed in zip(
+                participants, split_evenly(amount, len(participants))
+            )
+        )
+    session.flush()
+
+
+def seed_settlements(
+    session: Session,
+    member_ids: list,
+    count: int,
+    group_id: int = None,
+    seed: int = 42,
+):
+    """Add `count` small settlements between random pairs of `member_ids`."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        debtor_id, creditor_id = rng.sample(member_ids, k=2)
+        session.add(
+            Settlement(
+                debtor_id=debtor_id,
+                creditor_id=creditor_id,
+                amount=rng.randint(100, 10_000),
+                created_at=start + timedelta(minutes=i, seconds=30),
+                group_id=group_id,
+            )
+        )
+    session.flush()
+
+
+def seed_group(
+    session: Session,
+    member_ids: list,
+    expenses: int,
+    name: str = "Bench group",
+    seed: int = 42,
+) -> int:
+    """Create a group of `member_ids` with `expenses` equally split expenses."""
+    group = Group(name=name)
+    session.add(group)
+    session.flush()
+    session.add_all(
+        UserGroupLink(user_id=user_id, group_id=group.id) for user_id in member_ids
+    )
+    seed_expenses(session, member_ids, expenses, group_id=group.id, seed=seed)
+    return group.id
+
+
+# Both engines the app executes on; async handlers run on the async engine
+APP_ENGINES = (engine, async_engine.sync_engine)
+
+
+class QueryCounter:
+    """Counts SQL statements executed on the given engines while active."""
+
+    def __init__(self, binds=APP_ENGINES):
+        self.binds = binds
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        for bind in self.binds:
+            event.listen(bind, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        for bind in self.binds:
+            event.remove(bind, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def count_queries(binds=APP_ENGINES):
+    with QueryCounter(binds) as counter:
+        yield counter
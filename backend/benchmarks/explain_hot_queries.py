@@ -0,0 +1,218 @@
+"""
+Record the query plan of every hot query before and after the model indexes,
+and fail if any of them still scans a whole table once the indexes exist.
+
+Usage:
+    python -m benchmarks.explain_hot_queries [--output plans.md]
+
+Runs against the benchmark SQLite database by default; set DATABASE_URL to a
+MySQL database (with data) to record MySQL's EXPLAIN output instead. Against
+MySQL the indexes are dropped and recreated, so never point it at production.
+"""
+
+from benchmarks.common import (  # isort: split -- points DATABASE_URL at the bench db
+    reset_database,
+    seed_expenses,
+    seed_group,
+    seed_users,
+)
+
+import argparse
+from datetime import datetime
+
+from sqlalchemy import or_, text
+from sqlmodel import Session, SQLModel, select
+
+from app.db.database import engine
+from app.db.models import (
+    Activity,
+    ActivityInbox,
+    Expense,
+    ExpenseParticipantLink,
+    Friendship,
+    GroupBalance,
+    GroupDebtSummary,
+    SelfManagementExpense,
+    Settlement,
+    Tag,
+    User,
+    UserGroupLink,
+)
+
+USER_ID, GROUP_ID, OTHER_ID = 1, 1, 2
+CURSOR = datetime(2024, 6, 1)
+
+
+def hot_queries() -> dict:
+    page = 51
+    return {
+        "auth by email": select(User).where(User.email == "user1@example.com"),
+        "group expenses page": select(Expense)
+        .where(Expense.group_id == GROUP_ID, Expense.created_at < CURSOR)
+        .order_by(Expense.created_at.desc(), Expense.id.desc())
+        .limit(page),
+        "untagged expenses": select(Expense).where(
+            Expense.group_id.is_(None),
+            or_(
+                Expense.paid_by_id == USER_ID,
+                Expense.id.in_(
+                    select(ExpenseParticipantLink.expense_id).where(
+                        ExpenseParticipantLink.user_id == USER_ID
+                    )
+                ),
+            ),
+        ),
+        "expense participants": select(ExpenseParticipantLink, User.name)
+        .join(User, User.id == ExpenseParticipantLink.user_id)
+        .where(ExpenseParticipantLink.expense_id.in_([1, 2, 3])),
+        "group debts": select(GroupDebtSummary).where(
+            GroupDebtSummary.group_id == GROUP_ID
+        ),
+        "settle-up pair": select(GroupDebtSummary).where(
+            GroupDebtSummary.group_id == GROUP_ID,
+            GroupDebtSummary.debtor_id == USER_ID,
+            GroupDebtSummary.creditor_id == OTHER_ID,
+        ),
+        "friend debt summary": select(GroupDebtSummary).where(
+            or_(
+                GroupDebtSummary.creditor_id == USER_ID,
+                GroupDebtSummary.debtor_id == USER_ID,
+            )
+        ),
+        "user groups": select(UserGroupLink).where(UserGroupLink.user_id == USER_ID),
+        "group members": select(UserGroupLink).where(
+            UserGroupLink.group_id == GROUP_ID
+        ),
+        "friends": select(Friendship).where(
+            or_(Friendship.user_id == USER_ID, Friendship.friend_id == USER_ID)
+        ),
+        "activities page": select(Activity)
+        .join(ActivityInbox, ActivityInbox.activity_id == Activity.id)
+        .where(ActivityInbox.user_id == USER_ID)
+        .order_by(ActivityInbox.timestamp.desc(), ActivityInbox.activity_id.desc())
+        .limit(page),
+        "settlements page": select(Settlement)
+        .where(Settlement.group_id == GROUP_ID)
+        .order_by(Settlement.created_at.desc(), Settlement.id.desc())
+        .limit(page),
+        "self expenses page": select(SelfManagementExpense)
+        .where(SelfManagementExpense.user_id == USER_ID)
+        .order_by(
+            SelfManagementExpense.created_at.desc(), SelfManagementExpense.id.desc()
+        )
+        .limit(page),
+        "tag expenses page": select(SelfManagementExpense)
+        .where(SelfManagementExpense.tag_id == 1)
+        .order_by(
+            SelfManagementExpense.created_at.desc(), SelfManagementExpense.id.desc()
+        )
+        .limit(page),
+        "user tags": select(Tag).where(Tag.user_id == USER_ID),
+        "group ledger": select(GroupBalance).where(GroupBalance.group_id == GROUP_ID),
+        "ledger replay": select(
+            Expense.paid_by_id,
+            ExpenseParticipantLink.user_id,
+            ExpenseParticipantLink.ledger_amount,
+        )
+        .join(ExpenseParticipantLink, ExpenseParticipantLink.expense_id == Expense.id)
+        .where(Expense.group_id == GROUP_ID),
+    }
+
+
+def model_indexes():
+    return [
+        index
+        for table in SQLModel.metadata.sorted_tables
+        for index in table.indexes
+        if index.name
+    ]
+
+
+def explain(connection, statement) -> list:
+    sql = str(
+        statement.compile(
+            dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+        )
+    )
+    if engine.dialect.name == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return [row[-1] for row in rows]
+    rows = connection.execute(text(f"EXPLAIN {sql}")).mappings().all()
+    return [
+        f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']}"
+        for row in rows
+    ]
+
+
+def is_full_scan(plan_line: str) -> bool:
+    if engine.dialect.name == "sqlite":
+        # "SCAN t" is a full scan; "SCAN t USING [COVERING] INDEX" walks an index
+        return plan_line.startswith("SCAN ") and "USING" not in plan_line
+    return "type=ALL" in plan_line
+
+
+def record_plans() -> dict:
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            connection.execute(text("ANALYZE"))
+        else:
+            for table in SQLModel.metadata.sorted_tables:
+                connection.execute(text(f"ANALYZE TABLE `{table.name}`"))
+        return {
+            name: explain(connection, statement)
+            for name, statement in hot_queries().items()
+        }
+
+
+def seed():
+    reset_database()
+    with Session(engine) as session:
+        member_ids = seed_users(session, 50)
+        for i in range(5):
+            seed_group(session, member_ids[i * 10 : i * 10 + 10], 500, seed=i)
+        seed_expenses(session, member_ids, 2000)
+        session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", help="Write the before/after plans as markdown")
+    parser.add_argument(
+        "--no-seed", action="store_true", help="Use the existing data as is"
+    )
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        seed()
+
+    indexes = model_indexes()
+    with engine.begin() as connection:
+        for index in indexes:
+            index.drop(connection, checkfirst=True)
+    before = record_plans()
+    with engine.begin() as connection:
+        for index in indexes:
+            index.create(connection, checkfirst=True)
+    after = record_plans()
+
+    lines, scans = [], []
+    for name in before:
+        lines.append(f"### {name}\n\nbefore:\n")
+        lines.extend(f"    {line}" for line in before[name])
+        lines.append("\nafter:\n")
+        lines.extend(f"    {line}" for line in after[name])
+        lines.append("")
+        if any(is_full_scan(line) for line in after[name]):
+            scans.append(name)
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(f"# Hot query plans ({engine.dialect.name})\n\n{report}\n")
+
+    assert not scans, f"full table scans remain after indexing: {scans}"
+    print(f"OK: no full table scans in {len(after)} hot queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,12 @@ import FriendAddModal from "./FriendAddModal";
 import { Button } from "./ui/button";
 import { EmptyState } from "./ui/empty-state";
 
+// Same display form as the backend: ₹12.50, or USD 12.50 for other currencies
+const formatAmount = (amount, currency = "INR") =>
+  currency === "INR"
+    ? `₹${amount.toFixed(2)}`
+    : `${currency} ${amount.toFixed(2)}`;
+
 const Friends = () => {
   const [friendsSummary, setFriendsSummary] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -62,18 +68,28 @@ const Friends = () => {
     return <Loader />;
   }
 
-  const totalBalance = friendsSummary.reduce((total, friend) => {
-    return (
-      total + (friend.is_debtor ? -friend.amount_owed : friend.amount_owed)
-    );
-  }, 0);
+  // Balances in different currencies are totalled separately, never added up
+  const totalsByCurrency = friendsSummary.reduce((totals, friend) => {
+    const amount = friend.is_debtor ? -friend.amount_owed : friend.amount_owed;
+    totals[friend.currency] = (totals[friend.currency] || 0) + amount;
+    return totals;
+  }, {});
+  const owed = [];
+  const owing = [];
+  Object.entries(totalsByCurrency).forEach(([currency, total]) => {
+    if (total > 0) owed.push(formatAmount(total, currency));
+    if (total < 0) owing.push(formatAmount(Math.abs(total), currency));
+  });
 
   const overallMessage =
-    totalBalance === 0
+    owed.length === 0 && owing.length === 0
       ? "Your balances are settled!"
-      : totalBalance < 0
-      ? `Overall, you owe: ₹${Math.abs(totalBalance).toFixed(2)}`
-      : `Overall, you are owed: ₹${totalBalance.toFixed(2)}`;
+      : [
+          owing.length > 0 && `Overall, you owe: ${owing.join(", ")}`,
+          owed.length > 0 && `Overall, you are owed: ${owed.join(", ")}`,
+        ]
+          .filter(Boolean)
+          .join(" · ");
 
   return (
     <div className="space-y-6">
@@ -92,7 +108,7 @@ const Friends = () => {
         {friendsSummary.length > 0 ? (
           friendsSummary.map((friend) => (
             <div
-              key={friend.friend_id}
+              key={`${friend.friend_id}-${friend.currency}`}
               className={`group p-6 rounded-2xl bg-background-surface hover:bg-background-elevated transition-all
                        ${friend.amount_owed === 0 ? "opacity-60" : ""}`}
             >
@@ -150,7 +166,7 @@ const Friends = () => {
                     : "+"}{" "}
                   {friend.amount_owed === 0
                     ? ""
-                    : `₹${friend.amount_owed.toFixed(2)}`}
+                    : formatAmount(friend.amount_owed, friend.currency)}
                 </div>
               </div>
 
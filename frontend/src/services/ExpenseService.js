@@ -12,7 +12,10 @@ class ExpenseService {
 
   async getExpenseSummaryPerFriend(user_id) {
     try {
-      const response = await this.api.get(`/expense-summary/${user_id}`);
+      // The per-group breakdown is opt-in; the Friends view lists it for every friend
+      const response = await this.api.get(`/expense-summary/${user_id}`, {
+        params: { include_groups: true },
+      });
       return response.data; // Ensure the response data is returned correctly
     } catch (error) {
       console.error("Error fetching expense summary:", error);